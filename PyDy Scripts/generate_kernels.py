@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+"""
+Using PyDy and Sympy, this script derives the state derivatives of the quadcopter
+(same model as the Quad_3D_*_Quat.py scripts) and writes them as Python modules in
+Simulation/quadFiles/stateDotKernels, one module per combination of:
+
+orientation       : "NED" (frd body, North-East-Down) or "ENU" (flu body, East-North-Up)
+precession        : with or without gyroscopic precession of the rotors
+wind and drag     : with or without aerodynamic drag (and therefore wind)
+
+The expressions are reduced with common subexpression elimination. Each module contains
+3 variants of the same kernel, which all write the derivatives into a caller-supplied "out" array:
+
+stateDot(out, state, cmd, velW, qW1, qW2, prm)        : Python floats, prm is a QuadParams struct
+stateDot_array(out, state, cmd, velW, qW1, qW2, prm)  : indexes arrays only, prm is a float array
+                                                        ordered as "paramNames" (can be compiled with numba)
+stateDot_batch(out, state, cmd, velW, qW1, qW2, prm)  : NumPy, for (N, 21) states and (N, 4) commands
+
+Run from the repository root: python "PyDy Scripts/generate_kernels.py"
+"""
+
+import re
+from sympy import symbols, Symbol, Matrix, simplify, expand, collect, together, fraction, cse
+from sympy.printing.pycode import pycode
+from sympy.physics.mechanics import *
+
+outputDir = "./Simulation/quadFiles/stateDotKernels/"
+
+stateNames = ["x", "y", "z", "q0", "q1", "q2", "q3", "xdot", "ydot", "zdot", "p", "q", "r",
+              "wM1", "wdotM1", "wM2", "wdotM2", "wM3", "wdotM3", "wM4", "wdotM4"]
+cmdNames   = ["uM1", "uM2", "uM3", "uM4"]
+
+# All parameters that can be read from QuadParams, in the order of the array variant
+allParamNames = ["mB", "g", "dxm", "dym", "dzm", "IBxx", "IByy", "IBzz", "IRzz", "Cd",
+                 "kTh", "kTo", "kp", "tau2", "m2dampTau", "minWmotor", "maxWmotor"]
+motorParamNames = ["kTh", "kTo", "kp", "tau2", "m2dampTau", "minWmotor", "maxWmotor"]
+
+
+def kernelModuleName(orient, usePrecession, useWindDrag):
+    # Must match quadFiles/stateDotKernels/__init__.py
+    name = "stateDot_" + orient
+    if usePrecession:
+        name += "_precession"
+    if useWindDrag:
+        name += "_drag"
+    return name
+
+
+def deriveStateDot(orient, usePrecession, useWindDrag):
+
+    # Reference frames and Points
+    # ---------------------------
+    N = ReferenceFrame('N')  # Inertial Frame
+    B = ReferenceFrame('B')  # Drone after X (roll) rotation (Final rotation)
+    W = ReferenceFrame('W')  # Wind reference frame
+
+    No = Point('No')
+    Bcm = Point('Bcm')  # Drone's center of mass
+    M1 = Point('M1')    # Motor 1 is front left, then the rest increments CW (Drone is in X configuration, not +)
+    M2 = Point('M2')
+    M3 = Point('M3')
+    M4 = Point('M4')
+    Wo = Point('Wo')    # Arbitrary point in the Wind Frame
+
+    # Variables
+    # ---------------------------
+    x, y, z, xdot, ydot, zdot = dynamicsymbols('x y z xdot ydot zdot')
+    q0, q1, q2, q3, p, q, r = dynamicsymbols('q0 q1 q2 q3 p q r')
+    xd, yd, zd, xdotd, ydotd, zdotd = dynamicsymbols('x y z xdot ydot zdot', 1)
+    q0d, q1d, q2d, q3d, pd, qd, rd = dynamicsymbols('q0 q1 q2 q3 p q r', 1)
+
+    # Constants
+    # ---------------------------
+    mB, g, dxm, dym, dzm, IBxx, IByy, IBzz, IRzz, wM1, wM2, wM3, wM4 = symbols('mB g dxm dym dzm IBxx IByy IBzz IRzz wM1 wM2 wM3 wM4')
+    ThrM1, ThrM2, ThrM3, ThrM4, TorM1, TorM2, TorM3, TorM4 = symbols('ThrM1 ThrM2 ThrM3 ThrM4 TorM1 TorM2 TorM3 TorM4')
+    qW1, qW2, velW, Cd = symbols('qW1 qW2 velW Cd')
+    # Drag is Cd*sign(v)*v**2 on each axis. sign(v)*v**2 is kept as a symbol during the
+    # derivation (sympy would turn sign() into Piecewise when simplifying), and is written
+    # as v*abs(v) in the kernel.
+    dragX, dragY, dragZ = symbols('dragX dragY dragZ')
+
+    # Rotation Quaternion
+    # ---------------------------
+    B.orient(N, 'Quaternion', [q0, q1, q2, q3])
+    B.set_ang_vel(N, p*B.x + q*B.y + r*B.z)
+
+    # Origin
+    # ---------------------------
+    No.set_vel(N, 0)
+
+    # Translation
+    # ---------------------------
+    Bcm.set_pos(No, x*N.x + y*N.y + z*N.z)
+    Bcm.set_vel(N, Bcm.pos_from(No).dt(N))
+
+    # Motor placement
+    # M1 is front left, then clockwise numbering
+    # dzm is positive for motors above center of mass
+    # ---------------------------
+    if (orient == "NED"):
+        M1.set_pos(Bcm,  dxm*B.x - dym*B.y - dzm*B.z)
+        M2.set_pos(Bcm,  dxm*B.x + dym*B.y - dzm*B.z)
+        M3.set_pos(Bcm, -dxm*B.x + dym*B.y - dzm*B.z)
+        M4.set_pos(Bcm, -dxm*B.x - dym*B.y - dzm*B.z)
+    elif (orient == "ENU"):
+        M1.set_pos(Bcm,  dxm*B.x + dym*B.y + dzm*B.z)
+        M2.set_pos(Bcm,  dxm*B.x - dym*B.y + dzm*B.z)
+        M3.set_pos(Bcm, -dxm*B.x - dym*B.y + dzm*B.z)
+        M4.set_pos(Bcm, -dxm*B.x + dym*B.y + dzm*B.z)
+    M1.v2pt_theory(Bcm, N, B)
+    M2.v2pt_theory(Bcm, N, B)
+    M3.v2pt_theory(Bcm, N, B)
+    M4.v2pt_theory(Bcm, N, B)
+
+    # Inertia Dyadic
+    # ---------------------------
+    IB = inertia(B, IBxx, IByy, IBzz)
+
+    # Create Bodies
+    # ---------------------------
+    BodyB = RigidBody('BodyB', Bcm, B, mB, (IB, Bcm))
+    BodyList = [BodyB]
+
+    # Wind
+    # ---------------------------
+    W.orient(N, 'Body', [qW1, qW2, 0], 'ZYX')
+    Wo.set_vel(N, velW*W.x)
+    airVel = Bcm.vel(N) - Wo.vel(N)
+
+    # Forces and Torques
+    # ---------------------------
+    if (orient == "NED"):
+        Grav_Force = (Bcm, mB*g*N.z)
+        FM1 = (M1, -ThrM1*B.z)
+        FM2 = (M2, -ThrM2*B.z)
+        FM3 = (M3, -ThrM3*B.z)
+        FM4 = (M4, -ThrM4*B.z)
+
+        TM1 = (B, -TorM1*B.z)
+        TM2 = (B,  TorM2*B.z)
+        TM3 = (B, -TorM3*B.z)
+        TM4 = (B,  TorM4*B.z)
+
+        gyro = (B, -IRzz*cross(B.ang_vel_in(N), (wM1 - wM2 + wM3 - wM4)*B.z))
+    elif (orient == "ENU"):
+        Grav_Force = (Bcm, -mB*g*N.z)
+        FM1 = (M1, ThrM1*B.z)
+        FM2 = (M2, ThrM2*B.z)
+        FM3 = (M3, ThrM3*B.z)
+        FM4 = (M4, ThrM4*B.z)
+
+        TM1 = (B,  TorM1*B.z)
+        TM2 = (B, -TorM2*B.z)
+        TM3 = (B,  TorM3*B.z)
+        TM4 = (B, -TorM4*B.z)
+
+        gyro = (B, -IRzz*cross(B.ang_vel_in(N), (-wM1 + wM2 - wM3 + wM4)*B.z))
+
+    dragForceX = (Bcm, -Cd*dragX*N.x)
+    dragForceY = (Bcm, -Cd*dragY*N.y)
+    dragForceZ = (Bcm, -Cd*dragZ*N.z)
+
+    ForceList = [Grav_Force, FM1, FM2, FM3, FM4, TM1, TM2, TM3, TM4]
+    if useWindDrag:
+        ForceList += [dragForceX, dragForceY, dragForceZ]
+    if usePrecession:
+        ForceList += [gyro]
+
+    # Calculate Quaternion Derivative
+    # ---------------------------
+    Gquat = Matrix([[-q1,  q0,  q3, -q2],
+                    [-q2, -q3,  q0,  q1],
+                    [-q3,  q2, -q1,  q0]])
+
+    angVel = Matrix([[dot(B.ang_vel_in(N), B.x)],[dot(B.ang_vel_in(N), B.y)],[dot(B.ang_vel_in(N), B.z)]])
+    quat_dot = 1.0/2*Gquat.T*angVel
+
+    # Kinematic Differential Equations
+    # ---------------------------
+    kd = [xdot - xd, ydot - yd, zdot - zd, q0d - quat_dot[0], q1d - quat_dot[1], q2d - quat_dot[2], q3d - quat_dot[3]]
+
+    # Kane's Method
+    # ---------------------------
+    KM = KanesMethod(N, q_ind=[x, y, z, q0, q1, q2, q3], u_ind=[xdot, ydot, zdot, p, q, r], kd_eqs=kd)
+    (fr, frstar) = KM.kanes_equations(BodyList, ForceList)
+
+    # Equations of Motion, solved for the State Derivatives (MM*x = rhs)
+    # ---------------------------
+    kdd = KM.kindiffdict()
+    MM = KM.mass_matrix_full.subs(kdd)
+    rhs = KM.forcing_full.subs(kdd)
+    stateDot = MM.LUsolve(rhs)
+
+    # Replace time-dependent symbols by plain symbols of the same name
+    # ---------------------------
+    toPlain = {s: Symbol(s.func.__name__) for s in [x, y, z, q0, q1, q2, q3, xdot, ydot, zdot, p, q, r]}
+    stateDot = [simplify(e.subs(toPlain)) for e in stateDot]
+    airVel = [simplify(dot(airVel, n).subs(kdd).subs(toPlain)) for n in [N.x, N.y, N.z]]
+
+    # Factor the translational equations with the total thrust (when it's the only thrust
+    # dependency), and collect the rotational equations by parameter
+    # ---------------------------
+    ThrTot = Symbol('ThrTot')
+    for i in range(7, 13):
+        e = stateDot[i]
+        eTot = simplify(e.subs(ThrM1, ThrTot - ThrM2 - ThrM3 - ThrM4))
+        if not (eTot.free_symbols & {ThrM2, ThrM3, ThrM4}):
+            e = eTot
+        num, den = fraction(together(e))
+        num = collect(expand(num), [ThrTot, Cd, dxm, dym, IRzz, q*r, p*r, p*q])
+        stateDot[i] = num/den
+
+    return stateDot[0:13], airVel
+
+
+def printExpr(expr):
+    return pycode(expr, fully_qualified_modules=False)
+
+
+def writeKernelModule(orient, usePrecession, useWindDrag):
+
+    stateDot, airVel = deriveStateDot(orient, usePrecession, useWindDrag)
+
+    # Common Subexpression Elimination
+    # ---------------------------
+    xs = symbols('x0:1000')
+    body = []
+    airNames = ["airVx", "airVy", "airVz"]
+    dragNames = ["dragX", "dragY", "dragZ"]
+    if useWindDrag:
+        body.append("# Air velocity and aero drag")
+        rep, red = cse(airVel, symbols=iter(symbols('w0:1000')))
+        for (sym, e) in rep:
+            body.append("{} = {}".format(sym, printExpr(e)))
+        for i in range(3):
+            body.append("{} = {}".format(airNames[i], printExpr(red[i])))
+        for i in range(3):
+            body.append("{0} = {1}*abs({1})".format(dragNames[i], airNames[i]))
+    rep, red = cse(stateDot, symbols=iter(xs))
+    for (sym, e) in rep:
+        body.append("{} = {}".format(sym, printExpr(e)))
+    rows = [printExpr(e) for e in red]
+
+    # Parameters used by the kernel
+    # ---------------------------
+    usedSymbols = set()
+    for e in stateDot:
+        usedSymbols |= {str(s) for s in e.free_symbols}
+    paramNames = [n for n in allParamNames if (n in usedSymbols or n in motorParamNames)]
+    useThrTot = "ThrTot" in usedSymbols
+
+    # Assemble the 3 variants
+    # ---------------------------
+    def kernel(variant):
+        ind = "    "
+        lines = []
+        if (variant == "python"):
+            lines.append("def stateDot(out, state, cmd, velW, qW1, qW2, prm):")
+            lines.append("")
+            lines.append(ind + "(" + ", ".join(stateNames[0:13]) + ",")
+            lines.append(ind + " " + ", ".join(stateNames[13:21]) + ") = state.tolist()")
+            lines.append(ind + ", ".join(cmdNames) + " = cmd.tolist()")
+            for n in paramNames:
+                lines.append(ind + "{} = prm.{}".format(n, n))
+        elif (variant == "array"):
+            lines.append("def stateDot_array(out, state, cmd, velW, qW1, qW2, prm):")
+            lines.append("")
+            for i, n in enumerate(stateNames):
+                lines.append(ind + "{} = state[{}]".format(n, i))
+            for i, n in enumerate(cmdNames):
+                lines.append(ind + "{} = cmd[{}]".format(n, i))
+            for i, n in enumerate(paramNames):
+                lines.append(ind + "{} = prm[{}]".format(n, i))
+        elif (variant == "batch"):
+            lines.append("def stateDot_batch(out, state, cmd, velW, qW1, qW2, prm):")
+            lines.append("")
+            for i, n in enumerate(stateNames):
+                lines.append(ind + "{} = state[:,{}]".format(n, i))
+            for i, n in enumerate(cmdNames):
+                lines.append(ind + "{} = cmd[:,{}]".format(n, i))
+            for n in paramNames:
+                lines.append(ind + "{} = prm.{}".format(n, n))
+
+        # Motor Dynamics and Rotor forces (not from PyDy)
+        lines.append("")
+        lines.append(ind + "# Motor Dynamics and Rotor forces (Second Order System: https://apmonitor.com/pdc/index.php/Main/SecondOrderSystems)")
+        for i in range(1, 5):
+            lines.append(ind + "wddotM{0} = (m2dampTau*wdotM{0} - wM{0} + kp*uM{0})/tau2".format(i))
+        for i in range(1, 5):
+            if (variant == "batch"):
+                lines.append(ind + "wMc{0} = np.clip(wM{0}, minWmotor, maxWmotor)".format(i))
+            else:
+                lines.append(ind + "wMc{0} = min(max(wM{0}, minWmotor), maxWmotor)".format(i))
+        for i in range(1, 5):
+            lines.append(ind + "ThrM{0} = kTh*wMc{0}*wMc{0}".format(i))
+        for i in range(1, 5):
+            lines.append(ind + "TorM{0} = kTo*wMc{0}*wMc{0}".format(i))
+        if useThrTot:
+            lines.append(ind + "ThrTot = ThrM1 + ThrM2 + ThrM3 + ThrM4")
+
+        # State Derivatives (from PyDy)
+        lines.append("")
+        lines.append(ind + "# State Derivatives (from PyDy)")
+        for b in body:
+            if b.startswith("#"):
+                lines.append(ind + b)
+                continue
+            if (variant == "batch"):
+                b = re.sub(r"\b(sin|cos)\(", r"np.\1(", b)
+            lines.append(ind + b)
+        lines.append("")
+        outRows = rows + ["wdotM1", "wddotM1", "wdotM2", "wddotM2", "wdotM3", "wddotM3", "wdotM4", "wddotM4"]
+        for i, e in enumerate(outRows):
+            if (variant == "batch"):
+                lines.append(ind + "out[:,{}] = {}".format(i, e))
+            else:
+                lines.append(ind + "out[{}] = {}".format(i, e))
+        return "\n".join(lines)
+
+    header = '''# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Generated by "PyDy Scripts/generate_kernels.py", do not edit by hand.
+# Orientation: {}, gyroscopic precession: {}, wind and aero drag: {}
+
+import numpy as np
+from math import sin, cos
+
+paramNames = ({})
+
+
+'''.format(orient, "yes" if usePrecession else "no", "yes" if useWindDrag else "no",
+           ", ".join('"{}"'.format(n) for n in paramNames))
+
+    fileName = outputDir + kernelModuleName(orient, usePrecession, useWindDrag) + ".py"
+    with open(fileName, "w") as f:
+        f.write(header)
+        f.write(kernel("python") + "\n\n\n")
+        f.write(kernel("array") + "\n\n\n")
+        f.write(kernel("batch") + "\n")
+    print("Wrote {}".format(fileName))
+
+
+if __name__ == "__main__":
+    for orient in ["NED", "ENU"]:
+        for usePrecession in [False, True]:
+            for useWindDrag in [False, True]:
+                writeKernelModule(orient, usePrecession, useWindDrag)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Accuracy vs speed comparison of the quadcopter integrators, on the default tunnel run
+# of run_3D_simulation.py (without the animation). The "dopri5" run is the reference.
+# Run from the repository root: python Simulation/benchmark_integrators.py
+
+import numpy as np
+import time
+
+from trajectory import Trajectory
+from potentialField import PotField
+from ctrl import Control
+from quadFiles.quad import Quadcopter
+from quadFiles.integrators import integratorOptions
+from utils.windModel import Wind
+from run_3D_simulation import quad_sim
+from simJIT import SimJIT
+import config
+
+
+def runHeadless(integrator, Ti, Ts, Tf, useJIT=False):
+
+    # Same setup as main() in run_3D_simulation.py
+    # ---------------------------
+    trajSelect = np.array([2, 4, 0])
+    quad = Quadcopter(Ti, integrator)
+    traj = Trajectory(quad, "xyz_pos", trajSelect)
+    potfld = PotField(1)
+    ctrl = Control(quad, traj.yawType)
+    wind = Wind('None', 2.0, 90, -15)
+
+    traj.desiredState(0, Ts, quad)
+    potfld.isWithinRange(quad)
+    potfld.isWithinField(quad)
+    potfld.rep_force(quad, traj)
+    ctrl.controller(traj, quad, potfld, Ts)
+    if (useJIT):
+        simStep = SimJIT(quad, ctrl, wind, traj, potfld, Ts)
+
+    numTimeStep = int(Tf/Ts+1)
+    pos_all     = np.zeros([numTimeStep, 3])
+    euler_all   = np.zeros([numTimeStep, 3])
+    minDist_all = np.zeros(numTimeStep)
+    pos_all[0,:]   = quad.pos
+    euler_all[0,:] = quad.euler
+    minDist_all[0] = potfld.distanceMin
+
+    # Run Simulation
+    # ---------------------------
+    start_time = time.perf_counter()
+    t = Ti
+    i = 1
+    while round(t,3) < Tf:
+        if (useJIT):
+            t = simStep.step(t)
+        else:
+            t = quad_sim(t, Ts, quad, ctrl, wind, traj, potfld)
+        pos_all[i,:]   = quad.pos
+        euler_all[i,:] = quad.euler
+        minDist_all[i] = potfld.distanceMin
+        i += 1
+    run_time = time.perf_counter() - start_time
+
+    return run_time, pos_all, euler_all, minDist_all
+
+
+def main():
+    Ti = 0
+    Ts = 0.005
+    Tf = 95
+
+    results = {}
+    for integrator in integratorOptions:
+        results[integrator] = runHeadless(integrator, Ti, Ts, Tf)
+        print("{:>14s}: simulated {:.2f}s in {:.3f}s".format(integrator, Tf, results[integrator][0]))
+
+    ref_time, ref_pos, ref_euler, ref_minDist = results["dopri5"]
+    print()
+    print("{:>14s} {:>10s} {:>9s} {:>14s} {:>14s} {:>15s} {:>16s}".format(
+          "integrator", "time (s)", "speedup", "max pos err(m)", "rms pos err(m)", "max att err(°)", "min obst dist(m)"))
+    for integrator in integratorOptions:
+        run_time, pos_all, euler_all, minDist_all = results[integrator]
+        pos_err = np.linalg.norm(pos_all - ref_pos, axis=1)
+        att_err = np.abs(np.angle(np.exp(1j*(euler_all - ref_euler))))*180/np.pi
+        print("{:>14s} {:>10.3f} {:>9.2f} {:>14.2e} {:>14.2e} {:>15.2e} {:>16.4f}".format(
+              integrator, run_time, ref_time/run_time, pos_err.max(), np.sqrt(np.mean(pos_err**2)),
+              att_err.max(), minDist_all[minDist_all >= 0].min()))
+
+
+if __name__ == "__main__":
+    if (config.orient == "NED" or config.orient == "ENU"):
+        main()
+    else:
+        raise Exception("{} is not a valid orientation. Verify config.py file.".format(config.orient))
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Micro-benchmark of the quaternion and rotation functions: the previous utils functions
+# (copied below as ...Legacy) against the scalar kernels and the batched versions of
+# utils/rotations.py, for one call, for the post-processing of a full log (one rotation per
+# time step of the default run) and for one step of the controller (Control.controller).
+# Run from the repository root: python Simulation/benchmark_rotations.py
+
+import numpy as np
+from numpy.linalg import norm
+import timeit
+
+from trajectory import Trajectory
+from potentialField import PotField
+from ctrl import Control
+from quadFiles.quad import Quadcopter
+import utils
+import utils.rotations as rot
+import config
+
+
+# Previous implementations (reference)
+# ---------------------------
+def vectNormalizeLegacy(q):
+    return q/norm(q)
+
+def quatMultiplyLegacy(q, p):
+    Q = np.array([[q[0], -q[1], -q[2], -q[3]],
+                  [q[1],  q[0], -q[3],  q[2]],
+                  [q[2],  q[3],  q[0], -q[1]],
+                  [q[3], -q[2],  q[1],  q[0]]])
+    return Q@p
+
+def inverseLegacy(q):
+    qinv = np.array([q[0], -q[1], -q[2], -q[3]])/norm(q)
+    return qinv
+
+def quatToYPR_ZYXLegacy(q):
+    q0 = q[0]
+    q1 = q[1]
+    q2 = q[2]
+    q3 = q[3]
+    YPR = utils.threeaxisrot( 2.0*(q1*q2 + q0*q3), \
+                              q0**2 + q1**2 - q2**2 - q3**2, \
+                              -2.0*(q1*q3 - q0*q2), \
+                              2.0*(q2*q3 + q0*q1), \
+                              q0**2 - q1**2 - q2**2 + q3**2)
+    return YPR
+
+def quat2DcmLegacy(q):
+    dcm = np.zeros([3,3])
+    dcm[0,0] = q[0]**2 + q[1]**2 - q[2]**2 - q[3]**2
+    dcm[0,1] = 2.0*(q[1]*q[2] - q[0]*q[3])
+    dcm[0,2] = 2.0*(q[1]*q[3] + q[0]*q[2])
+    dcm[1,0] = 2.0*(q[1]*q[2] + q[0]*q[3])
+    dcm[1,1] = q[0]**2 - q[1]**2 + q[2]**2 - q[3]**2
+    dcm[1,2] = 2.0*(q[2]*q[3] - q[0]*q[1])
+    dcm[2,0] = 2.0*(q[1]*q[3] - q[0]*q[2])
+    dcm[2,1] = 2.0*(q[2]*q[3] + q[0]*q[1])
+    dcm[2,2] = q[0]**2 - q[1]**2 - q[2]**2 + q[3]**2
+    return dcm
+
+def RotToQuatLegacy(R):
+    R11 = R[0, 0]
+    R12 = R[0, 1]
+    R13 = R[0, 2]
+    R21 = R[1, 0]
+    R22 = R[1, 1]
+    R23 = R[1, 2]
+    R31 = R[2, 0]
+    R32 = R[2, 1]
+    R33 = R[2, 2]
+    tr = R11 + R22 + R33
+    if tr > R11 and tr > R22 and tr > R33:
+        e0 = 0.5 * np.sqrt(1 + tr)
+        r = 0.25 / e0
+        e1 = (R32 - R23) * r
+        e2 = (R13 - R31) * r
+        e3 = (R21 - R12) * r
+    elif R11 > R22 and R11 > R33:
+        e1 = 0.5 * np.sqrt(1 - tr + 2*R11)
+        r = 0.25 / e1
+        e0 = (R32 - R23) * r
+        e2 = (R12 + R21) * r
+        e3 = (R13 + R31) * r
+    elif R22 > R33:
+        e2 = 0.5 * np.sqrt(1 - tr + 2*R22)
+        r = 0.25 / e2
+        e0 = (R13 - R31) * r
+        e1 = (R12 + R21) * r
+        e3 = (R23 + R32) * r
+    else:
+        e3 = 0.5 * np.sqrt(1 - tr + 2*R33)
+        r = 0.25 / e3
+        e0 = (R21 - R12) * r
+        e1 = (R13 + R31) * r
+        e2 = (R23 + R32) * r
+    q = np.array([e0,e1,e2,e3])
+    q = q*np.sign(e0)
+    q = q/np.sqrt(np.sum(q[0]**2 + q[1]**2 + q[2]**2 + q[3]**2))
+    return q
+
+legacy = {"vectNormalize": vectNormalizeLegacy, "cross": np.cross, "quatMultiply": quatMultiplyLegacy, "inverse": inverseLegacy,
+          "quatToYPR_ZYX": quatToYPR_ZYXLegacy, "quat2Dcm": quat2DcmLegacy, "RotToQuat": RotToQuatLegacy}
+
+
+def perSecond(func, number):
+    t = min(timeit.repeat(func, number=number, repeat=5))
+    return number/t
+
+
+def main():
+    number = 20000
+    numSamples = 19001    # Time steps of the default run (95s at 0.005s)
+
+    rng = np.random.default_rng(0)
+    quats = rot.vectNormalize(rng.normal(size=[numSamples, 4]))
+    quats2 = rot.vectNormalize(rng.normal(size=[numSamples, 4]))
+    dcms = rot.quat2Dcm(quats)
+    q, p, R = quats[0], quats2[0], dcms[0]
+    out4 = np.empty(4)
+    out33 = np.empty([3, 3])
+    out3 = np.empty(3)
+
+    # (legacy call, new call, new call with output buffer, batched call on all samples)
+    cases = {
+        "cross":         (lambda: np.cross(q[1:4], p[1:4]), lambda: rot.cross(q[1:4], p[1:4]), lambda: rot.cross(q[1:4], p[1:4], out3),
+                          lambda: np.array([np.cross(a, b) for (a, b) in zip(quats[:,1:4], quats2[:,1:4])]), lambda: rot.cross(quats[:,1:4], quats2[:,1:4])),
+        "quatMultiply":  (lambda: quatMultiplyLegacy(q, p), lambda: rot.quatMultiply(q, p), lambda: rot.quatMultiply(q, p, out4),
+                          lambda: np.array([quatMultiplyLegacy(a, b) for (a, b) in zip(quats, quats2)]), lambda: rot.quatMultiply(quats, quats2)),
+        "inverse":       (lambda: inverseLegacy(q), lambda: rot.inverse(q), lambda: rot.inverse(q, out4),
+                          lambda: np.array([inverseLegacy(a) for a in quats]), lambda: rot.inverse(quats)),
+        "quat2Dcm":      (lambda: quat2DcmLegacy(q), lambda: rot.quat2Dcm(q), lambda: rot.quat2Dcm(q, out33),
+                          lambda: np.array([quat2DcmLegacy(a) for a in quats]), lambda: rot.quat2Dcm(quats)),
+        "RotToQuat":     (lambda: RotToQuatLegacy(R), lambda: rot.RotToQuat(R), lambda: rot.RotToQuat(R, out4),
+                          lambda: np.array([RotToQuatLegacy(a) for a in dcms]), lambda: rot.RotToQuat(dcms)),
+        "quatToYPR_ZYX": (lambda: quatToYPR_ZYXLegacy(q), lambda: rot.quatToYPR_ZYX(q), lambda: rot.quatToYPR_ZYX(q, out3),
+                          lambda: np.array([quatToYPR_ZYXLegacy(a) for a in quats]), lambda: rot.quatToYPR_ZYX(quats)),
+    }
+
+    # Check that both implementations give the same results (on all samples, batched)
+    for name, (_, _, _, loopLegacy, batch) in cases.items():
+        print("{:>14s}: max abs difference {:.3e}".format(name, np.abs(loopLegacy() - batch()).max()))
+    print()
+
+    print("{:>14s} {:>12s} {:>12s} {:>12s} {:>8s} {:>12s} {:>12s} {:>8s}".format(
+          "", "legacy/s", "kernel/s", "with out/s", "speedup", "log legacy", "log batched", "speedup"))
+    for name, (single, kernel, kernelOut, loopLegacy, batch) in cases.items():
+        a = perSecond(single, number)
+        b = perSecond(kernel, number)
+        c = perSecond(kernelOut, number)
+        d = 1/perSecond(loopLegacy, 1)
+        e = 1/perSecond(batch, 1)
+        print("{:>14s} {:>12.0f} {:>12.0f} {:>12.0f} {:>8.2f} {:>11.1f}ms {:>11.2f}ms {:>8.0f}".format(
+              name, a, b, c, c/a, d*1e3, e*1e3, d/e))
+    print()
+
+    # One step of the controller, with the previous functions and with the new ones
+    Ts = 0.005
+    quad = Quadcopter(0)
+    traj = Trajectory(quad, "xyz_pos", np.array([2, 4, 0]))
+    potfld = PotField(1)
+    ctrl = Control(quad, traj.yawType)
+    traj.desiredState(0, Ts, quad)
+    potfld.isWithinRange(quad)
+    potfld.isWithinField(quad)
+    potfld.rep_force(quad, traj)
+
+    current = {name: getattr(utils, name) for name in legacy}
+    for name, func in legacy.items():
+        setattr(utils, name, func)
+    before = perSecond(lambda: ctrl.controller(traj, quad, potfld, Ts), number//4)
+    for name, func in current.items():
+        setattr(utils, name, func)
+    after = perSecond(lambda: ctrl.controller(traj, quad, potfld, Ts), number//4)
+    print("Control.controller: {:.0f} steps/s before, {:.0f} steps/s after ({:.2f}x)".format(before, after, after/before))
+
+
+if __name__ == "__main__":
+    if (config.orient == "NED" or config.orient == "ENU"):
+        main()
+    else:
+        raise Exception("{} is not a valid orientation. Verify config.py file.".format(config.orient))
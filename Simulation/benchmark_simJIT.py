@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Speed of the JIT-compiled simulation step (simJIT.py) against the NumPy step, on the
+# default tunnel run of run_3D_simulation.py (without the animation), and deviation of
+# the JIT trajectories from the NumPy trajectories with the same integrator.
+# Run from the repository root: python Simulation/benchmark_simJIT.py
+
+import numpy as np
+import time
+
+from benchmark_integrators import runHeadless
+import simJIT
+import config
+
+
+def main():
+    Ti = 0
+    Ts = 0.005
+    Tf = 95
+
+    # Compile (or load from numba's cache) before timing
+    start_time = time.perf_counter()
+    runHeadless("rk4", Ti, Ts, Ts, useJIT=True)
+    print("JIT compilation / cache loading: {:.3f}s".format(time.perf_counter() - start_time))
+
+    runs = [("dopri5", False), ("rk4", False), ("semi_implicit", False), ("rk4", True), ("semi_implicit", True)]
+    results = {}
+    for (integrator, useJIT) in runs:
+        results[(integrator, useJIT)] = runHeadless(integrator, Ti, Ts, Tf, useJIT)
+        print("{:>14s} {:>5s}: simulated {:.2f}s in {:.3f}s".format(integrator, "JIT" if useJIT else "NumPy", Tf, results[(integrator, useJIT)][0]))
+
+    ref_time = results[("dopri5", False)][0]
+    print()
+    print("{:>14s} {:>7s} {:>10s} {:>17s} {:>16s} {:>18s}".format(
+          "integrator", "backend", "time (s)", "speedup vs dopri5", "speedup vs NumPy", "max pos diff (m)"))
+    for (integrator, useJIT) in runs:
+        run_time, pos_all = results[(integrator, useJIT)][0:2]
+        npy_time, npy_pos = results[(integrator, False)][0:2]
+        print("{:>14s} {:>7s} {:>10.3f} {:>17.2f} {:>16.2f} {:>18.2e}".format(
+              integrator, "JIT" if useJIT else "NumPy", run_time, ref_time/run_time, npy_time/run_time,
+              np.abs(pos_all - npy_pos).max()))
+
+
+if __name__ == "__main__":
+    if not simJIT.numbaAvailable:
+        raise Exception("numba is not installed.")
+    if (config.orient == "NED" or config.orient == "ENU"):
+        main()
+    else:
+        raise Exception("{} is not a valid orientation. Verify config.py file.".format(config.orient))
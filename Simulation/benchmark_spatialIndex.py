@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Speed of the PotField range query with the grid index (spatialIndex.py) against the
+# brute-force test over the whole point cloud, on the tunnel point cloud and on a point
+# cloud 100 times larger (the tunnel point cloud tiled 10x10 in x and y), and cost of the
+# PotField range and field updates along the default tunnel run for several neighbour
+# tracking margins (rangeMargin = 0 queries the index at every step).
+# Run from the repository root: python Simulation/benchmark_spatialIndex.py
+
+import numpy as np
+import time
+
+from spatialIndex import GridIndex
+from potentialField import PotField
+from benchmark_integrators import runHeadless
+
+
+def bruteForce(points, center, halfSize):
+    inBox = (abs(center[0]-points[:,0]) <= halfSize) & \
+            (abs(center[1]-points[:,1]) <= halfSize) & \
+            (abs(center[2]-points[:,2]) <= halfSize)
+    return np.where(inBox)[0]
+
+
+def timeQueries(points, gridStep, halfSize, numQueries=500):
+    start_time = time.perf_counter()
+    index = GridIndex(points, gridStep, halfSize)
+    build_time = time.perf_counter() - start_time
+
+    # Query points near the point cloud
+    rng = np.random.default_rng(0)
+    centers = points[rng.integers(0, len(points), numQueries)] + rng.uniform(-1, 1, [numQueries, 3])
+
+    start_time = time.perf_counter()
+    brute = [bruteForce(points, c, halfSize) for c in centers]
+    brute_time = (time.perf_counter() - start_time)/numQueries
+
+    start_time = time.perf_counter()
+    grid = [index.queryBox(c, halfSize) for c in centers]
+    grid_time = (time.perf_counter() - start_time)/numQueries
+
+    mismatches = sum(not np.array_equal(b, g) for (b, g) in zip(brute, grid))
+    return build_time, brute_time, grid_time, mismatches
+
+
+class QuadPos:
+    def __init__(self, pos):
+        self.pos = pos
+
+
+def timeTracking(pos_all, rangeMargin):
+    potfld = PotField(1, rangeMargin)
+    numQueries = 0
+    start_time = time.perf_counter()
+    for pos in pos_all:
+        anchor = potfld.anchor
+        quad = QuadPos(pos)
+        potfld.isWithinRange(quad)
+        potfld.isWithinField(quad)
+        numQueries += (potfld.anchor is not anchor)
+    return (time.perf_counter() - start_time)/len(pos_all), numQueries
+
+
+def main():
+    potfld = PotField(1)
+    pointcloud = potfld.pointcloud
+    size = pointcloud.max(axis=0) - pointcloud.min(axis=0) + potfld.gridStep
+    tiled = np.vstack([pointcloud + [i*size[0], j*size[1], 0] for i in range(10) for j in range(10)])
+
+    print("{:>10s} {:>10s} {:>11s} {:>10s} {:>8s} {:>11s}".format(
+          "points", "build (s)", "brute (us)", "grid (us)", "speedup", "mismatches"))
+    for points in (pointcloud, tiled):
+        build_time, brute_time, grid_time, mismatches = timeQueries(points, potfld.gridStep, potfld.rangeRadius)
+        print("{:>10d} {:>10.3f} {:>11.1f} {:>10.1f} {:>8.1f} {:>11d}".format(
+              len(points), build_time, brute_time*1e6, grid_time*1e6, brute_time/grid_time, mismatches))
+
+    pos_all = runHeadless("rk4", 0, 0.005, 95)[1]
+    print()
+    print("{:>12s} {:>10s} {:>10s} {:>8s}".format("rangeMargin", "us/step", "requeries", "speedup"))
+    rangeMargins = (0, 0.25, 0.5, 1.0)
+    results = [timeTracking(pos_all, rangeMargin) for rangeMargin in rangeMargins]
+    for (rangeMargin, (step_time, numQueries)) in zip(rangeMargins, results):
+        print("{:>12.2f} {:>10.1f} {:>10d} {:>8.1f}".format(rangeMargin, step_time*1e6, numQueries, results[0][0]/step_time))
+
+
+if __name__ == "__main__":
+    main()
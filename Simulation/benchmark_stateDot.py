@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Micro-benchmark of the quadcopter state derivative: calls per second of the previous
+# implementation of Quadcopter.state_dot (copied below as stateDotLegacy) and of the
+# current allocation-free kernel writing into a preallocated buffer.
+# Run from the repository root: python Simulation/benchmark_stateDot.py
+
+import numpy as np
+from numpy import sin, cos, sign
+import timeit
+
+from quadFiles.quad import Quadcopter
+from utils.windModel import Wind
+import config
+
+
+# Previous implementation of Quadcopter.state_dot (reference)
+# ---------------------------
+def stateDotLegacy(params, cfg, t, state, cmd, wind):
+
+    # Import Params
+    # ---------------------------    
+    mB   = params["mB"]
+    g    = params["g"]
+    dxm  = params["dxm"]
+    dym  = params["dym"]
+    IB   = params["IB"]
+    IBxx = IB[0,0]
+    IByy = IB[1,1]
+    IBzz = IB[2,2]
+    Cd   = params["Cd"]
+    
+    kTh  = params["kTh"]
+    kTo  = params["kTo"]
+    tau  = params["tau"]
+    kp   = params["kp"]
+    damp = params["damp"]
+    minWmotor = params["minWmotor"]
+    maxWmotor = params["maxWmotor"]
+
+    IRzz = params["IRzz"]
+    if (cfg.usePrecession):
+        uP = 1
+    else:
+        uP = 0
+
+    # Import State Vector
+    # ---------------------------  
+    x      = state[0]
+    y      = state[1]
+    z      = state[2]
+    q0     = state[3]
+    q1     = state[4]
+    q2     = state[5]
+    q3     = state[6]
+    xdot   = state[7]
+    ydot   = state[8]
+    zdot   = state[9]
+    p      = state[10]
+    q      = state[11]
+    r      = state[12]
+    wM1    = state[13]
+    wdotM1 = state[14]
+    wM2    = state[15]
+    wdotM2 = state[16]
+    wM3    = state[17]
+    wdotM3 = state[18]
+    wM4    = state[19]
+    wdotM4 = state[20]
+
+    # Motor Dynamics and Rotor forces (Second Order System: https://apmonitor.com/pdc/index.php/Main/SecondOrderSystems)
+    # ---------------------------
+    
+    uMotor = cmd
+    wddotM1 = (-2.0*damp*tau*wdotM1 - wM1 + kp*uMotor[0])/(tau**2)
+    wddotM2 = (-2.0*damp*tau*wdotM2 - wM2 + kp*uMotor[1])/(tau**2)
+    wddotM3 = (-2.0*damp*tau*wdotM3 - wM3 + kp*uMotor[2])/(tau**2)
+    wddotM4 = (-2.0*damp*tau*wdotM4 - wM4 + kp*uMotor[3])/(tau**2)
+
+    wMotor = np.array([wM1, wM2, wM3, wM4])
+    wMotor = np.clip(wMotor, minWmotor, maxWmotor)
+    thrust = kTh*wMotor*wMotor
+    torque = kTo*wMotor*wMotor
+
+    ThrM1 = thrust[0]
+    ThrM2 = thrust[1]
+    ThrM3 = thrust[2]
+    ThrM4 = thrust[3]
+    TorM1 = torque[0]
+    TorM2 = torque[1]
+    TorM3 = torque[2]
+    TorM4 = torque[3]
+
+    # Wind Model
+    # ---------------------------
+    [velW, qW1, qW2] = wind.randomWind(t)
+    # velW = 0
+
+    # velW = 5          # m/s
+    # qW1 = 0*deg2rad    # Wind heading
+    # qW2 = 60*deg2rad     # Wind elevation (positive = upwards wind in NED, positive = downwards wind in ENU)
+
+    # State Derivatives (from PyDy) This is already the analytically solved vector of MM*x = RHS
+    # ---------------------------
+    if (cfg.orient == "NED"):
+        DynamicsDot = np.array([
+            [                                                                                                                                   xdot],
+            [                                                                                                                                   ydot],
+            [                                                                                                                                   zdot],
+            [                                                                                                        -0.5*p*q1 - 0.5*q*q2 - 0.5*q3*r],
+            [                                                                                                         0.5*p*q0 - 0.5*q*q3 + 0.5*q2*r],
+            [                                                                                                         0.5*p*q3 + 0.5*q*q0 - 0.5*q1*r],
+            [                                                                                                        -0.5*p*q2 + 0.5*q*q1 + 0.5*q0*r],
+            [     (Cd*sign(velW*cos(qW1)*cos(qW2) - xdot)*(velW*cos(qW1)*cos(qW2) - xdot)**2 - 2*(q0*q2 + q1*q3)*(ThrM1 + ThrM2 + ThrM3 + ThrM4))/mB],
+            [     (Cd*sign(velW*sin(qW1)*cos(qW2) - ydot)*(velW*sin(qW1)*cos(qW2) - ydot)**2 + 2*(q0*q1 - q2*q3)*(ThrM1 + ThrM2 + ThrM3 + ThrM4))/mB],
+            [ (-Cd*sign(velW*sin(qW2) + zdot)*(velW*sin(qW2) + zdot)**2 - (ThrM1 + ThrM2 + ThrM3 + ThrM4)*(q0**2 - q1**2 - q2**2 + q3**2) + g*mB)/mB],
+            [                                    ((IByy - IBzz)*q*r - uP*IRzz*(wM1 - wM2 + wM3 - wM4)*q + ( ThrM1 - ThrM2 - ThrM3 + ThrM4)*dym)/IBxx], # uP activates or deactivates the use of gyroscopic precession.
+            [                                    ((IBzz - IBxx)*p*r + uP*IRzz*(wM1 - wM2 + wM3 - wM4)*p + ( ThrM1 + ThrM2 - ThrM3 - ThrM4)*dxm)/IByy], # Set uP to False if rotor inertia is not known (gyro precession has negigeable effect on drone dynamics)
+            [                                                                               ((IBxx - IByy)*p*q - TorM1 + TorM2 - TorM3 + TorM4)/IBzz]])
+    elif (cfg.orient == "ENU"):
+        DynamicsDot = np.array([
+            [                                                                                                                                   xdot],
+            [                                                                                                                                   ydot],
+            [                                                                                                                                   zdot],
+            [                                                                                                        -0.5*p*q1 - 0.5*q*q2 - 0.5*q3*r],
+            [                                                                                                         0.5*p*q0 - 0.5*q*q3 + 0.5*q2*r],
+            [                                                                                                         0.5*p*q3 + 0.5*q*q0 - 0.5*q1*r],
+            [                                                                                                        -0.5*p*q2 + 0.5*q*q1 + 0.5*q0*r],
+            [     (Cd*sign(velW*cos(qW1)*cos(qW2) - xdot)*(velW*cos(qW1)*cos(qW2) - xdot)**2 + 2*(q0*q2 + q1*q3)*(ThrM1 + ThrM2 + ThrM3 + ThrM4))/mB],
+            [     (Cd*sign(velW*sin(qW1)*cos(qW2) - ydot)*(velW*sin(qW1)*cos(qW2) - ydot)**2 - 2*(q0*q1 - q2*q3)*(ThrM1 + ThrM2 + ThrM3 + ThrM4))/mB],
+            [ (-Cd*sign(velW*sin(qW2) + zdot)*(velW*sin(qW2) + zdot)**2 + (ThrM1 + ThrM2 + ThrM3 + ThrM4)*(q0**2 - q1**2 - q2**2 + q3**2) - g*mB)/mB],
+            [                                    ((IByy - IBzz)*q*r + uP*IRzz*(wM1 - wM2 + wM3 - wM4)*q + ( ThrM1 - ThrM2 - ThrM3 + ThrM4)*dym)/IBxx], # uP activates or deactivates the use of gyroscopic precession.
+            [                                    ((IBzz - IBxx)*p*r - uP*IRzz*(wM1 - wM2 + wM3 - wM4)*p + (-ThrM1 - ThrM2 + ThrM3 + ThrM4)*dxm)/IByy], # Set uP to False if rotor inertia is not known (gyro precession has negigeable effect on drone dynamics)
+            [                                                                               ((IBxx - IBzz)*p*q + TorM1 - TorM2 + TorM3 - TorM4)/IBzz]])
+
+
+    # State Derivative Vector
+    # ---------------------------
+    sdot     = np.zeros([21])
+    sdot[0]  = DynamicsDot[0]
+    sdot[1]  = DynamicsDot[1]
+    sdot[2]  = DynamicsDot[2]
+    sdot[3]  = DynamicsDot[3]
+    sdot[4]  = DynamicsDot[4]
+    sdot[5]  = DynamicsDot[5]
+    sdot[6]  = DynamicsDot[6]
+    sdot[7]  = DynamicsDot[7]
+    sdot[8]  = DynamicsDot[8]
+    sdot[9]  = DynamicsDot[9]
+    sdot[10] = DynamicsDot[10]
+    sdot[11] = DynamicsDot[11]
+    sdot[12] = DynamicsDot[12]
+    sdot[13] = wdotM1
+    sdot[14] = wddotM1
+    sdot[15] = wdotM2
+    sdot[16] = wddotM2
+    sdot[17] = wdotM3
+    sdot[18] = wddotM3
+    sdot[19] = wdotM4
+    sdot[20] = wddotM4
+
+    return sdot
+
+
+def callsPerSecond(func, number):
+    t = min(timeit.repeat(func, number=number, repeat=5))
+    return number/t
+
+
+def main():
+    number = 20000
+
+    quad = Quadcopter(0)
+    wind = Wind('Sine', 2.0, 90, -15)
+    state = quad.state.copy()
+    state[7:13] = [0.5, -0.3, 0.1, 0.2, -0.1, 0.05]
+    cmd = quad.wMotor*np.array([1.01, 0.99, 1.02, 0.98])
+    out = np.zeros(21)
+
+    # Check that both implementations give the same derivatives
+    sdot_legacy = stateDotLegacy(quad.params, quad.cfg, 1.0, state, cmd, wind)
+    sdot_kernel = quad.state_dot(1.0, state, cmd, wind, out)
+    print("Max abs difference: {:.3e}".format(np.abs(sdot_legacy - sdot_kernel).max()))
+    print()
+
+    velW, qW1, qW2 = wind.randomWind(1.0)
+    legacy = callsPerSecond(lambda: stateDotLegacy(quad.params, quad.cfg, 1.0, state, cmd, wind), number)
+    method = callsPerSecond(lambda: quad.state_dot(1.0, state, cmd, wind, out), number)
+    kernel = callsPerSecond(lambda: quad.stateDotKernel(out, state, cmd, velW, qW1, qW2, quad.prm), number)
+
+    print("{:>40s} {:>12s} {:>9s}".format("", "calls/s", "speedup"))
+    print("{:>40s} {:>12.0f} {:>9.2f}".format("before: state_dot (dict, np.array)", legacy, 1.0))
+    print("{:>40s} {:>12.0f} {:>9.2f}".format("after:  state_dot (with out buffer)", method, method/legacy))
+    print("{:>40s} {:>12.0f} {:>9.2f}".format("after:  kernel only (wind precomputed)", kernel, kernel/legacy))
+
+
+if __name__ == "__main__":
+    if (config.orient == "NED" or config.orient == "ENU"):
+        main()
+    else:
+        raise Exception("{} is not a valid orientation. Verify config.py file.".format(config.orient))
@@ -15,4 +15,28 @@ orient = "NED"
 # Select whether to use gyroscopic precession of the rotors in the quadcopter dynamics
 # ---------------------------
 # Set to False if rotor inertia isn't known (gyro precession has negigeable effect on drone dynamics)
-usePrecession = bool(False)
\ No newline at end of file
+usePrecession = bool(False)
+# Select whether to use aerodynamic drag (and therefore wind) in the quadcopter dynamics
+# ---------------------------
+# Selects the matching state derivative kernel (see quadFiles/stateDotKernels)
+useWindDrag = bool(True)
+
+# Select whether to run the simulation step with the JIT-compiled backend (simJIT.py)
+# ---------------------------
+# Requires numba and the "rk4" or "semi_implicit" integrator. Falls back to the
+# regular NumPy step if numba isn't installed.
+useJIT = bool(False)
+
+
+class SimConfig:
+    # Settings of one simulation (one vehicle), passed to Quadcopter, Control and the mixer,
+    # so that simulations with different settings can run side by side in one process.
+    # The module-level settings above are the defaults.
+
+    def __init__(self, orient=None, usePrecession=None, useWindDrag=None, useJIT=None):
+        self.orient        = orient        if orient        is not None else globals()["orient"]
+        self.usePrecession = usePrecession if usePrecession is not None else globals()["usePrecession"]
+        self.useWindDrag   = useWindDrag   if useWindDrag   is not None else globals()["useWindDrag"]
+        self.useJIT        = useJIT        if useJIT        is not None else globals()["useJIT"]
+        if not (self.orient == "NED" or self.orient == "ENU"):
+            raise Exception("{} is not a valid orientation. Verify config.py file.".format(self.orient))
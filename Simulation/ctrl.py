@@ -12,12 +12,12 @@ Please feel free to use and modify this, but keep the above information. Thanks!
 # and https://www.research-collection.ethz.ch/bitstream/handle/20.500.11850/154099/eth-7387-01.pdf
 # Rate Control based on https://github.com/PX4/Firmware/blob/master/src/modules/mc_att_control/mc_att_control_main.cpp
 
+import copy
 import numpy as np
 from numpy import pi
 from numpy import sin, cos, tan, sqrt
 from numpy.linalg import norm
 import utils
-import config
 
 rad2deg = 180.0/pi
 deg2rad = pi/180.0
@@ -99,14 +99,47 @@ rMax = 100.0*deg2rad
 rateMax = np.array([pMax, qMax, rMax])
 
 
+class CtrlGains:
+    # Gains and limits of one controller, initialized with the values above (which are
+    # never modified). Any of them can be set with a keyword argument.
+
+    def __init__(self, **gains):
+        self.pos_P_gain  = pos_P_gain.copy()
+        self.vel_P_gain  = vel_P_gain.copy()
+        self.vel_D_gain  = vel_D_gain.copy()
+        self.vel_I_gain  = vel_I_gain.copy()
+        self.att_P_gain  = att_P_gain.copy()
+        self.rate_P_gain = rate_P_gain.copy()
+        self.rate_D_gain = rate_D_gain.copy()
+        self.velMax      = velMax.copy()
+        self.velMaxAll   = velMaxAll
+        self.saturateVel_separetely = saturateVel_separetely
+        self.accMax      = accMax.copy()
+        self.accMaxAll   = accMaxAll
+        self.tiltMax     = tiltMax
+        self.rateMax     = rateMax.copy()
+        for name, value in gains.items():
+            if not hasattr(self, name):
+                raise Exception("{} is not a controller gain.".format(name))
+            if isinstance(getattr(self, name), np.ndarray):
+                value = np.array(value, dtype=float)
+                if not (value.shape == getattr(self, name).shape):
+                    raise Exception("{} must have the shape {}.".format(name, getattr(self, name).shape))
+            setattr(self, name, value)
+
+
 class Control:
     
-    def __init__(self, quad, yawType):
+    def __init__(self, quad, yawType, gains=None, cfg=None):
+        # Gains of this controller (a copy of the module-level gains if None, the attitude
+        # gains are modified below), and the quad's simulation settings if cfg is None
+        self.gains = CtrlGains() if gains is None else copy.deepcopy(gains)
+        self.cfg = quad.cfg if cfg is None else cfg
         self.sDesCalc = np.zeros(16)
         self.w_cmd = np.ones(4)*quad.params["w_hover"]
         self.thr_int = np.zeros(3)
         if (yawType == 0):
-            att_P_gain[2] = 0
+            self.gains.att_P_gain[2] = 0
         self.setYawWeight()
         self.pos_sp        = np.zeros(3)
         self.vel_sp        = np.zeros(3)
@@ -178,7 +211,7 @@ class Control:
         # Z Position Control
         # --------------------------- 
         pos_z_error = self.pos_sp[2] - quad.pos[2]
-        self.vel_sp[2] += pos_P_gain[2]*pos_z_error
+        self.vel_sp[2] += self.gains.pos_P_gain[2]*pos_z_error
         
     
     def xy_pos_control(self, quad, potfld, Ts):
@@ -186,7 +219,7 @@ class Control:
         # XY Position Control
         # --------------------------- 
         pos_xy_error = (self.pos_sp[0:2] - quad.pos[0:2])
-        self.vel_sp[0:2] += pos_P_gain[0:2]*pos_xy_error
+        self.vel_sp[0:2] += self.gains.pos_P_gain[0:2]*pos_xy_error
         
         
     def saturateVel(self):
@@ -194,12 +227,12 @@ class Control:
         # Saturate Velocity Setpoint
         # --------------------------- 
         # Either saturate each velocity axis separately, or total velocity (prefered)
-        if (saturateVel_separetely):
-            self.vel_sp = np.clip(self.vel_sp, -velMax, velMax)
+        if (self.gains.saturateVel_separetely):
+            self.vel_sp = np.clip(self.vel_sp, -self.gains.velMax, self.gains.velMax)
         else:
             totalVel_sp = norm(self.vel_sp)
-            if (totalVel_sp > velMaxAll):
-                self.vel_sp = self.vel_sp/totalVel_sp*velMaxAll
+            if (totalVel_sp > self.gains.velMaxAll):
+                self.vel_sp = self.vel_sp/totalVel_sp*self.gains.velMaxAll
     
     
     def addFrepToVel(self, potfld):
@@ -240,21 +273,21 @@ class Control:
         # Hover thrust (m*g) is sent as a Feed-Forward term, in order to 
         # allow hover when the position and velocity error are nul
         vel_z_error = self.vel_sp[2] - quad.vel[2]
-        if (config.orient == "NED"):
-            thrust_z_sp = (vel_P_gain[2]*vel_z_error - vel_D_gain[2]*quad.vel_dot[2] + 
+        if (self.cfg.orient == "NED"):
+            thrust_z_sp = (self.gains.vel_P_gain[2]*vel_z_error - self.gains.vel_D_gain[2]*quad.vel_dot[2] + 
                         quad.params["mB"]*(self.acc_sp[2] - quad.params["g"]) + 
                         self.thr_int[2] + potfld.pfSatFor*potfld.F_rep[2])
-        elif (config.orient == "ENU"):
-            thrust_z_sp = (vel_P_gain[2]*vel_z_error - vel_D_gain[2]*quad.vel_dot[2] + 
+        elif (self.cfg.orient == "ENU"):
+            thrust_z_sp = (self.gains.vel_P_gain[2]*vel_z_error - self.gains.vel_D_gain[2]*quad.vel_dot[2] + 
                         quad.params["mB"]*(self.acc_sp[2] + quad.params["g"]) + 
                         self.thr_int[2] + potfld.pfSatFor*potfld.F_rep[2])
         
         # Get thrust limits
-        if (config.orient == "NED"):
+        if (self.cfg.orient == "NED"):
             # The Thrust limits are negated and swapped due to NED-frame
             uMax = -quad.params["minThr"]
             uMin = -quad.params["maxThr"]
-        elif (config.orient == "ENU"):
+        elif (self.cfg.orient == "ENU"):
             uMax = quad.params["maxThr"]
             uMin = quad.params["minThr"]
 
@@ -263,7 +296,7 @@ class Control:
 
         # Calculate integral part
         if not (stop_int_D):
-            self.thr_int[2] += vel_I_gain[2]*vel_z_error*Ts * quad.params["useIntergral"]
+            self.thr_int[2] += self.gains.vel_I_gain[2]*vel_z_error*Ts * quad.params["useIntergral"]
             # Limit thrust integral
             self.thr_int[2] = min(abs(self.thr_int[2]), quad.params["maxThr"])*np.sign(self.thr_int[2])
 
@@ -276,12 +309,12 @@ class Control:
         # XY Velocity Control (Thrust in NE-direction)
         # ---------------------------
         vel_xy_error = self.vel_sp[0:2] - quad.vel[0:2]
-        thrust_xy_sp = (vel_P_gain[0:2]*vel_xy_error - vel_D_gain[0:2]*quad.vel_dot[0:2] + 
+        thrust_xy_sp = (self.gains.vel_P_gain[0:2]*vel_xy_error - self.gains.vel_D_gain[0:2]*quad.vel_dot[0:2] + 
                     quad.params["mB"]*(self.acc_sp[0:2]) + self.thr_int[0:2] + 
                     potfld.pfSatFor*potfld.F_rep[0:2])
 
         # Max allowed thrust in NE based on tilt and excess thrust
-        thrust_max_xy_tilt = abs(self.thrust_sp[2])*np.tan(tiltMax)
+        thrust_max_xy_tilt = abs(self.thrust_sp[2])*np.tan(self.gains.tiltMax)
         thrust_max_xy = sqrt(quad.params["maxThr"]**2 - self.thrust_sp[2]**2)
         thrust_max_xy = min(thrust_max_xy, thrust_max_xy_tilt)
 
@@ -293,9 +326,9 @@ class Control:
         
         # Use tracking Anti-Windup for NE-direction: during saturation, the integrator is used to unsaturate the output
         # see Anti-Reset Windup for PID controllers, L.Rundqwist, 1990
-        arw_gain = 2.0/vel_P_gain[0:2]
+        arw_gain = 2.0/self.gains.vel_P_gain[0:2]
         vel_err_lim = vel_xy_error - (thrust_xy_sp - self.thrust_sp[0:2])*arw_gain
-        self.thr_int[0:2] += vel_I_gain[0:2]*vel_err_lim*Ts * quad.params["useIntergral"]
+        self.thr_int[0:2] += self.gains.vel_I_gain[0:2]*vel_err_lim*Ts * quad.params["useIntergral"]
     
 
     def thrustToAttitude(self, quad, potfld, Ts):
@@ -310,18 +343,18 @@ class Control:
 
         # Desired body_z axis direction
         body_z = -utils.vectNormalize(self.thrust_rep_sp)
-        if (config.orient == "ENU"):
+        if (self.cfg.orient == "ENU"):
             body_z = -body_z
         
         # Vector of desired Yaw direction in XY plane, rotated by pi/2 (fake body_y axis)
         y_C = np.array([-sin(yaw_sp), cos(yaw_sp), 0.0])
         
         # Desired body_x axis direction
-        body_x = np.cross(y_C, body_z)
+        body_x = utils.cross(y_C, body_z)
         body_x = utils.vectNormalize(body_x)
         
         # Desired body_y axis direction
-        body_y = np.cross(body_z, body_x)
+        body_y = utils.cross(body_z, body_x)
 
         # Desired rotation matrix
         R_sp = np.array([body_x, body_y, body_z]).T
@@ -335,13 +368,13 @@ class Control:
         # Current thrust orientation e_z and desired thrust orientation e_z_d
         e_z = quad.dcm[:,2]
         e_z_d = -utils.vectNormalize(self.thrust_rep_sp)
-        if (config.orient == "ENU"):
+        if (self.cfg.orient == "ENU"):
             e_z_d = -e_z_d
 
         # Quaternion error between the 2 vectors
         qe_red = np.zeros(4)
         qe_red[0] = np.dot(e_z, e_z_d) + sqrt(norm(e_z)**2 * norm(e_z_d)**2)
-        qe_red[1:4] = np.cross(e_z, e_z_d)
+        qe_red[1:4] = utils.cross(e_z, e_z_d)
         qe_red = utils.vectNormalize(qe_red)
         
         # Reduced desired quaternion (reduced because it doesn't consider the desired Yaw angle)
@@ -358,16 +391,16 @@ class Control:
         self.qe = utils.quatMultiply(utils.inverse(quad.quat), self.qd)
 
         # Create rate setpoint from quaternion error
-        self.rate_sp = (2.0*np.sign(self.qe[0])*self.qe[1:4])*att_P_gain
+        self.rate_sp = (2.0*np.sign(self.qe[0])*self.qe[1:4])*self.gains.att_P_gain
         
         # Limit yawFF
-        self.yawFF = np.clip(self.yawFF, -rateMax[2], rateMax[2])
+        self.yawFF = np.clip(self.yawFF, -self.gains.rateMax[2], self.gains.rateMax[2])
 
         # Add Yaw rate feed-forward
         self.rate_sp += utils.quat2Dcm(utils.inverse(quad.quat))[:,2]*self.yawFF
 
         # Limit rate setpoint
-        self.rate_sp = np.clip(self.rate_sp, -rateMax, rateMax)
+        self.rate_sp = np.clip(self.rate_sp, -self.gains.rateMax, self.gains.rateMax)
 
 
     def rate_control(self, quad, Ts):
@@ -375,15 +408,15 @@ class Control:
         # Rate Control
         # ---------------------------
         rate_error = self.rate_sp - quad.omega
-        self.rateCtrl = rate_P_gain*rate_error - rate_D_gain*quad.omega_dot     # Be sure it is right sign for the D part
+        self.rateCtrl = self.gains.rate_P_gain*rate_error - self.gains.rate_D_gain*quad.omega_dot     # Be sure it is right sign for the D part
         
 
     def setYawWeight(self):
         
         # Calculate weight of the Yaw control gain
-        roll_pitch_gain = 0.5*(att_P_gain[0] + att_P_gain[1])
-        self.yaw_w = np.clip(att_P_gain[2]/roll_pitch_gain, 0.0, 1.0)
+        roll_pitch_gain = 0.5*(self.gains.att_P_gain[0] + self.gains.att_P_gain[1])
+        self.yaw_w = np.clip(self.gains.att_P_gain[2]/roll_pitch_gain, 0.0, 1.0)
 
-        att_P_gain[2] = roll_pitch_gain
+        self.gains.att_P_gain[2] = roll_pitch_gain
 
     
\ No newline at end of file
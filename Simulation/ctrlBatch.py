@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Same cascaded controller as the Control class (ctrl.py), but for N vehicles at once,
+# to pair with QuadcopterBatch (quadFiles/quadBatch.py).
+# Setpoints and states are (N, .) arrays (one row per vehicle), every step of the cascade
+# is computed with whole-array operations on their columns, and the branches of the
+# scalar controller (saturations, anti-windup, quaternion conversion) become masks.
+# The gains (CtrlGains) and settings (SimConfig) are shared by all vehicles.
+
+import copy
+import numpy as np
+from numpy import pi
+
+from ctrl import CtrlGains
+import utils
+
+
+def rowNorm(v):
+    return np.sqrt(np.einsum("ij,ij->i", v, v))
+
+
+class ControlBatch:
+
+    def __init__(self, quad, ctrlType, yawType, pfType=1, gains=None, cfg=None):
+        # quad is a QuadcopterBatch, pfType the PotField type (how the repulsive force is added)
+        self.N = quad.N
+        self.ctrlType = ctrlType
+        self.yawType = yawType
+        self.gains = CtrlGains() if gains is None else copy.deepcopy(gains)
+        self.cfg = quad.cfg if cfg is None else cfg
+        self.pfVel    = float(pfType == 1)
+        self.pfSatFor = float(pfType == 2)
+        self.pfFor    = float(pfType == 3)
+
+        N = self.N
+        self.sDesCalc = np.zeros([N, 16])
+        self.w_cmd = np.ones([N, 4])*quad.params["w_hover"]
+        self.thr_int = np.zeros([N, 3])
+        if (yawType == 0):
+            self.gains.att_P_gain[2] = 0
+        self.setYawWeight()
+        self.pos_sp        = np.zeros([N, 3])
+        self.vel_sp        = np.zeros([N, 3])
+        self.acc_sp        = np.zeros([N, 3])
+        self.thrust_sp     = np.zeros([N, 3])
+        self.thrust_rep_sp = np.zeros([N, 3])
+        self.eul_sp        = np.zeros([N, 3])
+        self.pqr_sp        = np.zeros([N, 3])
+        self.yawFF         = np.zeros(N)
+
+        # Heading followed by the "Follow" yaw trajectory (Trajectory.current_heading for one vehicle)
+        self.current_heading = np.array(quad.psi, dtype=float)
+
+
+    def controller(self, sDes, quad, Ts, F_rep=None, omit_yaw_follow=None):
+        # sDes            : (N, 19) desired states (rows of Trajectory.sDes)
+        # F_rep           : (N, 3) potential field repulsive forces (none if None)
+        # omit_yaw_follow : (N,) Trajectory.omit_yaw_follow of every vehicle (0 if None)
+        if F_rep is None:
+            F_rep = np.zeros([self.N, 3])
+        if omit_yaw_follow is None:
+            omit_yaw_follow = np.zeros(self.N)
+        self.F_rep = F_rep
+
+        # Desired State (copy)
+        # ---------------------------
+        self.pos_sp[:]    = sDes[:,0:3]
+        self.vel_sp[:]    = sDes[:,3:6]
+        self.acc_sp[:]    = sDes[:,6:9]
+        self.thrust_sp[:] = sDes[:,9:12]
+        self.eul_sp[:]    = sDes[:,12:15]
+        self.pqr_sp[:]    = sDes[:,15:18]
+        self.yawFF[:]     = sDes[:,18]
+
+        # Select Controller
+        # ---------------------------
+        if (self.ctrlType == "xyz_vel"):
+            self.saturateVel()
+        elif (self.ctrlType == "xy_vel_z_pos"):
+            self.z_pos_control(quad)
+            self.saturateVel()
+        elif (self.ctrlType == "xyz_pos"):
+            self.z_pos_control(quad)
+            self.xy_pos_control(quad)
+            self.saturateVel()
+            self.vel_sp += self.pfVel*F_rep
+            self.saturateVel()
+            self.yaw_follow(omit_yaw_follow, Ts)
+        self.z_vel_control(quad, Ts)
+        self.xy_vel_control(quad, Ts)
+        self.thrustToAttitude(quad)
+        self.attitude_control(quad)
+        self.rate_control(quad)
+
+        # Mixer (utils.mixerFM on every row)
+        # ---------------------------
+        t = np.column_stack((rowNorm(self.thrust_rep_sp), self.rateCtrl))
+        self.w_cmd = np.sqrt(np.clip(t @ quad.params["mixerFMinv"].T, quad.params["minWmotor"]**2, quad.params["maxWmotor"]**2))
+
+        # Add calculated Desired States
+        # ---------------------------
+        self.sDesCalc[:,0:3]   = self.pos_sp
+        self.sDesCalc[:,3:6]   = self.vel_sp
+        self.sDesCalc[:,6:9]   = self.thrust_sp
+        self.sDesCalc[:,9:13]  = self.qd
+        self.sDesCalc[:,13:16] = self.rate_sp
+
+
+    def z_pos_control(self, quad):
+
+        # Z Position Control
+        # ---------------------------
+        pos_z_error = self.pos_sp[:,2] - quad.pos[:,2]
+        self.vel_sp[:,2] += self.gains.pos_P_gain[2]*pos_z_error
+
+
+    def xy_pos_control(self, quad):
+
+        # XY Position Control
+        # ---------------------------
+        pos_xy_error = (self.pos_sp[:,0:2] - quad.pos[:,0:2])
+        self.vel_sp[:,0:2] += self.gains.pos_P_gain[0:2]*pos_xy_error
+
+
+    def saturateVel(self):
+
+        # Saturate Velocity Setpoint
+        # ---------------------------
+        # Either saturate each velocity axis separately, or total velocity (prefered)
+        if (self.gains.saturateVel_separetely):
+            self.vel_sp = np.clip(self.vel_sp, -self.gains.velMax, self.gains.velMax)
+        else:
+            totalVel_sp = rowNorm(self.vel_sp)
+            sat = totalVel_sp > self.gains.velMaxAll
+            self.vel_sp[sat] = self.vel_sp[sat]/totalVel_sp[sat,None]*self.gains.velMaxAll
+
+
+    def yaw_follow(self, omit_yaw_follow, Ts):
+
+        # Generate Yaw setpoint and FF
+        # ---------------------------
+        # If yawType == "Follow", then set Yaw setpoint and Yaw Rate Feed-Forward to follow the velocity setpoint
+        if (self.yawType == 4):
+            follow = (omit_yaw_follow == 0) & (rowNorm(self.vel_sp) > 0.1)
+            eul_sp_z = np.where(follow, np.arctan2(self.vel_sp[:,1], self.vel_sp[:,0]), self.eul_sp[:,2])
+
+            # Detect when the desired yaw switches from -pi to pi (or vice-versa) and switch the current heading
+            wrap = follow & (np.sign(eul_sp_z) - np.sign(self.current_heading) != 0) & (abs(eul_sp_z - self.current_heading) >= 2*pi-0.1)
+            self.current_heading = np.where(wrap, self.current_heading + np.sign(eul_sp_z)*2*pi, self.current_heading)
+
+            # Yaw rate from the change of heading, then prepare next iteration
+            self.yawFF = np.where(follow, (eul_sp_z - self.current_heading)/Ts, self.yawFF)
+            self.current_heading = np.where(follow, eul_sp_z, self.current_heading)
+            self.eul_sp[:,2] = eul_sp_z
+
+
+    def z_vel_control(self, quad, Ts):
+
+        # Z Velocity Control (Thrust in D-direction)
+        # ---------------------------
+        # Hover thrust (m*g) is sent as a Feed-Forward term, in order to
+        # allow hover when the position and velocity error are nul
+        params = quad.params
+        g = params["g"] if (self.cfg.orient == "NED") else -params["g"]
+        vel_z_error = self.vel_sp[:,2] - quad.vel[:,2]
+        thrust_z_sp = (self.gains.vel_P_gain[2]*vel_z_error - self.gains.vel_D_gain[2]*quad.vel_dot[:,2] +
+                       params["mB"]*(self.acc_sp[:,2] - g) +
+                       self.thr_int[:,2] + self.pfSatFor*self.F_rep[:,2])
+
+        # Get thrust limits
+        if (self.cfg.orient == "NED"):
+            # The Thrust limits are negated and swapped due to NED-frame
+            uMax = -params["minThr"]
+            uMin = -params["maxThr"]
+        else:
+            uMax = params["maxThr"]
+            uMin = params["minThr"]
+
+        # Apply Anti-Windup in D-direction
+        stop_int_D = ((thrust_z_sp >= uMax) & (vel_z_error >= 0.0)) | ((thrust_z_sp <= uMin) & (vel_z_error <= 0.0))
+
+        # Calculate integral part (limited), where not stopped
+        thr_int_z = self.thr_int[:,2] + self.gains.vel_I_gain[2]*vel_z_error*Ts * params["useIntergral"]
+        thr_int_z = np.minimum(abs(thr_int_z), params["maxThr"])*np.sign(thr_int_z)
+        self.thr_int[:,2] = np.where(stop_int_D, self.thr_int[:,2], thr_int_z)
+
+        # Saturate thrust setpoint in D-direction
+        self.thrust_sp[:,2] = np.clip(thrust_z_sp, uMin, uMax)
+
+
+    def xy_vel_control(self, quad, Ts):
+
+        # XY Velocity Control (Thrust in NE-direction)
+        # ---------------------------
+        params = quad.params
+        vel_xy_error = self.vel_sp[:,0:2] - quad.vel[:,0:2]
+        thrust_xy_sp = (self.gains.vel_P_gain[0:2]*vel_xy_error - self.gains.vel_D_gain[0:2]*quad.vel_dot[:,0:2] +
+                        params["mB"]*(self.acc_sp[:,0:2]) + self.thr_int[:,0:2] +
+                        self.pfSatFor*self.F_rep[:,0:2])
+
+        # Max allowed thrust in NE based on tilt and excess thrust
+        thrust_max_xy_tilt = abs(self.thrust_sp[:,2])*np.tan(self.gains.tiltMax)
+        thrust_max_xy = np.sqrt(params["maxThr"]**2 - self.thrust_sp[:,2]**2)
+        thrust_max_xy = np.minimum(thrust_max_xy, thrust_max_xy_tilt)
+
+        # Saturate thrust in NE-direction
+        self.thrust_sp[:,0:2] = thrust_xy_sp
+        sat = (thrust_xy_sp[:,0]**2 + thrust_xy_sp[:,1]**2) > thrust_max_xy**2
+        mag = np.sqrt(thrust_xy_sp[sat,0]**2 + thrust_xy_sp[sat,1]**2)
+        self.thrust_sp[sat,0:2] = thrust_xy_sp[sat]/mag[:,None]*thrust_max_xy[sat,None]
+
+        # Use tracking Anti-Windup for NE-direction: during saturation, the integrator is used to unsaturate the output
+        # see Anti-Reset Windup for PID controllers, L.Rundqwist, 1990
+        arw_gain = 2.0/self.gains.vel_P_gain[0:2]
+        vel_err_lim = vel_xy_error - (thrust_xy_sp - self.thrust_sp[:,0:2])*arw_gain
+        self.thr_int[:,0:2] += self.gains.vel_I_gain[0:2]*vel_err_lim*Ts * params["useIntergral"]
+
+
+    def thrustToAttitude(self, quad):
+        # Create Full Desired Quaternion Based on Thrust Setpoint and Desired Yaw Angle
+        # ---------------------------
+
+        # Add potential field repulsive force to Thrust setpoint
+        self.thrust_rep_sp = self.thrust_sp + self.pfFor*self.F_rep
+
+        # Yaw setpoint
+        yaw_sp = self.eul_sp[:,2]
+
+        # Desired body_z axis direction
+        body_z = -utils.vectNormalize(self.thrust_rep_sp)
+        if (self.cfg.orient == "ENU"):
+            body_z = -body_z
+
+        # Vector of desired Yaw direction in XY plane, rotated by pi/2 (fake body_y axis)
+        y_C = np.column_stack((-np.sin(yaw_sp), np.cos(yaw_sp), np.zeros(self.N)))
+
+        # Desired body_x and body_y axis directions
+        body_x = utils.vectNormalize(utils.cross(y_C, body_z))
+        body_y = utils.cross(body_z, body_x)
+
+        # Full desired quaternion, from the desired rotation matrices (columns body_x, body_y, body_z)
+        R_sp = np.stack((body_x, body_y, body_z), axis=2)
+        self.qd_full = utils.RotToQuat(R_sp)
+
+
+    def attitude_control(self, quad):
+
+        # Current thrust orientation e_z and desired thrust orientation e_z_d
+        e_z = quad.dcm[:,:,2]
+        e_z_d = -utils.vectNormalize(self.thrust_rep_sp)
+        if (self.cfg.orient == "ENU"):
+            e_z_d = -e_z_d
+
+        # Quaternion error between the 2 vectors
+        qe_red = np.empty([self.N, 4])
+        qe_red[:,0] = np.einsum("ij,ij->i", e_z, e_z_d) + np.sqrt(rowNorm(e_z)**2 * rowNorm(e_z_d)**2)
+        qe_red[:,1:4] = utils.cross(e_z, e_z_d)
+        qe_red = utils.vectNormalize(qe_red)
+
+        # Reduced desired quaternion (reduced because it doesn't consider the desired Yaw angle)
+        self.qd_red = utils.quatMultiply(qe_red, quad.quat)
+
+        # Mixed desired quaternion (between reduced and full) and resulting desired quaternion qd
+        q_mix = utils.quatMultiply(utils.inverse(self.qd_red), self.qd_full)
+        q_mix = q_mix*np.sign(q_mix[:,0])[:,None]
+        q_mix[:,0] = np.clip(q_mix[:,0], -1.0, 1.0)
+        q_mix[:,3] = np.clip(q_mix[:,3], -1.0, 1.0)
+        q_yaw = np.zeros([self.N, 4])
+        q_yaw[:,0] = np.cos(self.yaw_w*np.arccos(q_mix[:,0]))
+        q_yaw[:,3] = np.sin(self.yaw_w*np.arcsin(q_mix[:,3]))
+        self.qd = utils.quatMultiply(self.qd_red, q_yaw)
+
+        # Resulting error quaternion
+        self.qe = utils.quatMultiply(utils.inverse(quad.quat), self.qd)
+
+        # Create rate setpoint from quaternion error
+        self.rate_sp = (2.0*np.sign(self.qe[:,0])[:,None]*self.qe[:,1:4])*self.gains.att_P_gain
+
+        # Limit yawFF
+        self.yawFF = np.clip(self.yawFF, -self.gains.rateMax[2], self.gains.rateMax[2])
+
+        # Add Yaw rate feed-forward
+        self.rate_sp += utils.quat2Dcm(utils.inverse(quad.quat))[:,:,2]*self.yawFF[:,None]
+
+        # Limit rate setpoint
+        self.rate_sp = np.clip(self.rate_sp, -self.gains.rateMax, self.gains.rateMax)
+
+
+    def rate_control(self, quad):
+
+        # Rate Control
+        # ---------------------------
+        rate_error = self.rate_sp - quad.omega
+        self.rateCtrl = self.gains.rate_P_gain*rate_error - self.gains.rate_D_gain*quad.omega_dot     # Be sure it is right sign for the D part
+
+
+    def setYawWeight(self):
+
+        # Calculate weight of the Yaw control gain
+        roll_pitch_gain = 0.5*(self.gains.att_P_gain[0] + self.gains.att_P_gain[1])
+        self.yaw_w = np.clip(self.gains.att_P_gain[2]/roll_pitch_gain, 0.0, 1.0)
+
+        self.gains.att_P_gain[2] = roll_pitch_gain
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Parametric tunnel environments.
+# A tunnel spec (JSON) describes the tunnel section, the grid step and a list of straight
+# and arc segments. generateEnvironment() builds the fine and gridded point clouds with
+# tunnelGeometry.py and writes, in environments/<name>/:
+#   pointcloud_fine.npy   fine point cloud
+#   pointcloud_grid.npy   gridded point cloud (first row is the grid step, as pointcloud_grid.csv)
+#   index.npz             spatial index of the gridded point cloud (spatialIndex.GridIndex)
+#   metadata.json         spec, spec hash, grid step, number of points and bounds
+# The outputs are only regenerated when the spec hash changes.
+# generateWindField() adds the wind field of an environment (windfield.npz, for
+# utils.windModel.WindField): the air flows along the tunnel, from the entrance to the exit,
+# at flowSpeed on the center line and slower towards the walls (1/7 power law of the distance
+# to the wall), with no wind outside of the tunnel. The field is on a regular grid spanning the
+# point cloud bounds, and is only regenerated when the environment or its parameters change.
+#
+# Spec keys (lengths in m):
+#   "grid_step"        grid step of the gridded point cloud
+#   "fine_step"        spacing of the fine point cloud along x, y, z and across the arc floors
+#   "radius_step"      spacing across the arc floors and ceilings (rectangular section)
+#   "phi_divisions"    angular step of the arcs is pi/phi_divisions
+#   "theta_divisions"  angular step around a cylindrical section is pi/theta_divisions
+#   "section"          {"type": "rect", "width": w, "height": h} or {"type": "cyl", "radius": r}
+#   "start"            [x, y, heading (rad)] of the tunnel entrance
+#   "segments"         list of {"type": "straight", "length": L} and
+#                      {"type": "arc", "radius": R, "turn": "right"|"left", "phi_end_pi": a}
+# The environments are imported from the Simulation folder (PotField) and generated from this
+# folder (generate_environment.py), hence the imports of tunnelGeometry and spatialIndex in the functions.
+# Arcs use the angle phi of the generator scripts (point = center + R*(sin(phi), cos(phi))),
+# "phi_end_pi" is the end angle in multiples of pi. A right turn has increasing phi.
+# An arc that reverses the curvature of the previous arc starts tangent to it, as in the
+# generate_tunnel_snake_*.py scripts.
+
+import os
+import json
+import hashlib
+import numpy as np
+from numpy import pi
+
+environmentsDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "environments")
+
+# Increase when the generated point clouds change for a same spec (invalidates the cache)
+generatorVersion = 1
+
+
+def specHash(spec):
+    text = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1("{}:{}".format(generatorVersion, text).encode()).hexdigest()
+
+
+def placePoints(pointcloud, x, y, heading):
+    # Points of a segment built along +x from the origin, moved to (x, y) and rotated to heading
+    # (left untouched for heading 0, so that the values are the same as the generator scripts)
+    if (heading == 0):
+        return pointcloud
+    c = np.cos(heading)
+    s = np.sin(heading)
+    rel_x = pointcloud[:,0] - x
+    rel_y = pointcloud[:,1] - y
+    return np.column_stack((x + c*rel_x - s*rel_y, y + s*rel_x + c*rel_y, pointcloud[:,2]))
+
+
+def tunnelSegments(spec):
+    # Geometry of the segments of the tunnel described by spec, in order:
+    #   ("straight", x, y, heading, length)            from (x, y) along heading
+    #   ("arc", center_x, center_y, radius, right, phi_space)
+    from tunnelGeometry import arcEnd, nextArcCenter
+
+    phi_step = pi/spec["phi_divisions"]
+    x, y, heading = spec["start"]
+    prevArc = None
+    segments = []
+    for segment in spec["segments"]:
+        if (segment["type"] == "straight"):
+            segments.append(("straight", x, y, heading, segment["length"]))
+            x = x + segment["length"]*np.cos(heading)
+            y = y + segment["length"]*np.sin(heading)
+            prevArc = None
+
+        elif (segment["type"] == "arc"):
+            radius = segment["radius"]
+            phi_lim2 = pi*segment["phi_end_pi"]
+            right = (segment["turn"] == "right")
+            if not right and not (segment["turn"] == "left"):
+                raise Exception("{} is not a valid arc turn.".format(segment["turn"]))
+
+            if prevArc is not None and (prevArc[4] != right):
+                # Reverses the curvature of the previous arc (same construction as the generator scripts)
+                center_x, center_y = nextArcCenter(prevArc[0], prevArc[1], prevArc[2], prevArc[3], radius)
+                phi_lim1 = (prevArc[5] - pi) if right else (prevArc[5] + pi)
+            elif right:
+                center_x = x + radius*np.sin(heading)
+                center_y = y - radius*np.cos(heading)
+                phi_lim1 = -heading
+            else:
+                center_x = x - radius*np.sin(heading)
+                center_y = y + radius*np.cos(heading)
+                phi_lim1 = pi - heading
+
+            if right:
+                phi_space = np.arange(phi_lim1, phi_lim2+phi_step, phi_step)
+            else:
+                phi_space = np.arange(phi_lim1, phi_lim2-phi_step, -phi_step)
+            if (len(phi_space) == 0):
+                raise Exception("The arc ends before it starts (phi from {} to {}).".format(phi_lim1, phi_lim2))
+
+            segments.append(("arc", center_x, center_y, radius, right, phi_space))
+            x, y = arcEnd(center_x, center_y, radius, phi_lim2)
+            heading = -phi_lim2 if right else pi - phi_lim2
+            prevArc = (center_x, center_y, radius, phi_lim2, right, phi_space[-1])
+
+        else:
+            raise Exception("{} is not a valid segment type.".format(segment["type"]))
+
+    return segments
+
+
+def buildTunnel(spec):
+    # Fine point cloud of the tunnel described by spec
+    from tunnelGeometry import prism, cylinder, arcRect, arcCylinder, uniquePoints
+
+    section = spec["section"]
+    fine_step = spec["fine_step"]
+    if (section["type"] == "rect"):
+        tun_width = section["width"]
+        zlim1 = -section["height"]/2
+        zlim2 =  section["height"]/2
+        z_space = np.arange(zlim1, zlim2+fine_step, fine_step)
+    elif (section["type"] == "cyl"):
+        tun_radius = section["radius"]
+        theta_space = np.arange(0, 2*pi, pi/spec["theta_divisions"])
+    else:
+        raise Exception("{} is not a valid tunnel section type.".format(section["type"]))
+
+    walls = []
+    for segment in tunnelSegments(spec):
+        if (segment[0] == "straight"):
+            # Built along x from (x, y), then rotated to the heading
+            _, x, y, heading, length = segment
+            x_space = np.arange(x, x+length+fine_step, fine_step)
+            if (section["type"] == "rect"):
+                ylim1 = y-tun_width/2
+                ylim2 = y+tun_width/2
+                y_space = np.arange(ylim1, ylim2+fine_step, fine_step)
+                points = prism(x_space, y_space, z_space, ylim1, ylim2, zlim1, zlim2)
+            else:
+                points = cylinder(x_space, theta_space, tun_radius)
+                points[:,1] += y
+            walls.append(placePoints(points, x, y, heading))
+        else:
+            _, center_x, center_y, radius, right, phi_space = segment
+            if (section["type"] == "rect"):
+                radius_space = np.arange(radius-tun_width/2, radius+tun_width/2, spec["radius_step"])
+                walls.append(arcRect(center_x, center_y, radius, tun_width, phi_space, z_space, radius_space, zlim1, zlim2))
+            else:
+                walls.append(arcCylinder(center_x, center_y, radius, tun_radius, phi_space, theta_space))
+
+    return uniquePoints(np.vstack(walls))
+
+
+def tunnelCenterline(spec, ds):
+    # Points of the tunnel's center line (z = 0) about every ds, and the unit direction of
+    # the tunnel at each point (from the entrance to the exit)
+    points = []
+    tangents = []
+    for segment in tunnelSegments(spec):
+        if (segment[0] == "straight"):
+            _, x, y, heading, length = segment
+            s = np.linspace(0, length, int(np.ceil(length/ds)) + 1)
+            points.append(np.column_stack((x + s*np.cos(heading), y + s*np.sin(heading))))
+            tangents.append(np.tile([np.cos(heading), np.sin(heading)], (len(s), 1)))
+        else:
+            # point = center + R*(sin(phi), cos(phi)), phi increases on a right turn
+            _, center_x, center_y, radius, right, phi_space = segment
+            phi = np.linspace(phi_space[0], phi_space[-1], int(np.ceil(radius*abs(phi_space[-1] - phi_space[0])/ds)) + 1)
+            direction = 1.0 if right else -1.0
+            points.append(np.column_stack((center_x + radius*np.sin(phi), center_y + radius*np.cos(phi))))
+            tangents.append(direction*np.column_stack((np.cos(phi), -np.sin(phi))))
+    points = np.vstack(points)
+    return np.column_stack((points, np.zeros(len(points)))), np.column_stack((np.vstack(tangents), np.zeros(len(points))))
+
+
+def environmentDir(name):
+    return os.path.join(environmentsDir, name)
+
+
+def generateEnvironment(spec, name, cellSize=2.5, force=False):
+    # Writes the environment's files (unless they are up to date), returns its metadata and
+    # whether it was (re)generated
+    from tunnelGeometry import snapToGrid
+    from spatialIndex import GridIndex
+
+    outDir = environmentDir(name)
+    metadataFile = os.path.join(outDir, "metadata.json")
+    hash = specHash(spec)
+    if not force and os.path.exists(metadataFile):
+        with open(metadataFile) as f:
+            metadata = json.load(f)
+        if (metadata["specHash"] == hash) and (metadata["cellSize"] == cellSize):
+            return metadata, False
+
+    pointcloud = buildTunnel(spec)
+    grid_step = spec["grid_step"]
+    pointcloud_filt = snapToGrid(pointcloud, grid_step)
+    gridStep = np.array([grid_step, grid_step, grid_step], dtype=float)
+    index = GridIndex(pointcloud_filt, gridStep, cellSize)
+
+    metadata = {
+        "name": name,
+        "spec": spec,
+        "specHash": hash,
+        "gridStep": gridStep.tolist(),
+        "cellSize": cellSize,
+        "num_points": len(pointcloud_filt),
+        "num_points_fine": len(pointcloud),
+        "min": pointcloud_filt.min(axis=0).tolist(),
+        "max": pointcloud_filt.max(axis=0).tolist(),
+    }
+
+    # The metadata is written last, so that an interrupted run is regenerated
+    os.makedirs(outDir, exist_ok=True)
+    if os.path.exists(metadataFile):
+        os.remove(metadataFile)
+    np.save(os.path.join(outDir, "pointcloud_fine.npy"), pointcloud)
+    np.save(os.path.join(outDir, "pointcloud_grid.npy"), np.vstack((gridStep, pointcloud_filt)))
+    index.save(os.path.join(outDir, "index.npz"))
+    with open(metadataFile, "w") as f:
+        json.dump(metadata, f, indent=4)
+    return metadata, True
+
+
+def loadEnvironment(name):
+    # Metadata and memory-mapped gridded point cloud of a generated environment
+    outDir = environmentDir(name)
+    metadataFile = os.path.join(outDir, "metadata.json")
+    if not os.path.exists(metadataFile):
+        raise Exception("Environment {} not found, generate it with generate_environment.py.".format(name))
+    with open(metadataFile) as f:
+        metadata = json.load(f)
+    return metadata, np.load(os.path.join(outDir, "pointcloud_grid.npy"), mmap_mode="r")
+
+
+def indexFile(name):
+    return os.path.join(environmentDir(name), "index.npz")
+
+
+def windFieldFile(name):
+    return os.path.join(environmentDir(name), "windfield.npz")
+
+
+def generateWindField(name, flowSpeed=2.0, step=0.5, force=False):
+    # Writes the wind field of a generated environment (unless it is up to date), returns its
+    # parameters and whether it was (re)generated
+    from scipy.spatial import cKDTree
+
+    metadata, _ = loadEnvironment(name)
+    spec = metadata["spec"]
+    params = {"specHash": metadata["specHash"], "flowSpeed": flowSpeed, "step": step}
+    file = windFieldFile(name)
+    if not force and os.path.exists(file):
+        with np.load(file) as data:
+            if (json.loads(str(data["params"])) == params):
+                return params, False
+
+    # Grid nodes, from the minimum to the maximum of the point cloud
+    lo = np.array(metadata["min"])
+    hi = np.array(metadata["max"])
+    shape = np.round((hi - lo)/step).astype(int) + 1
+    x = lo[0] + step*np.arange(shape[0])
+    y = lo[1] + step*np.arange(shape[1])
+    z = lo[2] + step*np.arange(shape[2])
+
+    # Horizontal distance to the center line and direction of the tunnel, for every (x, y) column
+    centerline, tangents = tunnelCenterline(spec, step/4)
+    X, Y = np.meshgrid(x, y, indexing="ij")
+    lateral, nearest = cKDTree(centerline[:,0:2]).query(np.column_stack((X.ravel(), Y.ravel())))
+    lateral = lateral.reshape(X.shape)[:,:,np.newaxis]
+    direction = tangents[nearest,0:2].reshape(X.shape + (2,))
+
+    # Distance to the center line relative to the section (1 at the walls)
+    section = spec["section"]
+    if (section["type"] == "rect"):
+        r = np.maximum(lateral/(section["width"]/2), np.abs(z)/(section["height"]/2))
+    else:
+        r = np.sqrt(lateral**2 + z**2)/section["radius"]
+    profile = np.where(r < 1, np.abs(1 - r)**(1/7), 0.0)
+
+    field = np.zeros(tuple(shape) + (3,))
+    field[...,0:2] = flowSpeed*profile[...,np.newaxis]*direction[:,:,np.newaxis,:]
+    np.savez(file, origin=lo, step=np.array([step, step, step]), field=field, params=json.dumps(params, sort_keys=True))
+    return params, True
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Generates a tunnel environment from a spec file (see environment.py), for PotField(..., environment=name).
+# Run from the repository root:
+#   python Simulation/environmentGeneration/generate_environment.py Simulation/environmentGeneration/specs/snake_rect.json
+# Nothing is regenerated if the spec didn't change since the last run (unless --force).
+# --wind-speed also generates the environment's wind field (flow along the tunnel, see environment.py).
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from environment import generateEnvironment, generateWindField, environmentDir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a tunnel environment (point clouds, spatial index and metadata) from a spec file.")
+    parser.add_argument("spec", help="tunnel spec (JSON)")
+    parser.add_argument("--name", help="environment name (default: name of the spec file)")
+    parser.add_argument("--cell-size", type=float, default=2.5, help="cell size of the spatial index, the potential field's rangeRadius (default: 2.5)")
+    parser.add_argument("--force", action="store_true", help="regenerate even if the spec didn't change")
+    parser.add_argument("--wind-speed", type=float, default=None, help="also generate the wind field, with this flow speed on the tunnel's center line (m/s)")
+    parser.add_argument("--wind-step", type=float, default=0.5, help="grid step of the wind field (default: 0.5)")
+    args = parser.parse_args()
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    name = args.name if args.name else os.path.splitext(os.path.basename(args.spec))[0]
+
+    start_time = time.time()
+    metadata, generated = generateEnvironment(spec, name, args.cell_size, args.force)
+    if generated:
+        print("Generated {} in {:.2f}s ({})".format(name, time.time() - start_time, environmentDir(name)))
+    else:
+        print("{} is up to date, spec hash {} ({})".format(name, metadata["specHash"], environmentDir(name)))
+    print("{} points ({} fine), min {}, max {}".format(metadata["num_points"], metadata["num_points_fine"], metadata["min"], metadata["max"]))
+
+    if args.wind_speed is not None:
+        start_time = time.time()
+        params, generated = generateWindField(name, args.wind_speed, args.wind_step, args.force or generated)
+        status = "Generated in {:.2f}s".format(time.time() - start_time) if generated else "Up to date"
+        print("Wind field: {} (flow speed {} m/s, grid step {} m)".format(status, params["flowSpeed"], params["step"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Binary point cloud files.
+# The point clouds are saved by the generate_tunnel_*.py scripts as CSV files (same rows,
+# the grid step is the first row of pointcloud_grid.csv). They are converted once to .npy
+# files, which are then memory-mapped (read-only): loading is near-instant and processes
+# that load the same file share its pages.
+# The .npy files are float64 by default (same values as the CSV files, so same simulation
+# results), float32 halves their size for display only. A missing or outdated .npy file is
+# (re)created from its CSV file.
+
+import os
+import numpy as np
+
+pointcloudDir = os.path.dirname(os.path.abspath(__file__))
+
+
+def pointcloudPath(name, ext=".npy"):
+    # Name of a point cloud of this folder ("pointcloud_grid"), or path to a point cloud file
+    root = os.path.splitext(name)[0]
+    if not os.path.dirname(root):
+        root = os.path.join(pointcloudDir, root)
+    return root + ext
+
+
+def convertPointcloud(csvFile, npyFile=None, dtype=np.float64):
+    # Converts a CSV point cloud to a .npy file
+    if npyFile is None:
+        npyFile = os.path.splitext(csvFile)[0] + ".npy"
+    data = np.genfromtxt(csvFile, delimiter=",", ndmin=2)
+
+    # Written to a temporary file first, so that other processes never read a partial file
+    tmpFile = "{}.{}.tmp".format(npyFile, os.getpid())
+    with open(tmpFile, "wb") as f:
+        np.save(f, data.astype(dtype))
+    os.replace(tmpFile, npyFile)
+    return npyFile
+
+
+def loadPointcloud(name, mmap=True):
+    # Rows of the point cloud file, memory-mapped (read-only) if mmap is True
+    npyFile = pointcloudPath(name, ".npy")
+    csvFile = pointcloudPath(name, ".csv")
+    if os.path.exists(csvFile):
+        if not os.path.exists(npyFile) or (os.path.getmtime(npyFile) < os.path.getmtime(csvFile)):
+            convertPointcloud(csvFile, npyFile)
+    elif not os.path.exists(npyFile):
+        raise Exception("Point cloud file {} not found.".format(npyFile))
+    return np.load(npyFile, mmap_mode="r" if mmap else None)
+
+
+if __name__ == "__main__":
+    # Convert point clouds: python Simulation/environmentGeneration/pointcloudFile.py [CSV files] [--float32]
+    import sys
+    args = sys.argv[1:]
+    dtype = np.float32 if ("--float32" in args) else np.float64
+    csvFiles = [pointcloudPath(a, ".csv") for a in args if not a.startswith("--")]
+    if not csvFiles:
+        csvFiles = [pointcloudPath("pointcloud_grid", ".csv"), pointcloudPath("pointcloud_fine", ".csv")]
+    for csvFile in csvFiles:
+        npyFile = convertPointcloud(csvFile, dtype=dtype)
+        data = np.load(npyFile, mmap_mode="r")
+        print("{} -> {} ({} rows, {}, {:.0f} KB -> {:.0f} KB)".format(csvFile, npyFile, len(data), data.dtype,
+              os.path.getsize(csvFile)/1024, os.path.getsize(npyFile)/1024))
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Tunnel point cloud geometry, used by the generate_tunnel_*.py scripts.
+# Every wall is built in one shot from the outer product of its two coordinate arrays
+# (the points have the same values as when they were appended one by one), duplicates
+# are removed with a lexicographic sort, and the point clouds are snapped to the grid
+# with a binary search on the grid coordinates.
+
+import numpy as np
+
+
+def stackPoints(x, y, z):
+    # Point cloud (N x 3) from coordinate arrays broadcast against each other
+    x, y, z = np.broadcast_arrays(x, y, z)
+    return np.column_stack((x.ravel(), y.ravel(), z.ravel()))
+
+def uniquePoints(pointcloud):
+    # Same as np.unique(pointcloud, axis=0) (sorted by x, then y, then z), but much faster on large point clouds
+    pointcloud = pointcloud[np.lexsort((pointcloud[:,2], pointcloud[:,1], pointcloud[:,0]))]
+    keep = np.ones(len(pointcloud), dtype=bool)
+    keep[1:] = (pointcloud[1:] != pointcloud[:-1]).any(axis=1)
+    return pointcloud[keep]
+
+
+# Straight tunnels (along x)
+# ---------------------------
+def prism(x_space, y_space, z_space, ylim1, ylim2, zlim1, zlim2):
+    # Floor and ceiling (z = zlim1, zlim2) and side walls (y = ylim1, ylim2) of a rectangular tunnel
+    x = x_space[:,None]
+    return np.vstack((stackPoints(x, y_space[None,:], zlim1),
+                      stackPoints(x, y_space[None,:], zlim2),
+                      stackPoints(x, ylim1, z_space[None,:]),
+                      stackPoints(x, ylim2, z_space[None,:])))
+
+def cylinder(x_space, theta_space, tun_radius):
+    # Wall of a circular tunnel
+    return stackPoints(x_space[:,None], tun_radius*np.cos(theta_space)[None,:], tun_radius*np.sin(theta_space)[None,:])
+
+
+# Arcs (around a vertical axis, phi is measured from the y axis)
+# ---------------------------
+def arcRect(center_x, center_y, arc_radius, tun_width, phi_space, z_space, radius_space, zlim1, zlim2):
+    # Outer and inner walls and floor and ceiling of a rectangular tunnel arc
+    sinPhi = np.sin(phi_space)[None,:]
+    cosPhi = np.cos(phi_space)[None,:]
+    r = radius_space[:,None]
+    z = z_space[:,None]
+    return np.vstack((stackPoints(center_x + (arc_radius+tun_width/2)*sinPhi, center_y + (arc_radius+tun_width/2)*cosPhi, z),
+                      stackPoints(center_x + (arc_radius-tun_width/2)*sinPhi, center_y + (arc_radius-tun_width/2)*cosPhi, z),
+                      stackPoints(center_x + r*sinPhi, center_y + r*cosPhi, zlim1),
+                      stackPoints(center_x + r*sinPhi, center_y + r*cosPhi, zlim2)))
+
+def arcCylinder(center_x, center_y, arc_radius, tun_radius, phi_space, theta_space):
+    # Wall of a circular tunnel arc
+    r = arc_radius + tun_radius*np.cos(theta_space)[:,None]
+    return stackPoints(center_x + r*np.sin(phi_space)[None,:], center_y + r*np.cos(phi_space)[None,:],
+                       tun_radius*np.sin(theta_space)[:,None])
+
+def arcEnd(center_x, center_y, arc_radius, phi):
+    # Point of the arc's centerline at angle phi
+    return center_x + arc_radius*np.sin(phi), center_y + arc_radius*np.cos(phi)
+
+def nextArcCenter(center_x, center_y, arc_radius, phi_end, next_radius):
+    # Center of the following arc (of opposite curvature), tangent at the end of this arc
+    end_x, end_y = arcEnd(center_x, center_y, arc_radius, phi_end)
+    return end_x + next_radius*(end_x-center_x)/arc_radius, end_y + next_radius*(end_y-center_y)/arc_radius
+
+
+# Grid snapping
+# ---------------------------
+def gridAxis(values, grid_step):
+    # Grid coordinates (multiples of grid_step from 0) covering the values
+    grid = np.arange(0, values.min()-grid_step, -grid_step)[::-1]
+    grid = np.append(grid, np.arange(0, values.max()+grid_step, grid_step))
+    return np.unique(grid)
+
+def snapToAxis(grid, values):
+    # Index of the nearest grid coordinate of every value (the lower one if both are as near)
+    idx = np.clip(np.searchsorted(grid, values), 1, len(grid)-1)
+    return np.where(abs(grid[idx-1] - values) <= abs(grid[idx] - values), idx-1, idx)
+
+def snapToGrid(pointcloud, grid_step):
+    # Point cloud snapped to the grid, without duplicates (sorted like np.unique(axis=0)).
+    # The duplicates are removed on a single integer key per grid cell, which sorts the
+    # same way as the grid coordinates.
+    grids = [gridAxis(pointcloud[:,i], grid_step) for i in range(3)]
+    idx = [snapToAxis(grids[i], pointcloud[:,i]) for i in range(3)]
+    key = np.unique((idx[0]*len(grids[1]) + idx[1])*len(grids[2]) + idx[2])
+    idx_z = key % len(grids[2])
+    idx_y = key//len(grids[2]) % len(grids[1])
+    idx_x = key//len(grids[2])//len(grids[1])
+    return np.column_stack((grids[0][idx_x], grids[1][idx_y], grids[2][idx_z]))
@@ -11,12 +11,9 @@ from numpy import pi
 import matplotlib.pyplot as plt
 import mpl_toolkits.mplot3d.axes3d as p3
 
-orient = "ENU"
+from tunnelGeometry import prism, cylinder, arcRect, arcCylinder, nextArcCenter, snapToGrid, uniquePoints
 
-def find_nearest(array, value):
-    array = np.asarray(array)
-    idx = (np.abs(array - value)).argmin()
-    return array[idx]
+orient = "ENU"
 
 
 
@@ -45,58 +42,14 @@ x_space = np.arange(xlim1, xlim2+xstep, xstep)
 y_space = np.arange(ylim1, ylim2+ystep, ystep)
 z_space = np.arange(zlim1, zlim2+zstep, zstep)
 
-# Initialize pointcloud
-pointcloud = np.zeros([1,3])
-
-# Wall 1
-for i in range(len(x_space)):
-    for j in range(len(y_space)):
-        x_point = x_space[i]
-        y_point = y_space[j]
-        z_point = zlim1
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Wall 2
-for i in range(len(x_space)):
-    for j in range(len(y_space)):
-        x_point = x_space[i]
-        y_point = y_space[j]
-        z_point = zlim2
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Wall 3
-for i in range(len(x_space)):
-    for j in range(len(z_space)):
-        x_point = x_space[i]
-        y_point = ylim1
-        z_point = z_space[j]
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Wall 4
-for i in range(len(x_space)):
-    for j in range(len(z_space)):
-        x_point = x_space[i]
-        y_point = ylim2
-        z_point = z_space[j]
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))        
-
-# Remove first point
-pointcloud = np.delete(pointcloud, 0, axis=0)
+# Walls of the tunnel sections, stacked at the end
+walls = []
+
+# Walls
+walls.append(prism(x_space, y_space, z_space, ylim1, ylim2, zlim1, zlim2))
 
 # Remove duplicates
-pointcloud = np.unique(pointcloud, axis=0)
+pointcloud = uniquePoints(np.vstack(walls))
 
 # Unpack pointcloud
 x_obs = pointcloud[:,0]
@@ -123,32 +76,8 @@ mid_z = 0.5*(z_obs.max()+z_obs.min())
 # ax.set_zlim3d([mid_z-maxRange, mid_z+maxRange])
 # ax.set_zlabel('Altitude')
 
-# Create filtered grid
-x_grid = np.arange(0, x_obs.min()-grid_step, -grid_step)[::-1]
-x_grid = np.append(x_grid, np.arange(0, x_obs.max()+grid_step, grid_step))
-x_grid = np.unique(x_grid)
-
-y_grid = np.arange(0, y_obs.min()-grid_step, -grid_step)[::-1]
-y_grid = np.append(y_grid, np.arange(0, y_obs.max()+grid_step, grid_step))
-y_grid = np.unique(y_grid)
-
-z_grid = np.arange(0, z_obs.min()-grid_step, -grid_step)[::-1]
-z_grid = np.append(z_grid, np.arange(0, z_obs.max()+grid_step, grid_step))
-z_grid = np.unique(z_grid)
-
 # Create filtered pointcloud
-x_obs_filt = np.zeros(len(x_obs))
-y_obs_filt = np.zeros(len(x_obs))
-z_obs_filt = np.zeros(len(x_obs))
-for i in range(len(x_obs)):
-    x_obs_filt[i] = find_nearest(x_grid, x_obs[i])
-    y_obs_filt[i] = find_nearest(y_grid, y_obs[i])
-    z_obs_filt[i] = find_nearest(z_grid, z_obs[i])
-
-pointcloud_filt = np.transpose(np.array([(x_obs_filt), (y_obs_filt), (z_obs_filt)]))
-
-# Remove duplicates
-pointcloud_filt = np.unique(pointcloud_filt, axis=0)
+pointcloud_filt = snapToGrid(pointcloud, grid_step)
 
 # Unpack pointcloud
 x_obs = pointcloud_filt[:,0]
@@ -179,25 +108,14 @@ tun_radius = 4
 theta_step = pi/60
 theta_space = np.arange(0, 2*pi, theta_step)
 
-# Initialize pointcloud
-pointcloud = np.zeros([1,3])
+# Walls of the tunnel sections, stacked at the end
+walls = []
 
 # Cylinder wall
-for i in range(len(x_space)):
-    for j in range(len(theta_space)):
-        x_point = x_space[i]
-        y_point = tun_radius*np.cos(theta_space[j])
-        z_point = tun_radius*np.sin(theta_space[j])
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Remove first point
-pointcloud = np.delete(pointcloud, 0, axis=0)
+walls.append(cylinder(x_space, theta_space, tun_radius))
 
 # Remove duplicates
-pointcloud = np.unique(pointcloud, axis=0)
+pointcloud = uniquePoints(np.vstack(walls))
 
 # Unpack pointcloud
 x_obs = pointcloud[:,0]
@@ -224,32 +142,8 @@ mid_z = 0.5*(z_obs.max()+z_obs.min())
 # ax.set_zlim3d([mid_z-maxRange, mid_z+maxRange])
 # ax.set_zlabel('Altitude')
 
-# Create filtered grid
-x_grid = np.arange(0, x_obs.min()-grid_step, -grid_step)[::-1]
-x_grid = np.append(x_grid, np.arange(0, x_obs.max()+grid_step, grid_step))
-x_grid = np.unique(x_grid)
-
-y_grid = np.arange(0, y_obs.min()-grid_step, -grid_step)[::-1]
-y_grid = np.append(y_grid, np.arange(0, y_obs.max()+grid_step, grid_step))
-y_grid = np.unique(y_grid)
-
-z_grid = np.arange(0, z_obs.min()-grid_step, -grid_step)[::-1]
-z_grid = np.append(z_grid, np.arange(0, z_obs.max()+grid_step, grid_step))
-z_grid = np.unique(z_grid)
-
 # Create filtered pointcloud
-x_obs_filt = np.zeros(len(x_obs))
-y_obs_filt = np.zeros(len(x_obs))
-z_obs_filt = np.zeros(len(x_obs))
-for i in range(len(x_obs)):
-    x_obs_filt[i] = find_nearest(x_grid, x_obs[i])
-    y_obs_filt[i] = find_nearest(y_grid, y_obs[i])
-    z_obs_filt[i] = find_nearest(z_grid, z_obs[i])
-
-pointcloud_filt = np.transpose(np.array([(x_obs_filt), (y_obs_filt), (z_obs_filt)]))
-
-# Remove duplicates
-pointcloud_filt = np.unique(pointcloud_filt, axis=0)
+pointcloud_filt = snapToGrid(pointcloud, grid_step)
 
 # Unpack pointcloud
 x_obs = pointcloud_filt[:,0]
@@ -275,8 +169,8 @@ ax.set_zlabel('Altitude')
 
 #### Multiple Arcs ####
 
-# Initialize pointcloud
-pointcloud = np.zeros([1,3])
+# Walls of the tunnel sections, stacked at the end
+walls = []
 
 ## Arc 1
 # Create a gridded CYLINDRICAL coordinate system
@@ -293,172 +187,38 @@ phi_space = np.arange(phi_lim1, phi_lim2+phi_step, phi_step) ## POSITIVE increme
 radius_step = 0.08
 radius_space = np.arange(arc1_radius-tun_width/2, arc1_radius+tun_width/2+radius_step, radius_step)
 
-# Arc 1 wall 1
-for i in range(len(z_space)):
-    for j in range(len(phi_space)):
-        x_point = arc1_center_x + (arc1_radius+tun_width/2)*np.sin(phi_space[j])
-        y_point = arc1_center_y + (arc1_radius+tun_width/2)*np.cos(phi_space[j])
-        z_point = z_space[i]
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Arc 1 wall 2
-for i in range(len(z_space)):
-    for j in range(len(phi_space)):
-        x_point = arc1_center_x + (arc1_radius-tun_width/2)*np.sin(phi_space[j])
-        y_point = arc1_center_y + (arc1_radius-tun_width/2)*np.cos(phi_space[j])
-        z_point = z_space[i]
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Arc 1 wall 3
-for i in range(len(radius_space)):
-    for j in range(len(phi_space)):
-        x_point = arc1_center_x + radius_space[i]*np.sin(phi_space[j])
-        y_point = arc1_center_y + radius_space[i]*np.cos(phi_space[j])
-        z_point = zlim1
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Arc 1 wall 4
-for i in range(len(radius_space)):
-    for j in range(len(phi_space)):
-        x_point = arc1_center_x + radius_space[i]*np.sin(phi_space[j])
-        y_point = arc1_center_y + radius_space[i]*np.cos(phi_space[j])
-        z_point = zlim2
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
+# Arc 1 walls
+walls.append(arcRect(arc1_center_x, arc1_center_y, arc1_radius, tun_width, phi_space, z_space, radius_space, zlim1, zlim2))
 
 ## Arc 2
 arc2_radius = 15            ## You can change radius of following arcs
 radius_space = np.arange(arc2_radius-tun_width/2, arc2_radius+tun_width/2+radius_step, radius_step)
 
-arc1_end_x = arc1_center_x + arc1_radius*np.sin(phi_lim2)
-arc1_end_y = arc1_center_y + arc1_radius*np.cos(phi_lim2)
-
-arc2_center_x = arc1_end_x + arc2_radius*(arc1_end_x-arc1_center_x)/arc1_radius
-arc2_center_y = arc1_end_y + arc2_radius*(arc1_end_y-arc1_center_y)/arc1_radius
+arc2_center_x, arc2_center_y = nextArcCenter(arc1_center_x, arc1_center_y, arc1_radius, phi_lim2, arc2_radius)
 
 phi_lim1 = phi_lim2+pi          ## last angle of previous arc PLUS pi
 phi_lim2 = 3*pi/4
 phi_space = np.arange(phi_lim1, phi_lim2-phi_step, -phi_step)  ## NEGATIVE increments for 2nd arc
 
-# Arc 2 wall 1
-for i in range(len(z_space)):
-    for j in range(len(phi_space)):
-        x_point = arc2_center_x + (arc2_radius+tun_width/2)*np.sin(phi_space[j])
-        y_point = arc2_center_y + (arc2_radius+tun_width/2)*np.cos(phi_space[j])
-        z_point = z_space[i]
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Arc 2 wall 2
-for i in range(len(z_space)):
-    for j in range(len(phi_space)):
-        x_point = arc2_center_x + (arc2_radius-tun_width/2)*np.sin(phi_space[j])
-        y_point = arc2_center_y + (arc2_radius-tun_width/2)*np.cos(phi_space[j])
-        z_point = z_space[i]
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Arc 2 wall 3
-for i in range(len(radius_space)):
-    for j in range(len(phi_space)):
-        x_point = arc2_center_x + radius_space[i]*np.sin(phi_space[j])
-        y_point = arc2_center_y + radius_space[i]*np.cos(phi_space[j])
-        z_point = zlim1
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Arc 2 wall 4
-for i in range(len(radius_space)):
-    for j in range(len(phi_space)):
-        x_point = arc2_center_x + radius_space[i]*np.sin(phi_space[j])
-        y_point = arc2_center_y + radius_space[i]*np.cos(phi_space[j])
-        z_point = zlim2
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
+# Arc 2 walls
+walls.append(arcRect(arc2_center_x, arc2_center_y, arc2_radius, tun_width, phi_space, z_space, radius_space, zlim1, zlim2))
 
 ## Arc 3
 arc3_radius = 15            ## You can change radius of following arcs
 radius_space = np.arange(arc3_radius-tun_width/2, arc3_radius+tun_width/2+radius_step, radius_step)
 
-arc2_end_x = arc2_center_x + arc2_radius*np.sin(phi_lim2)
-arc2_end_y = arc2_center_y + arc2_radius*np.cos(phi_lim2)
-
-arc3_center_x = arc2_end_x + arc3_radius*(arc2_end_x-arc2_center_x)/arc2_radius
-arc3_center_y = arc2_end_y + arc3_radius*(arc2_end_y-arc2_center_y)/arc2_radius
+arc3_center_x, arc3_center_y = nextArcCenter(arc2_center_x, arc2_center_y, arc2_radius, phi_lim2, arc3_radius)
 
 phi_lim1 = phi_lim2-pi   ## last angle of previous arc MINUS pi
 phi_lim2 = pi/4
 phi_space = np.arange(phi_lim1, phi_lim2+phi_step, phi_step)  ## POSITIVE increments for 3rd arc
 
-# Arc 3 wall 1
-for i in range(len(z_space)):
-    for j in range(len(phi_space)):
-        x_point = arc3_center_x + (arc3_radius+tun_width/2)*np.sin(phi_space[j])
-        y_point = arc3_center_y + (arc3_radius+tun_width/2)*np.cos(phi_space[j])
-        z_point = z_space[i]
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Arc 3 wall 2
-for i in range(len(z_space)):
-    for j in range(len(phi_space)):
-        x_point = arc3_center_x + (arc3_radius-tun_width/2)*np.sin(phi_space[j])
-        y_point = arc3_center_y + (arc3_radius-tun_width/2)*np.cos(phi_space[j])
-        z_point = z_space[i]
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Arc 3 wall 3
-for i in range(len(radius_space)):
-    for j in range(len(phi_space)):
-        x_point = arc3_center_x + radius_space[i]*np.sin(phi_space[j])
-        y_point = arc3_center_y + radius_space[i]*np.cos(phi_space[j])
-        z_point = zlim1
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Arc 3 wall 4
-for i in range(len(radius_space)):
-    for j in range(len(phi_space)):
-        x_point = arc3_center_x + radius_space[i]*np.sin(phi_space[j])
-        y_point = arc3_center_y + radius_space[i]*np.cos(phi_space[j])
-        z_point = zlim2
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))        
-
-
-# Remove first point
-pointcloud = np.delete(pointcloud, 0, axis=0)
+# Arc 3 walls
+walls.append(arcRect(arc3_center_x, arc3_center_y, arc3_radius, tun_width, phi_space, z_space, radius_space, zlim1, zlim2))
+
 
 # Remove duplicates
-pointcloud = np.unique(pointcloud, axis=0)
+pointcloud = uniquePoints(np.vstack(walls))
 
 # Unpack pointcloud
 x_obs = pointcloud[:,0]
@@ -485,32 +245,8 @@ mid_z = 0.5*(z_obs.max()+z_obs.min())
 # ax.set_zlim3d([mid_z-maxRange, mid_z+maxRange])
 # ax.set_zlabel('Altitude')
 
-# Create filtered grid
-x_grid = np.arange(0, x_obs.min()-grid_step, -grid_step)[::-1]
-x_grid = np.append(x_grid, np.arange(0, x_obs.max()+grid_step, grid_step))
-x_grid = np.unique(x_grid)
-
-y_grid = np.arange(0, y_obs.min()-grid_step, -grid_step)[::-1]
-y_grid = np.append(y_grid, np.arange(0, y_obs.max()+grid_step, grid_step))
-y_grid = np.unique(y_grid)
-
-z_grid = np.arange(0, z_obs.min()-grid_step, -grid_step)[::-1]
-z_grid = np.append(z_grid, np.arange(0, z_obs.max()+grid_step, grid_step))
-z_grid = np.unique(z_grid)
-
 # Create filtered pointcloud
-x_obs_filt = np.zeros(len(x_obs))
-y_obs_filt = np.zeros(len(x_obs))
-z_obs_filt = np.zeros(len(x_obs))
-for i in range(len(x_obs)):
-    x_obs_filt[i] = find_nearest(x_grid, x_obs[i])
-    y_obs_filt[i] = find_nearest(y_grid, y_obs[i])
-    z_obs_filt[i] = find_nearest(z_grid, z_obs[i])
-
-pointcloud_filt = np.transpose(np.array([(x_obs_filt), (y_obs_filt), (z_obs_filt)]))
-
-# Remove duplicates
-pointcloud_filt = np.unique(pointcloud_filt, axis=0)
+pointcloud_filt = snapToGrid(pointcloud, grid_step)
 
 # Unpack pointcloud
 x_obs = pointcloud_filt[:,0]
@@ -536,8 +272,8 @@ ax.set_zlabel('Altitude')
 
 #### Multiple Cylinder Arcs ####
 
-# Initialize pointcloud
-pointcloud = np.zeros([1,3])
+# Walls of the tunnel sections, stacked at the end
+walls = []
 
 tun_radius = 4
 
@@ -558,69 +294,34 @@ phi_space = np.arange(phi_lim1, phi_lim2+phi_step, phi_step) ## POSITIVE increme
 radius_step = 0.15
 
 # Arc 1 cylinder wall
-for i in range(len(theta_space)):
-    for j in range(len(phi_space)):
-        x_point = arc1_center_x + (arc1_radius + tun_radius*np.cos(theta_space[i]))*np.sin(phi_space[j])
-        y_point = arc1_center_y + (arc1_radius + tun_radius*np.cos(theta_space[i]))*np.cos(phi_space[j])
-        z_point = tun_radius*np.sin(theta_space[i])
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
+walls.append(arcCylinder(arc1_center_x, arc1_center_y, arc1_radius, tun_radius, phi_space, theta_space))
 
 ## Arc 2 
 arc2_radius = 15            ## You can change radius of following arcs
 
-arc1_end_x = arc1_center_x + arc1_radius*np.sin(phi_lim2)
-arc1_end_y = arc1_center_y + arc1_radius*np.cos(phi_lim2)
-
-arc2_center_x = arc1_end_x + arc2_radius*(arc1_end_x-arc1_center_x)/arc1_radius
-arc2_center_y = arc1_end_y + arc2_radius*(arc1_end_y-arc1_center_y)/arc1_radius
+arc2_center_x, arc2_center_y = nextArcCenter(arc1_center_x, arc1_center_y, arc1_radius, phi_lim2, arc2_radius)
 
 phi_lim1 = phi_lim2+pi          ## last angle of previous arc PLUS pi
 phi_lim2 = 3*pi/4
 phi_space = np.arange(phi_lim1, phi_lim2-phi_step, -phi_step)  ## NEGATIVE increments for 2nd arc
 
 # Arc 2 cylinder wall
-for i in range(len(theta_space)):
-    for j in range(len(phi_space)):
-        x_point = arc2_center_x + (arc2_radius + tun_radius*np.cos(theta_space[i]))*np.sin(phi_space[j])
-        y_point = arc2_center_y + (arc2_radius + tun_radius*np.cos(theta_space[i]))*np.cos(phi_space[j])
-        z_point = tun_radius*np.sin(theta_space[i])
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
+walls.append(arcCylinder(arc2_center_x, arc2_center_y, arc2_radius, tun_radius, phi_space, theta_space))
 
 ## Arc 3
 arc3_radius = 15            ## You can change radius of following arcs
 
-arc2_end_x = arc2_center_x + arc2_radius*np.sin(phi_lim2)
-arc2_end_y = arc2_center_y + arc2_radius*np.cos(phi_lim2)
-
-arc3_center_x = arc2_end_x + arc3_radius*(arc2_end_x-arc2_center_x)/arc2_radius
-arc3_center_y = arc2_end_y + arc3_radius*(arc2_end_y-arc2_center_y)/arc2_radius
+arc3_center_x, arc3_center_y = nextArcCenter(arc2_center_x, arc2_center_y, arc2_radius, phi_lim2, arc3_radius)
 
 phi_lim1 = phi_lim2-pi   ## last angle of previous arc MINUS pi
 phi_lim2 = pi/4
 phi_space = np.arange(phi_lim1, phi_lim2+phi_step, phi_step)  ## POSITIVE increments for 3rd arc
 
 # Arc 3 cylinder wall
-for i in range(len(theta_space)):
-    for j in range(len(phi_space)):
-        x_point = arc3_center_x + (arc3_radius + tun_radius*np.cos(theta_space[i]))*np.sin(phi_space[j])
-        y_point = arc3_center_y + (arc3_radius + tun_radius*np.cos(theta_space[i]))*np.cos(phi_space[j])
-        z_point = tun_radius*np.sin(theta_space[i])
-
-        # Create point and add it to point cloud
-        point = np.array([x_point, y_point, z_point])
-        pointcloud = np.vstack((pointcloud, point))
-
-# Remove first point
-pointcloud = np.delete(pointcloud, 0, axis=0)
+walls.append(arcCylinder(arc3_center_x, arc3_center_y, arc3_radius, tun_radius, phi_space, theta_space))
 
 # Remove duplicates
-pointcloud = np.unique(pointcloud, axis=0)
+pointcloud = uniquePoints(np.vstack(walls))
 
 # Unpack pointcloud
 x_obs = pointcloud[:,0]
@@ -647,32 +348,8 @@ mid_z = 0.5*(z_obs.max()+z_obs.min())
 # ax.set_zlim3d([mid_z-maxRange, mid_z+maxRange])
 # ax.set_zlabel('Altitude')
 
-# Create filtered grid
-x_grid = np.arange(0, x_obs.min()-grid_step, -grid_step)[::-1]
-x_grid = np.append(x_grid, np.arange(0, x_obs.max()+grid_step, grid_step))
-x_grid = np.unique(x_grid)
-
-y_grid = np.arange(0, y_obs.min()-grid_step, -grid_step)[::-1]
-y_grid = np.append(y_grid, np.arange(0, y_obs.max()+grid_step, grid_step))
-y_grid = np.unique(y_grid)
-
-z_grid = np.arange(0, z_obs.min()-grid_step, -grid_step)[::-1]
-z_grid = np.append(z_grid, np.arange(0, z_obs.max()+grid_step, grid_step))
-z_grid = np.unique(z_grid)
-
 # Create filtered pointcloud
-x_obs_filt = np.zeros(len(x_obs))
-y_obs_filt = np.zeros(len(x_obs))
-z_obs_filt = np.zeros(len(x_obs))
-for i in range(len(x_obs)):
-    x_obs_filt[i] = find_nearest(x_grid, x_obs[i])
-    y_obs_filt[i] = find_nearest(y_grid, y_obs[i])
-    z_obs_filt[i] = find_nearest(z_grid, z_obs[i])
-
-pointcloud_filt = np.transpose(np.array([(x_obs_filt), (y_obs_filt), (z_obs_filt)]))
-
-# Remove duplicates
-pointcloud_filt = np.unique(pointcloud_filt, axis=0)
+pointcloud_filt = snapToGrid(pointcloud, grid_step)
 
 # Unpack pointcloud
 x_obs = pointcloud_filt[:,0]
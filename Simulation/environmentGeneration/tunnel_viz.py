@@ -12,11 +12,13 @@ import vispy.scene
 import vispy.app
 from vispy.scene import visuals
 
+from pointcloudFile import loadPointcloud
+
 orient = "ENU"
 
 
-pointcloud      = np.genfromtxt("./Simulation/environmentGeneration/pointcloud_fine.csv", delimiter=",")
-pointcloud_filt = np.genfromtxt("./Simulation/environmentGeneration/pointcloud_grid.csv", delimiter=",")
+pointcloud      = loadPointcloud("pointcloud_fine")
+pointcloud_filt = loadPointcloud("pointcloud_grid")
 
 center_pc_x = (pointcloud[:,0].max() + pointcloud[:,0].min())/2
 center_pc_y = (pointcloud[:,1].max() + pointcloud[:,1].min())/2
@@ -10,36 +10,76 @@ import numpy as np
 from numpy import pi
 from numpy import sin, cos, tan, sqrt
 from numpy.linalg import norm
+from spatialIndex import GridIndex
+from environmentGeneration.pointcloudFile import loadPointcloud
+from environmentGeneration.environment import loadEnvironment, indexFile
 
 
 
 
 class PotField:
 
-    def __init__(self, pfType):
-        importedData = np.genfromtxt("./Simulation/environmentGeneration/pointcloud_grid.csv", delimiter=",")
+    def __init__(self, pfType, rangeMargin=0.5, environment=None):
+        # Memory-mapped point cloud (read-only), the first row is the grid step
+        # (a float32 file is converted, the force computations are done in float64).
+        # environment is the name of an environment generated with generate_environment.py
+        # (its point cloud, bounds and spatial index are loaded), else pointcloud_grid is used.
+        if environment is None:
+            importedData = loadPointcloud("pointcloud_grid")
+        else:
+            metadata, importedData = loadEnvironment(environment)
+        if (importedData.dtype != np.float64):
+            importedData = importedData.astype(np.float64)
         self.pointcloud = importedData[1::]
-        self.gridStep = importedData[0]
+        self.gridStep = np.array(importedData[0], dtype=float)
         self.num_points = len(self.pointcloud)
 
         self.rangeRadius = 2.5
         self.fieldRadius = 2
 
-        self.max_pc_x = self.pointcloud[:,0].max()
-        self.max_pc_y = self.pointcloud[:,1].max()
-        self.max_pc_z = self.pointcloud[:,2].max()
-        self.min_pc_x = self.pointcloud[:,0].min()
-        self.min_pc_y = self.pointcloud[:,1].min()
-        self.min_pc_z = self.pointcloud[:,2].min()
+        if environment is None:
+            self.max_pc_x = self.pointcloud[:,0].max()
+            self.max_pc_y = self.pointcloud[:,1].max()
+            self.max_pc_z = self.pointcloud[:,2].max()
+            self.min_pc_x = self.pointcloud[:,0].min()
+            self.min_pc_y = self.pointcloud[:,1].min()
+            self.min_pc_z = self.pointcloud[:,2].min()
+        else:
+            self.max_pc_x, self.max_pc_y, self.max_pc_z = metadata["max"]
+            self.min_pc_x, self.min_pc_y, self.min_pc_z = metadata["min"]
 
         self.center_pc_x = (self.max_pc_x + self.min_pc_x)/2
         self.center_pc_y = (self.max_pc_y + self.min_pc_y)/2
         self.center_pc_z = (self.max_pc_z + self.min_pc_z)/2
 
+        # Spatial index of the point cloud (cells the size of the range), the environment's
+        # prebuilt index is used if it was built with the same cell size
+        if environment is not None and (metadata["cellSize"] == self.rangeRadius):
+            self.index = GridIndex.load(indexFile(environment), self.pointcloud)
+        else:
+            self.index = GridIndex(self.pointcloud, self.gridStep, self.rangeRadius)
+
+        # Masks over the point cloud, only the entries of the points that enter or
+        # leave a set are updated at every step
         self.withinRange     = np.zeros(self.num_points, dtype=bool)
-        self.notWithinRange  = np.zeros(self.num_points, dtype=bool)
+        self.notWithinRange  = np.ones(self.num_points, dtype=bool)
         self.withinField     = np.zeros(self.num_points, dtype=bool)
         self.inRangeNotField = np.zeros(self.num_points, dtype=bool)
+        self.idx_withinRange     = np.zeros(0, dtype=np.int64)
+        self.idx_withinField     = np.zeros(0, dtype=np.int64)
+        self.idx_inRangeNotField = np.zeros(0, dtype=np.int64)
+
+        # Neighbour tracking: the points within rangeRadius + rangeMargin of an anchor position
+        # are kept as candidates, and the index is only queried again once the quad has moved
+        # more than rangeMargin away from the anchor (rangeMargin = 0 queries it at every step).
+        # The candidate masks (cand*) are the masks restricted to the candidates.
+        self.rangeMargin = rangeMargin
+        self.anchor = np.full(3, np.inf)
+        self.idx_candidates = np.zeros(0, dtype=np.int64)
+        self.candidatesT = np.zeros([3, 0])
+        self.candWithinRange = np.zeros(0, dtype=bool)
+        self.candWithinField = np.zeros(0, dtype=bool)
+        self.candInRangeNotField = np.zeros(0, dtype=bool)
 
         self.force = np.zeros(3)
         self.vel   = np.zeros(3)
@@ -59,37 +99,68 @@ class PotField:
         # Determine which points are withing a certain 
         # range, larger than the Potential Field Range
         # ---------------------------
-        self.withinRange = (abs(quad.pos[0]-self.pointcloud[:,0]) <= self.rangeRadius) & \
-                           (abs(quad.pos[1]-self.pointcloud[:,1]) <= self.rangeRadius) & \
-                           (abs(quad.pos[2]-self.pointcloud[:,2]) <= self.rangeRadius)
-        self.idx_withinRange = np.where(self.withinRange)[0]
-        self.notWithinRange = ~(self.withinRange)
-        self.idx_notWithinRange = np.where(self.notWithinRange)[0]
+        if (abs(quad.pos - self.anchor).max() > self.rangeMargin):
+            self.updateCandidates(quad.pos)
+
+        # Vectors from the quad to the candidates (one contiguous row per axis)
+        self.candVect = self.candidatesT - quad.pos[:,None]
+        withinRange = (abs(self.candVect) <= self.rangeRadius).all(axis=0)
+        self.idx_rangeCandidates = np.where(withinRange)[0]
+        self.idx_withinRange = self.idx_candidates[self.idx_rangeCandidates]
+
+        # Only the points that entered or left the range are updated in the masks
+        changed = self.idx_candidates[withinRange != self.candWithinRange]
+        self.withinRange[changed] = ~self.withinRange[changed]
+        self.notWithinRange[changed] = ~self.withinRange[changed]
+        self.candWithinRange = withinRange
+
+    def updateCandidates(self, pos):
+        # Clear the masks, then query the index around the new anchor position
+        # (the small padding keeps the candidates a superset of the points within range despite round-off)
+        self.withinRange[self.idx_withinRange] = False
+        self.notWithinRange[self.idx_withinRange] = True
+        self.withinField[self.idx_withinField] = False
+        self.inRangeNotField[self.idx_inRangeNotField] = False
+
+        self.anchor = np.array(pos, dtype=float)
+        self.idx_candidates = self.index.queryBox(self.anchor, self.rangeRadius + self.rangeMargin + 1e-6)
+        self.candidatesT = np.ascontiguousarray(self.pointcloud[self.idx_candidates].T)
+        self.candWithinRange = np.zeros(len(self.idx_candidates), dtype=bool)
+        self.candWithinField = np.zeros(len(self.idx_candidates), dtype=bool)
+        self.candInRangeNotField = np.zeros(len(self.idx_candidates), dtype=bool)
+
+    @property
+    def idx_notWithinRange(self):
+        return np.where(self.notWithinRange)[0]
 
     def isWithinField(self, quad):
         # Determine which points inside the first range is  
         # within the Potential Field Range
         # ---------------------------
-        distance = norm(self.pointcloud[self.idx_withinRange,:] - quad.pos, axis=1)
-
-        withinField = distance <= self.fieldRadius
+        vect = self.candVect
+        candDistance = sqrt(vect[0]*vect[0] + vect[1]*vect[1] + vect[2]*vect[2])
+        candWithinField = self.candWithinRange & (candDistance <= self.fieldRadius)
+        candInRangeNotField = self.candWithinRange & ~candWithinField
         
         # Distance to closest point in Field (if there are points in the Field)
         try:
-            self.distanceMin = distance.min()
+            self.distanceMin = candDistance[self.idx_rangeCandidates].min()
         except ValueError:
             self.distanceMin = -1
         
-        self.idx_withinField = self.idx_withinRange[np.where(withinField)[0]]
-        self.withinField = np.zeros(self.num_points, dtype=bool)
-        self.withinField[self.idx_withinField] = True
+        self.idx_withinField = self.idx_candidates[candWithinField]
+        self.idx_inRangeNotField = self.idx_candidates[candInRangeNotField]
 
-        self.idx_inRangeNotField = self.idx_withinRange[np.where(~withinField)[0]]
-        self.inRangeNotField = np.zeros(self.num_points, dtype=bool)
-        self.inRangeNotField[self.idx_inRangeNotField] = True
+        # Only the points that entered or left the sets are updated in the masks
+        changed = self.idx_candidates[candWithinField != self.candWithinField]
+        self.withinField[changed] = ~self.withinField[changed]
+        changed = self.idx_candidates[candInRangeNotField != self.candInRangeNotField]
+        self.inRangeNotField[changed] = ~self.inRangeNotField[changed]
+        self.candWithinField = candWithinField
+        self.candInRangeNotField = candInRangeNotField
 
         self.fieldPointcloud = self.pointcloud[self.idx_withinField]
-        self.fieldDistance = distance[np.where(withinField)[0]]
+        self.fieldDistance = candDistance[candWithinField]
 
     def rep_force(self, quad, traj):
         
@@ -10,10 +10,9 @@ import numpy as np
 from numpy import pi
 from numpy.linalg import inv
 import utils
-import config
 
 
-def sys_params():
+def sys_params(orient):
     mB  = 1.2       # mass (kg)
     g   = 9.81      # gravity (m/s/s)
     dxm = 0.16      # arm length (m)
@@ -26,6 +25,7 @@ def sys_params():
 
 
     params = {}
+    params["orient"] = orient    # "NED" or "ENU" (see config.py)
     params["mB"]   = mB
     params["g"]    = g
     params["dxm"]  = dxm
@@ -40,7 +40,7 @@ def sys_params():
     params["Cd"]         = 0.1
     params["kTh"]        = 1.076e-5 # thrust coeff (N/(rad/s)^2)  (1.18e-7 N/RPM^2)
     params["kTo"]        = 1.632e-7 # torque coeff (Nm/(rad/s)^2)  (1.79e-9 Nm/RPM^2)
-    params["mixerFM"]    = makeMixerFM(params) # Make mixer that calculated Thrust (F) and moments (M) as a function on motor speeds
+    params["mixerFM"]    = makeMixerFM(params, orient) # Make mixer that calculated Thrust (F) and moments (M) as a function on motor speeds
     params["mixerFMinv"] = inv(params["mixerFM"])
     params["minThr"]     = 0.1*4    # Minimum total thrust
     params["maxThr"]     = 9.18*4   # Maximum total thrust
@@ -63,7 +63,38 @@ def sys_params():
     
     return params
 
-def makeMixerFM(params):
+class QuadParams:
+    # Flat, fixed-layout copy of the parameters used by the state derivative kernels,
+    # so that they are read as attributes instead of through dict lookups.
+    # Some constant products are precomputed (same operation order as in the kernels).
+    __slots__ = ["mB", "g", "dxm", "dym", "dzm", "IBxx", "IByy", "IBzz", "IRzz", "Cd", "kTh", "kTo",
+                 "kp", "tau2", "m2dampTau", "minWmotor", "maxWmotor"]
+
+    def __init__(self, params):
+        self.mB   = params["mB"]
+        self.g    = params["g"]
+        self.dxm  = params["dxm"]
+        self.dym  = params["dym"]
+        self.dzm  = params["dzm"]
+        self.IBxx = float(params["IB"][0,0])
+        self.IByy = float(params["IB"][1,1])
+        self.IBzz = float(params["IB"][2,2])
+        self.IRzz = params["IRzz"]
+        self.Cd   = params["Cd"]
+        self.kTh  = params["kTh"]
+        self.kTo  = params["kTo"]
+        self.kp   = params["kp"]
+        self.tau2 = params["tau"]**2
+        self.m2dampTau = -2.0*params["damp"]*params["tau"]
+        self.minWmotor = params["minWmotor"]
+        self.maxWmotor = params["maxWmotor"]
+
+    def asArray(self, paramNames):
+        # Parameters as a float array, in the order expected by a kernel's stateDot_array
+        return np.array([getattr(self, name) for name in paramNames], dtype=float)
+
+
+def makeMixerFM(params, orient):
     dxm = params["dxm"]
     dym = params["dym"]
     kTh = params["kTh"]
@@ -74,12 +105,12 @@ def makeMixerFM(params):
     # given a desired thrust and desired moments.
     # Inspiration for this mixer (or coefficient matrix) and how it is used : 
     # https://link.springer.com/article/10.1007/s13369-017-2433-2 (https://sci-hub.tw/10.1007/s13369-017-2433-2)
-    if (config.orient == "NED"):
+    if (orient == "NED"):
         mixerFM = np.array([[    kTh,      kTh,      kTh,      kTh],
                             [dym*kTh, -dym*kTh,  -dym*kTh, dym*kTh],
                             [dxm*kTh,  dxm*kTh, -dxm*kTh, -dxm*kTh],
                             [   -kTo,      kTo,     -kTo,      kTo]])
-    elif (config.orient == "ENU"):
+    elif (orient == "ENU"):
         mixerFM = np.array([[     kTh,      kTh,      kTh,     kTh],
                             [ dym*kTh, -dym*kTh, -dym*kTh, dym*kTh],
                             [-dxm*kTh, -dxm*kTh,  dxm*kTh, dxm*kTh],
@@ -103,7 +134,7 @@ def init_cmd(params):
     cmd_hover = (w_hover-c0)/c1
     return [cmd_hover, w_hover, thr_hover, tor_hover]
 
-def init_state(params):
+def init_state(params, orient):
     
     x0     = 0.  # m
     y0     = 0.  # m
@@ -114,7 +145,7 @@ def init_state(params):
 
     quat = utils.YPRToQuat(psi0, theta0, phi0)
     
-    if (config.orient == "ENU"):
+    if (orient == "ENU"):
         z0 = -z0
 
     s = np.zeros(21)
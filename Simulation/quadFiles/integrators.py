@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# All integrators share the same small interface (a subset of scipy's ode):
+#   set_f_params(*args) : extra arguments passed to f(t, y, *args)
+#   integrate(t)        : advance the state from the last time to t and return it
+# integrate() always returns a new array, since the quadcopter keeps views
+# (pos, vel, ...) of the previous state.
+# The fixed-step integrators call f(t, y, *args, out=buffer) with their own preallocated
+# derivative buffers. f(t, y, *args) without "out" may return a buffer of its own,
+# which is only read before the next call.
+
+import numpy as np
+from scipy.integrate import ode
+
+integratorOptions = ["dopri5", "rk4", "semi_implicit"]
+
+
+def makeIntegrator(integrType, f, y0, t0, idx_vel=None):
+    if (integrType == "dopri5"):
+        return Dopri5(f, y0, t0)
+    elif (integrType == "rk4"):
+        return RK4(f, y0, t0)
+    elif (integrType == "semi_implicit"):
+        return SemiImplicitEuler(f, y0, t0, idx_vel)
+    else:
+        raise Exception("{} is not a valid integrator. Choose from {}.".format(integrType, integratorOptions))
+
+
+class Dopri5:
+    # Adaptive Runge-Kutta 4(5) (scipy), restarted at every call of integrate()
+
+    def __init__(self, f, y0, t0):
+        self.ode = ode(f).set_integrator('dopri5', first_step=0.00005, atol=10e-6, rtol=10e-6)
+        self.ode.set_initial_value(y0, t0)
+
+    def set_f_params(self, *args):
+        self.ode.set_f_params(*args)
+
+    def integrate(self, t):
+        return self.ode.integrate(t)
+
+
+class RK4:
+    # Classic fixed-step Runge-Kutta 4, one step per call of integrate()
+
+    def __init__(self, f, y0, t0):
+        self.f = f
+        self.y = np.array(y0, dtype=float)
+        self.t = t0
+        self.f_params = ()
+        self.k1 = np.zeros_like(self.y)
+        self.k2 = np.zeros_like(self.y)
+        self.k3 = np.zeros_like(self.y)
+        self.ytmp = np.zeros_like(self.y)
+
+    def set_f_params(self, *args):
+        self.f_params = args
+
+    def integrate(self, t):
+        h = t - self.t
+        if (h == 0):
+            return self.y.copy()
+
+        f    = self.f
+        t0   = self.t
+        y0   = self.y
+        ytmp = self.ytmp
+        k1 = f(t0, y0, *self.f_params, out=self.k1)
+        np.multiply(k1, h/2, out=ytmp)
+        ytmp += y0
+        k2 = f(t0 + h/2, ytmp, *self.f_params, out=self.k2)
+        np.multiply(k2, h/2, out=ytmp)
+        ytmp += y0
+        k3 = f(t0 + h/2, ytmp, *self.f_params, out=self.k3)
+        np.multiply(k3, h, out=ytmp)
+        ytmp += y0
+        k4 = f(t0 + h, ytmp, *self.f_params)
+
+        # y0 + h/6*(k1 + 2*k2 + 2*k3 + k4)
+        np.add(k2, k3, out=ytmp)
+        ytmp *= 2
+        ytmp += k1
+        ytmp += k4
+        ytmp *= h/6
+        self.y = y0 + ytmp
+        self.t = t
+        return self.y
+
+
+class SemiImplicitEuler:
+    # Fixed-step semi-implicit (symplectic) Euler, one step per call of integrate().
+    # The "velocity" states (idx_vel) are advanced first with the derivative at the
+    # current state, then the remaining states are advanced with the derivative
+    # evaluated using the updated velocities.
+
+    def __init__(self, f, y0, t0, idx_vel):
+        if idx_vel is None:
+            raise Exception("Semi-implicit Euler requires the indexes of the velocity states.")
+        self.f = f
+        self.y = np.array(y0, dtype=float)
+        self.t = t0
+        self.f_params = ()
+        self.idx_vel = np.asarray(idx_vel)
+        self.idx_pos = np.setdiff1d(np.arange(self.y.size), self.idx_vel)
+        self.k = np.zeros_like(self.y)
+
+    def set_f_params(self, *args):
+        self.f_params = args
+
+    def integrate(self, t):
+        h = t - self.t
+        if (h == 0):
+            return self.y.copy()
+
+        y = self.y.copy()
+        y[self.idx_vel] += h*self.f(self.t, y, *self.f_params, out=self.k)[self.idx_vel]
+        y[self.idx_pos] += h*self.f(t, y, *self.f_params)[self.idx_pos]
+
+        self.y = y
+        self.t = t
+        return self.y
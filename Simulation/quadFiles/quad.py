@@ -7,22 +7,32 @@ Please feel free to use and modify this, but keep the above information. Thanks!
 """
 
 import numpy as np
-from numpy import sin, cos, tan, pi, sign
-from scipy.integrate import ode
+from numpy import pi
 
-from quadFiles.initQuad import sys_params, init_cmd, init_state
+from quadFiles.initQuad import sys_params, init_cmd, init_state, QuadParams
+from quadFiles.integrators import makeIntegrator
+from quadFiles.stateDotKernels import loadKernels
 import utils
 import config
 
 deg2rad = pi/180.0
 
+# Indexes of the "velocity" states (xdot, ydot, zdot, p, q, r and motor accelerations),
+# used by the semi-implicit Euler integrator
+idx_vel = np.array([7, 8, 9, 10, 11, 12, 14, 16, 18, 20])
+
+
 class Quadcopter:
 
-    def __init__(self, Ti):
+    def __init__(self, Ti, integrator="dopri5", cfg=None):
         
+        # Simulation settings (orientation, precession, drag), config.py's if cfg is None
+        # ---------------------------
+        self.cfg = cfg if cfg is not None else config.SimConfig()
+
         # Quad Params
         # ---------------------------
-        self.params = sys_params()
+        self.params = sys_params(self.cfg.orient)
         
         # Command for initial stable hover
         # ---------------------------
@@ -33,9 +43,19 @@ class Quadcopter:
         self.thr = np.ones(4)*ini_hover[2]
         self.tor = np.ones(4)*ini_hover[3]
 
+        # Parameters and kernel used by state_dot
+        # The kernel is generated from the PyDy derivation (see quadFiles/stateDotKernels), it
+        # writes the 21 state derivatives into the caller-supplied "out" array and is already
+        # the analytically solved vector of MM*x = RHS.
+        # ---------------------------
+        self.prm = QuadParams(self.params)
+        self.kernels = loadKernels(self.cfg.orient, self.cfg.usePrecession, self.cfg.useWindDrag)
+        self.stateDotKernel = self.kernels.stateDot
+        self.sdot = np.zeros(21)
+
         # Initial State
         # ---------------------------
-        self.state = init_state(self.params)
+        self.state = init_state(self.params, self.cfg.orient)
 
         self.pos   = self.state[0:3]
         self.quat  = self.state[3:7]
@@ -44,15 +64,15 @@ class Quadcopter:
         self.wMotor = np.array([self.state[13], self.state[15], self.state[17], self.state[19]])
         self.vel_dot = np.zeros(3)
         self.omega_dot = np.zeros(3)
-        self.acc = np.zeros(3)
+        self.acc = self.sdot[7:10]     # Acceleration at the last state_dot evaluation into self.sdot
 
         self.extended_state()
         self.forces()
 
-        # Set Integrator
+        # Set Integrator ("dopri5", "rk4" or "semi_implicit")
         # ---------------------------
-        self.integrator = ode(self.state_dot).set_integrator('dopri5', first_step='0.00005', atol='10e-6', rtol='10e-6')
-        self.integrator.set_initial_value(self.state, Ti)
+        self.integratorType = integrator
+        self.integrator = makeIntegrator(integrator, self.state_dot, self.state, Ti, idx_vel)
 
 
     def extended_state(self):
@@ -74,160 +94,28 @@ class Quadcopter:
         self.thr = self.params["kTh"]*self.wMotor*self.wMotor
         self.tor = self.params["kTo"]*self.wMotor*self.wMotor
 
-    def state_dot(self, t, state, cmd, wind):
-
-        # Import Params
-        # ---------------------------    
-        mB   = self.params["mB"]
-        g    = self.params["g"]
-        dxm  = self.params["dxm"]
-        dym  = self.params["dym"]
-        IB   = self.params["IB"]
-        IBxx = IB[0,0]
-        IByy = IB[1,1]
-        IBzz = IB[2,2]
-        Cd   = self.params["Cd"]
-        
-        kTh  = self.params["kTh"]
-        kTo  = self.params["kTo"]
-        tau  = self.params["tau"]
-        kp   = self.params["kp"]
-        damp = self.params["damp"]
-        minWmotor = self.params["minWmotor"]
-        maxWmotor = self.params["maxWmotor"]
-
-        IRzz = self.params["IRzz"]
-        if (config.usePrecession):
-            uP = 1
-        else:
-            uP = 0
-    
-        # Import State Vector
-        # ---------------------------  
-        x      = state[0]
-        y      = state[1]
-        z      = state[2]
-        q0     = state[3]
-        q1     = state[4]
-        q2     = state[5]
-        q3     = state[6]
-        xdot   = state[7]
-        ydot   = state[8]
-        zdot   = state[9]
-        p      = state[10]
-        q      = state[11]
-        r      = state[12]
-        wM1    = state[13]
-        wdotM1 = state[14]
-        wM2    = state[15]
-        wdotM2 = state[16]
-        wM3    = state[17]
-        wdotM3 = state[18]
-        wM4    = state[19]
-        wdotM4 = state[20]
-
-        # Motor Dynamics and Rotor forces (Second Order System: https://apmonitor.com/pdc/index.php/Main/SecondOrderSystems)
-        # ---------------------------
-        
-        uMotor = cmd
-        wddotM1 = (-2.0*damp*tau*wdotM1 - wM1 + kp*uMotor[0])/(tau**2)
-        wddotM2 = (-2.0*damp*tau*wdotM2 - wM2 + kp*uMotor[1])/(tau**2)
-        wddotM3 = (-2.0*damp*tau*wdotM3 - wM3 + kp*uMotor[2])/(tau**2)
-        wddotM4 = (-2.0*damp*tau*wdotM4 - wM4 + kp*uMotor[3])/(tau**2)
-    
-        wMotor = np.array([wM1, wM2, wM3, wM4])
-        wMotor = np.clip(wMotor, minWmotor, maxWmotor)
-        thrust = kTh*wMotor*wMotor
-        torque = kTo*wMotor*wMotor
-    
-        ThrM1 = thrust[0]
-        ThrM2 = thrust[1]
-        ThrM3 = thrust[2]
-        ThrM4 = thrust[3]
-        TorM1 = torque[0]
-        TorM2 = torque[1]
-        TorM3 = torque[2]
-        TorM4 = torque[3]
-
-        # Wind Model
-        # ---------------------------
-        [velW, qW1, qW2] = wind.randomWind(t)
-        # velW = 0
+    def state_dot(self, t, state, cmd, wind, out=None):
 
-        # velW = 5          # m/s
-        # qW1 = 0*deg2rad    # Wind heading
-        # qW2 = 60*deg2rad     # Wind elevation (positive = upwards wind in NED, positive = downwards wind in ENU)
-    
-        # State Derivatives (from PyDy) This is already the analytically solved vector of MM*x = RHS
-        # ---------------------------
-        if (config.orient == "NED"):
-            DynamicsDot = np.array([
-                [                                                                                                                                   xdot],
-                [                                                                                                                                   ydot],
-                [                                                                                                                                   zdot],
-                [                                                                                                        -0.5*p*q1 - 0.5*q*q2 - 0.5*q3*r],
-                [                                                                                                         0.5*p*q0 - 0.5*q*q3 + 0.5*q2*r],
-                [                                                                                                         0.5*p*q3 + 0.5*q*q0 - 0.5*q1*r],
-                [                                                                                                        -0.5*p*q2 + 0.5*q*q1 + 0.5*q0*r],
-                [     (Cd*sign(velW*cos(qW1)*cos(qW2) - xdot)*(velW*cos(qW1)*cos(qW2) - xdot)**2 - 2*(q0*q2 + q1*q3)*(ThrM1 + ThrM2 + ThrM3 + ThrM4))/mB],
-                [     (Cd*sign(velW*sin(qW1)*cos(qW2) - ydot)*(velW*sin(qW1)*cos(qW2) - ydot)**2 + 2*(q0*q1 - q2*q3)*(ThrM1 + ThrM2 + ThrM3 + ThrM4))/mB],
-                [ (-Cd*sign(velW*sin(qW2) + zdot)*(velW*sin(qW2) + zdot)**2 - (ThrM1 + ThrM2 + ThrM3 + ThrM4)*(q0**2 - q1**2 - q2**2 + q3**2) + g*mB)/mB],
-                [                                    ((IByy - IBzz)*q*r - uP*IRzz*(wM1 - wM2 + wM3 - wM4)*q + ( ThrM1 - ThrM2 - ThrM3 + ThrM4)*dym)/IBxx], # uP activates or deactivates the use of gyroscopic precession.
-                [                                    ((IBzz - IBxx)*p*r + uP*IRzz*(wM1 - wM2 + wM3 - wM4)*p + ( ThrM1 + ThrM2 - ThrM3 - ThrM4)*dxm)/IByy], # Set uP to False if rotor inertia is not known (gyro precession has negigeable effect on drone dynamics)
-                [                                                                               ((IBxx - IByy)*p*q - TorM1 + TorM2 - TorM3 + TorM4)/IBzz]])
-        elif (config.orient == "ENU"):
-            DynamicsDot = np.array([
-                [                                                                                                                                   xdot],
-                [                                                                                                                                   ydot],
-                [                                                                                                                                   zdot],
-                [                                                                                                        -0.5*p*q1 - 0.5*q*q2 - 0.5*q3*r],
-                [                                                                                                         0.5*p*q0 - 0.5*q*q3 + 0.5*q2*r],
-                [                                                                                                         0.5*p*q3 + 0.5*q*q0 - 0.5*q1*r],
-                [                                                                                                        -0.5*p*q2 + 0.5*q*q1 + 0.5*q0*r],
-                [     (Cd*sign(velW*cos(qW1)*cos(qW2) - xdot)*(velW*cos(qW1)*cos(qW2) - xdot)**2 + 2*(q0*q2 + q1*q3)*(ThrM1 + ThrM2 + ThrM3 + ThrM4))/mB],
-                [     (Cd*sign(velW*sin(qW1)*cos(qW2) - ydot)*(velW*sin(qW1)*cos(qW2) - ydot)**2 - 2*(q0*q1 - q2*q3)*(ThrM1 + ThrM2 + ThrM3 + ThrM4))/mB],
-                [ (-Cd*sign(velW*sin(qW2) + zdot)*(velW*sin(qW2) + zdot)**2 + (ThrM1 + ThrM2 + ThrM3 + ThrM4)*(q0**2 - q1**2 - q2**2 + q3**2) - g*mB)/mB],
-                [                                    ((IByy - IBzz)*q*r + uP*IRzz*(wM1 - wM2 + wM3 - wM4)*q + ( ThrM1 - ThrM2 - ThrM3 + ThrM4)*dym)/IBxx], # uP activates or deactivates the use of gyroscopic precession.
-                [                                    ((IBzz - IBxx)*p*r - uP*IRzz*(wM1 - wM2 + wM3 - wM4)*p + (-ThrM1 - ThrM2 + ThrM3 + ThrM4)*dxm)/IByy], # Set uP to False if rotor inertia is not known (gyro precession has negigeable effect on drone dynamics)
-                [                                                                               ((IBxx - IBzz)*p*q + TorM1 - TorM2 + TorM3 - TorM4)/IBzz]])
-    
-    
-        # State Derivative Vector
+        # Writes the state derivatives into "out" (or into the reused self.sdot buffer)
+        if out is None:
+            out = self.sdot
+
+        # Wind Model (at the position of the state, if the wind has a wind field)
         # ---------------------------
-        sdot     = np.zeros([21])
-        sdot[0]  = DynamicsDot[0]
-        sdot[1]  = DynamicsDot[1]
-        sdot[2]  = DynamicsDot[2]
-        sdot[3]  = DynamicsDot[3]
-        sdot[4]  = DynamicsDot[4]
-        sdot[5]  = DynamicsDot[5]
-        sdot[6]  = DynamicsDot[6]
-        sdot[7]  = DynamicsDot[7]
-        sdot[8]  = DynamicsDot[8]
-        sdot[9]  = DynamicsDot[9]
-        sdot[10] = DynamicsDot[10]
-        sdot[11] = DynamicsDot[11]
-        sdot[12] = DynamicsDot[12]
-        sdot[13] = wdotM1
-        sdot[14] = wddotM1
-        sdot[15] = wdotM2
-        sdot[16] = wddotM2
-        sdot[17] = wdotM3
-        sdot[18] = wddotM3
-        sdot[19] = wdotM4
-        sdot[20] = wddotM4
-
-        self.acc = sdot[7:10]
-
-        return sdot
+        velW, qW1, qW2 = wind.randomWind(t, state[0:3])
+
+        self.stateDotKernel(out, state, cmd, velW, qW1, qW2, self.prm)
+
+        return out
 
     def update(self, t, Ts, cmd, wind):
 
         prev_vel   = self.vel
         prev_omega = self.omega
 
+        # Integrate up to t (the state lags the commands by one step, as it always has with dopri5)
         self.integrator.set_f_params(cmd, wind)
-        self.state = self.integrator.integrate(t, t+Ts)
+        self.state = self.integrator.integrate(t)
 
         self.pos   = self.state[0:3]
         self.quat  = self.state[3:7]
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import numpy as np
+from numpy import pi
+
+from quadFiles.initQuad import sys_params, init_cmd, init_state, QuadParams
+from quadFiles.integrators import makeIntegrator
+from quadFiles.quad import idx_vel
+from quadFiles.stateDotKernels import loadKernels
+import config
+
+deg2rad = pi/180.0
+
+class QuadcopterBatch:
+    # Same dynamics as the Quadcopter class, but for N vehicles at once.
+    # The states of all vehicles are stacked in an (N, 21) array (one row per vehicle,
+    # same column order as Quadcopter.state) and every derivative is computed with
+    # whole-array operations on the state columns.
+
+    def __init__(self, Ti, N, integrator="dopri5", cfg=None):
+
+        self.N = N
+
+        # Simulation settings (orientation, precession, drag), config.py's if cfg is None
+        # ---------------------------
+        self.cfg = cfg if cfg is not None else config.SimConfig()
+
+        # Quad Params (identical for every vehicle)
+        # ---------------------------
+        self.params = sys_params(self.cfg.orient)
+
+        # Command for initial stable hover
+        # ---------------------------
+        ini_hover = init_cmd(self.params)
+        self.params["FF"] = ini_hover[0]         # Feed-Forward Command for Hover
+        self.params["w_hover"] = ini_hover[1]    # Motor Speed for Hover
+        self.params["thr_hover"] = ini_hover[2]  # Motor Thrust for Hover
+        self.thr = np.ones([N, 4])*ini_hover[2]
+        self.tor = np.ones([N, 4])*ini_hover[3]
+
+        # Parameters and kernel used by state_dot (see quadFiles/stateDotKernels)
+        # ---------------------------
+        self.prm = QuadParams(self.params)
+        self.kernels = loadKernels(self.cfg.orient, self.cfg.usePrecession, self.cfg.useWindDrag)
+
+        # Initial State
+        # ---------------------------
+        self.state = np.tile(init_state(self.params, self.cfg.orient), (N, 1))
+
+        self.pos   = self.state[:,0:3]
+        self.quat  = self.state[:,3:7]
+        self.vel   = self.state[:,7:10]
+        self.omega = self.state[:,10:13]
+        self.wMotor = self.state[:,13:21:2]
+        self.vel_dot = np.zeros([N, 3])
+        self.omega_dot = np.zeros([N, 3])
+        self.acc = np.zeros([N, 3])
+
+        self.extended_state()
+        self.forces()
+
+        # Set Integrator ("dopri5", "rk4" or "semi_implicit")
+        # ---------------------------
+        # All vehicles are integrated together as one flattened state vector
+        # (with "dopri5", the step size is then driven by the worst vehicle)
+        idx_vel_all = (21*np.arange(N)[:,np.newaxis] + idx_vel).ravel()
+        self.integratorType = integrator
+        self.integrator = makeIntegrator(integrator, self.state_dot_flat, self.state.ravel(), Ti, idx_vel_all)
+
+
+    def extended_state(self):
+
+        q0 = self.quat[:,0]
+        q1 = self.quat[:,1]
+        q2 = self.quat[:,2]
+        q3 = self.quat[:,3]
+
+        # Rotation Matrix of current states (Direct Cosine Matrix), shape (N, 3, 3)
+        self.dcm = np.empty([self.N, 3, 3])
+        self.dcm[:,0,0] = q0**2 + q1**2 - q2**2 - q3**2
+        self.dcm[:,0,1] = 2.0*(q1*q2 - q0*q3)
+        self.dcm[:,0,2] = 2.0*(q1*q3 + q0*q2)
+        self.dcm[:,1,0] = 2.0*(q1*q2 + q0*q3)
+        self.dcm[:,1,1] = q0**2 - q1**2 + q2**2 - q3**2
+        self.dcm[:,1,2] = 2.0*(q2*q3 - q0*q1)
+        self.dcm[:,2,0] = 2.0*(q1*q3 - q0*q2)
+        self.dcm[:,2,1] = 2.0*(q2*q3 + q0*q1)
+        self.dcm[:,2,2] = q0**2 - q1**2 - q2**2 + q3**2
+
+        # Euler angles of current states (same as utils.quatToYPR_ZYX)
+        self.psi   = np.arctan2(2.0*(q1*q2 + q0*q3), q0**2 + q1**2 - q2**2 - q3**2)
+        self.theta = np.arcsin(np.clip(-2.0*(q1*q3 - q0*q2), -1.0, 1.0))
+        self.phi   = np.arctan2(2.0*(q2*q3 + q0*q1), q0**2 - q1**2 - q2**2 + q3**2)
+        self.euler = np.column_stack((self.phi, self.theta, self.psi))
+
+
+    def forces(self):
+
+        # Rotor thrusts and torques
+        self.thr = self.params["kTh"]*self.wMotor*self.wMotor
+        self.tor = self.params["kTo"]*self.wMotor*self.wMotor
+
+    def state_dot(self, t, state, cmd, wind, out=None):
+        # state : (N, 21) array of states
+        # cmd   : (N, 4) array of motor commands
+        # wind  : a single Wind object shared by all vehicles, or a sequence of N Wind objects
+        # out   : optional (N, 21) (or flat) array in which the derivatives are written
+
+        # Wind Model
+        # ---------------------------
+        if isinstance(wind, (list, tuple)):
+            [velW, qW1, qW2] = np.array([w.randomWind(t, pos) for (w, pos) in zip(wind, state[:,0:3])]).T
+        elif wind.field is not None:
+            [velW, qW1, qW2] = wind.windArrays(t, state[:,0:3])
+        else:
+            [velW, qW1, qW2] = wind.randomWind(t)
+
+        # State Derivatives (generated from PyDy), evaluated column-wise for all vehicles
+        # ---------------------------
+        if out is None:
+            sdot = np.empty(state.shape)
+        else:
+            sdot = out.reshape(state.shape)
+        self.kernels.stateDot_batch(sdot, state, cmd, velW, qW1, qW2, self.prm)
+
+        self.acc = sdot[:,7:10]
+
+        return sdot
+
+    def state_dot_flat(self, t, state, cmd, wind, out=None):
+
+        # Flattened interface for the ODE integrator
+        return self.state_dot(t, state.reshape(self.N, 21), cmd, wind, out).ravel()
+
+    def update(self, t, Ts, cmd, wind):
+
+        prev_vel   = self.vel
+        prev_omega = self.omega
+
+        self.integrator.set_f_params(cmd, wind)
+        self.state = self.integrator.integrate(t).reshape(self.N, 21)
+
+        self.pos   = self.state[:,0:3]
+        self.quat  = self.state[:,3:7]
+        self.vel   = self.state[:,7:10]
+        self.omega = self.state[:,10:13]
+        self.wMotor = self.state[:,13:21:2]
+
+        self.vel_dot = (self.vel - prev_vel)/Ts
+        self.omega_dot = (self.omega - prev_omega)/Ts
+
+        self.extended_state()
+        self.forces()
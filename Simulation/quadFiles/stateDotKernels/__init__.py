@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# State derivative kernels, generated from the PyDy derivation by
+# "PyDy Scripts/generate_kernels.py" (one module per orientation, precession and
+# wind/drag combination). Regenerate them instead of editing them by hand.
+
+import importlib
+
+compiledKernels = {}
+
+
+def kernelModuleName(orient, usePrecession, useWindDrag):
+    # Must match "PyDy Scripts/generate_kernels.py"
+    name = "stateDot_" + orient
+    if usePrecession:
+        name += "_precession"
+    if useWindDrag:
+        name += "_drag"
+    return name
+
+
+def loadKernels(orient, usePrecession, useWindDrag):
+    if not (orient == "NED" or orient == "ENU"):
+        raise Exception("{} is not a valid orientation. Verify config.py file.".format(orient))
+    return importlib.import_module(__name__ + "." + kernelModuleName(orient, usePrecession, useWindDrag))
+
+
+def numbaKernel(kernels):
+    # Compiled version of kernels.stateDot_array (prm is then QuadParams.asArray(kernels.paramNames)).
+    # The same dispatcher is returned for every call, so that the jitted functions that
+    # receive it as an argument are only compiled once.
+    if not (kernels.__name__ in compiledKernels):
+        from numba import njit
+        compiledKernels[kernels.__name__] = njit(cache=True)(kernels.stateDot_array)
+    return compiledKernels[kernels.__name__]
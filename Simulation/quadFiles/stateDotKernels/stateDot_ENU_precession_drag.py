@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Generated by "PyDy Scripts/generate_kernels.py", do not edit by hand.
+# Orientation: ENU, gyroscopic precession: yes, wind and aero drag: yes
+
+import numpy as np
+from math import sin, cos
+
+paramNames = ("mB", "g", "dxm", "dym", "IBxx", "IByy", "IBzz", "IRzz", "Cd", "kTh", "kTo", "kp", "tau2", "m2dampTau", "minWmotor", "maxWmotor")
+
+
+def stateDot(out, state, cmd, velW, qW1, qW2, prm):
+
+    (x, y, z, q0, q1, q2, q3, xdot, ydot, zdot, p, q, r,
+     wM1, wdotM1, wM2, wdotM2, wM3, wdotM3, wM4, wdotM4) = state.tolist()
+    uM1, uM2, uM3, uM4 = cmd.tolist()
+    mB = prm.mB
+    g = prm.g
+    dxm = prm.dxm
+    dym = prm.dym
+    IBxx = prm.IBxx
+    IByy = prm.IByy
+    IBzz = prm.IBzz
+    IRzz = prm.IRzz
+    Cd = prm.Cd
+    kTh = prm.kTh
+    kTo = prm.kTo
+    kp = prm.kp
+    tau2 = prm.tau2
+    m2dampTau = prm.m2dampTau
+    minWmotor = prm.minWmotor
+    maxWmotor = prm.maxWmotor
+
+    # Motor Dynamics and Rotor forces (Second Order System: https://apmonitor.com/pdc/index.php/Main/SecondOrderSystems)
+    wddotM1 = (m2dampTau*wdotM1 - wM1 + kp*uM1)/tau2
+    wddotM2 = (m2dampTau*wdotM2 - wM2 + kp*uM2)/tau2
+    wddotM3 = (m2dampTau*wdotM3 - wM3 + kp*uM3)/tau2
+    wddotM4 = (m2dampTau*wdotM4 - wM4 + kp*uM4)/tau2
+    wMc1 = min(max(wM1, minWmotor), maxWmotor)
+    wMc2 = min(max(wM2, minWmotor), maxWmotor)
+    wMc3 = min(max(wM3, minWmotor), maxWmotor)
+    wMc4 = min(max(wM4, minWmotor), maxWmotor)
+    ThrM1 = kTh*wMc1*wMc1
+    ThrM2 = kTh*wMc2*wMc2
+    ThrM3 = kTh*wMc3*wMc3
+    ThrM4 = kTh*wMc4*wMc4
+    TorM1 = kTo*wMc1*wMc1
+    TorM2 = kTo*wMc2*wMc2
+    TorM3 = kTo*wMc3*wMc3
+    TorM4 = kTo*wMc4*wMc4
+    ThrTot = ThrM1 + ThrM2 + ThrM3 + ThrM4
+
+    # State Derivatives (from PyDy)
+    # Air velocity and aero drag
+    w0 = velW*cos(qW2)
+    airVx = -w0*cos(qW1) + xdot
+    airVy = -w0*sin(qW1) + ydot
+    airVz = velW*sin(qW2) + zdot
+    dragX = airVx*abs(airVx)
+    dragY = airVy*abs(airVy)
+    dragZ = airVz*abs(airVz)
+    x0 = 0.5*p
+    x1 = 0.5*q2
+    x2 = 0.5*q3
+    x3 = 0.5*q
+    x4 = 0.5*r
+    x5 = 1/mB
+    x6 = 2*q0
+    x7 = q*r
+    x8 = ThrM1 - ThrM3
+    x9 = p*r
+    x10 = p*q
+
+    out[0] = xdot
+    out[1] = ydot
+    out[2] = zdot
+    out[3] = -q*x1 - q1*x0 - r*x2
+    out[4] = -q*x2 + q0*x0 + r*x1
+    out[5] = q0*x3 - q1*x4 + q3*x0
+    out[6] = q0*x4 + q1*x3 - q2*x0
+    out[7] = x5*(-Cd*dragX + ThrTot*(2*q1*q3 + q2*x6))
+    out[8] = x5*(-Cd*dragY + ThrTot*(-q1*x6 + 2*q2*q3))
+    out[9] = x5*(-Cd*dragZ + ThrTot*(q0**2 - q1**2 - q2**2 + q3**2) - g*mB)
+    out[10] = (IByy*x7 - IBzz*x7 + IRzz*(q*wM1 - q*wM2 + q*wM3 - q*wM4) + dym*(-ThrM2 + ThrM4 + x8))/IBxx
+    out[11] = (-IBxx*x9 + IBzz*x9 + IRzz*(-p*wM1 + p*wM2 - p*wM3 + p*wM4) + dxm*(-ThrM2 + ThrM4 - x8))/IByy
+    out[12] = (IBxx*x10 - IByy*x10 + TorM1 - TorM2 + TorM3 - TorM4)/IBzz
+    out[13] = wdotM1
+    out[14] = wddotM1
+    out[15] = wdotM2
+    out[16] = wddotM2
+    out[17] = wdotM3
+    out[18] = wddotM3
+    out[19] = wdotM4
+    out[20] = wddotM4
+
+
+def stateDot_array(out, state, cmd, velW, qW1, qW2, prm):
+
+    x = state[0]
+    y = state[1]
+    z = state[2]
+    q0 = state[3]
+    q1 = state[4]
+    q2 = state[5]
+    q3 = state[6]
+    xdot = state[7]
+    ydot = state[8]
+    zdot = state[9]
+    p = state[10]
+    q = state[11]
+    r = state[12]
+    wM1 = state[13]
+    wdotM1 = state[14]
+    wM2 = state[15]
+    wdotM2 = state[16]
+    wM3 = state[17]
+    wdotM3 = state[18]
+    wM4 = state[19]
+    wdotM4 = state[20]
+    uM1 = cmd[0]
+    uM2 = cmd[1]
+    uM3 = cmd[2]
+    uM4 = cmd[3]
+    mB = prm[0]
+    g = prm[1]
+    dxm = prm[2]
+    dym = prm[3]
+    IBxx = prm[4]
+    IByy = prm[5]
+    IBzz = prm[6]
+    IRzz = prm[7]
+    Cd = prm[8]
+    kTh = prm[9]
+    kTo = prm[10]
+    kp = prm[11]
+    tau2 = prm[12]
+    m2dampTau = prm[13]
+    minWmotor = prm[14]
+    maxWmotor = prm[15]
+
+    # Motor Dynamics and Rotor forces (Second Order System: https://apmonitor.com/pdc/index.php/Main/SecondOrderSystems)
+    wddotM1 = (m2dampTau*wdotM1 - wM1 + kp*uM1)/tau2
+    wddotM2 = (m2dampTau*wdotM2 - wM2 + kp*uM2)/tau2
+    wddotM3 = (m2dampTau*wdotM3 - wM3 + kp*uM3)/tau2
+    wddotM4 = (m2dampTau*wdotM4 - wM4 + kp*uM4)/tau2
+    wMc1 = min(max(wM1, minWmotor), maxWmotor)
+    wMc2 = min(max(wM2, minWmotor), maxWmotor)
+    wMc3 = min(max(wM3, minWmotor), maxWmotor)
+    wMc4 = min(max(wM4, minWmotor), maxWmotor)
+    ThrM1 = kTh*wMc1*wMc1
+    ThrM2 = kTh*wMc2*wMc2
+    ThrM3 = kTh*wMc3*wMc3
+    ThrM4 = kTh*wMc4*wMc4
+    TorM1 = kTo*wMc1*wMc1
+    TorM2 = kTo*wMc2*wMc2
+    TorM3 = kTo*wMc3*wMc3
+    TorM4 = kTo*wMc4*wMc4
+    ThrTot = ThrM1 + ThrM2 + ThrM3 + ThrM4
+
+    # State Derivatives (from PyDy)
+    # Air velocity and aero drag
+    w0 = velW*cos(qW2)
+    airVx = -w0*cos(qW1) + xdot
+    airVy = -w0*sin(qW1) + ydot
+    airVz = velW*sin(qW2) + zdot
+    dragX = airVx*abs(airVx)
+    dragY = airVy*abs(airVy)
+    dragZ = airVz*abs(airVz)
+    x0 = 0.5*p
+    x1 = 0.5*q2
+    x2 = 0.5*q3
+    x3 = 0.5*q
+    x4 = 0.5*r
+    x5 = 1/mB
+    x6 = 2*q0
+    x7 = q*r
+    x8 = ThrM1 - ThrM3
+    x9 = p*r
+    x10 = p*q
+
+    out[0] = xdot
+    out[1] = ydot
+    out[2] = zdot
+    out[3] = -q*x1 - q1*x0 - r*x2
+    out[4] = -q*x2 + q0*x0 + r*x1
+    out[5] = q0*x3 - q1*x4 + q3*x0
+    out[6] = q0*x4 + q1*x3 - q2*x0
+    out[7] = x5*(-Cd*dragX + ThrTot*(2*q1*q3 + q2*x6))
+    out[8] = x5*(-Cd*dragY + ThrTot*(-q1*x6 + 2*q2*q3))
+    out[9] = x5*(-Cd*dragZ + ThrTot*(q0**2 - q1**2 - q2**2 + q3**2) - g*mB)
+    out[10] = (IByy*x7 - IBzz*x7 + IRzz*(q*wM1 - q*wM2 + q*wM3 - q*wM4) + dym*(-ThrM2 + ThrM4 + x8))/IBxx
+    out[11] = (-IBxx*x9 + IBzz*x9 + IRzz*(-p*wM1 + p*wM2 - p*wM3 + p*wM4) + dxm*(-ThrM2 + ThrM4 - x8))/IByy
+    out[12] = (IBxx*x10 - IByy*x10 + TorM1 - TorM2 + TorM3 - TorM4)/IBzz
+    out[13] = wdotM1
+    out[14] = wddotM1
+    out[15] = wdotM2
+    out[16] = wddotM2
+    out[17] = wdotM3
+    out[18] = wddotM3
+    out[19] = wdotM4
+    out[20] = wddotM4
+
+
+def stateDot_batch(out, state, cmd, velW, qW1, qW2, prm):
+
+    x = state[:,0]
+    y = state[:,1]
+    z = state[:,2]
+    q0 = state[:,3]
+    q1 = state[:,4]
+    q2 = state[:,5]
+    q3 = state[:,6]
+    xdot = state[:,7]
+    ydot = state[:,8]
+    zdot = state[:,9]
+    p = state[:,10]
+    q = state[:,11]
+    r = state[:,12]
+    wM1 = state[:,13]
+    wdotM1 = state[:,14]
+    wM2 = state[:,15]
+    wdotM2 = state[:,16]
+    wM3 = state[:,17]
+    wdotM3 = state[:,18]
+    wM4 = state[:,19]
+    wdotM4 = state[:,20]
+    uM1 = cmd[:,0]
+    uM2 = cmd[:,1]
+    uM3 = cmd[:,2]
+    uM4 = cmd[:,3]
+    mB = prm.mB
+    g = prm.g
+    dxm = prm.dxm
+    dym = prm.dym
+    IBxx = prm.IBxx
+    IByy = prm.IByy
+    IBzz = prm.IBzz
+    IRzz = prm.IRzz
+    Cd = prm.Cd
+    kTh = prm.kTh
+    kTo = prm.kTo
+    kp = prm.kp
+    tau2 = prm.tau2
+    m2dampTau = prm.m2dampTau
+    minWmotor = prm.minWmotor
+    maxWmotor = prm.maxWmotor
+
+    # Motor Dynamics and Rotor forces (Second Order System: https://apmonitor.com/pdc/index.php/Main/SecondOrderSystems)
+    wddotM1 = (m2dampTau*wdotM1 - wM1 + kp*uM1)/tau2
+    wddotM2 = (m2dampTau*wdotM2 - wM2 + kp*uM2)/tau2
+    wddotM3 = (m2dampTau*wdotM3 - wM3 + kp*uM3)/tau2
+    wddotM4 = (m2dampTau*wdotM4 - wM4 + kp*uM4)/tau2
+    wMc1 = np.clip(wM1, minWmotor, maxWmotor)
+    wMc2 = np.clip(wM2, minWmotor, maxWmotor)
+    wMc3 = np.clip(wM3, minWmotor, maxWmotor)
+    wMc4 = np.clip(wM4, minWmotor, maxWmotor)
+    ThrM1 = kTh*wMc1*wMc1
+    ThrM2 = kTh*wMc2*wMc2
+    ThrM3 = kTh*wMc3*wMc3
+    ThrM4 = kTh*wMc4*wMc4
+    TorM1 = kTo*wMc1*wMc1
+    TorM2 = kTo*wMc2*wMc2
+    TorM3 = kTo*wMc3*wMc3
+    TorM4 = kTo*wMc4*wMc4
+    ThrTot = ThrM1 + ThrM2 + ThrM3 + ThrM4
+
+    # State Derivatives (from PyDy)
+    # Air velocity and aero drag
+    w0 = velW*np.cos(qW2)
+    airVx = -w0*np.cos(qW1) + xdot
+    airVy = -w0*np.sin(qW1) + ydot
+    airVz = velW*np.sin(qW2) + zdot
+    dragX = airVx*abs(airVx)
+    dragY = airVy*abs(airVy)
+    dragZ = airVz*abs(airVz)
+    x0 = 0.5*p
+    x1 = 0.5*q2
+    x2 = 0.5*q3
+    x3 = 0.5*q
+    x4 = 0.5*r
+    x5 = 1/mB
+    x6 = 2*q0
+    x7 = q*r
+    x8 = ThrM1 - ThrM3
+    x9 = p*r
+    x10 = p*q
+
+    out[:,0] = xdot
+    out[:,1] = ydot
+    out[:,2] = zdot
+    out[:,3] = -q*x1 - q1*x0 - r*x2
+    out[:,4] = -q*x2 + q0*x0 + r*x1
+    out[:,5] = q0*x3 - q1*x4 + q3*x0
+    out[:,6] = q0*x4 + q1*x3 - q2*x0
+    out[:,7] = x5*(-Cd*dragX + ThrTot*(2*q1*q3 + q2*x6))
+    out[:,8] = x5*(-Cd*dragY + ThrTot*(-q1*x6 + 2*q2*q3))
+    out[:,9] = x5*(-Cd*dragZ + ThrTot*(q0**2 - q1**2 - q2**2 + q3**2) - g*mB)
+    out[:,10] = (IByy*x7 - IBzz*x7 + IRzz*(q*wM1 - q*wM2 + q*wM3 - q*wM4) + dym*(-ThrM2 + ThrM4 + x8))/IBxx
+    out[:,11] = (-IBxx*x9 + IBzz*x9 + IRzz*(-p*wM1 + p*wM2 - p*wM3 + p*wM4) + dxm*(-ThrM2 + ThrM4 - x8))/IByy
+    out[:,12] = (IBxx*x10 - IByy*x10 + TorM1 - TorM2 + TorM3 - TorM4)/IBzz
+    out[:,13] = wdotM1
+    out[:,14] = wddotM1
+    out[:,15] = wdotM2
+    out[:,16] = wddotM2
+    out[:,17] = wdotM3
+    out[:,18] = wddotM3
+    out[:,19] = wdotM4
+    out[:,20] = wddotM4
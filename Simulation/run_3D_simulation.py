@@ -16,6 +16,8 @@ from potentialField import PotField
 from ctrl import Control
 from quadFiles.quad import Quadcopter
 from utils.windModel import Wind
+from telemetry import Recorder
+import simJIT
 import utils
 import config
 
@@ -53,6 +55,27 @@ def main():
     Tf = 95
     ifsave = 0
 
+    # Animation export (ifsave): file (.mp4 or .gif with imageio, a folder of .png frames otherwise)
+    # and frames per second of simulation time
+    saveFile = "Videos/animation.mp4"
+    saveFPS = 30
+
+    # Telemetry directory (None for a temporary directory) and recording of 1 step out of decimation
+    telemetryDir = None
+    decimation = 1
+
+    # Choose integrator ("dopri5", "rk4" or "semi_implicit") and simulation step backend
+    # ---------------------------
+    cfg = config.SimConfig()
+    useJIT = cfg.useJIT
+    if (useJIT and not simJIT.numbaAvailable):
+        print("numba is not installed, using the NumPy simulation step.")
+        useJIT = False
+    if (useJIT):
+        integrator = "rk4"
+    else:
+        integrator = "dopri5"
+
     # Choose trajectory settings
     # --------------------------- 
     ctrlOptions = ["xyz_pos", "xy_vel_z_pos", "xyz_vel"]
@@ -61,6 +84,7 @@ def main():
     # Select Control Type             (0: xyz_pos,       1: xy_vel_z_pos,            2: xyz_vel)
     ctrlType = ctrlOptions[0]   
     # Select Position Trajectory Type (0: hover,         1: pos_waypoint_timed,      2: pos_waypoint_arrived
+    #                                  3: minimum velocity, 4: minimum accel,          5: minimum jerk,              6: minimum snap)
     trajSelect[0] = 2
     # Select Yaw Trajectory Type      (0: none,          1: yaw_waypoint_timed,      2: yaw_waypoint_interp,       3: zero,       4: Follow)
     trajSelect[1] = 4
@@ -70,14 +94,16 @@ def main():
 
     # Initialize Quadcopter, Controller, Wind, Result Matrixes
     # ---------------------------
-    quad = Quadcopter(Ti)
+    quad = Quadcopter(Ti, integrator, cfg)
     traj = Trajectory(quad, ctrlType, trajSelect)
     potfld = PotField(1)
     ctrl = Control(quad, traj.yawType)
     wind = Wind('None', 2.0, 90, -15)
 
-    # Trajectory for First Desired States
+    # Setpoint table of the whole run, for the time-based trajectories (the simulation loop
+    # then only reads the current row), and Trajectory for First Desired States
     # ---------------------------
+    traj.precompute(Ti, Ts, Tf)
     traj.desiredState(0, Ts, quad) 
 
     # First Potential Field Calculation
@@ -89,76 +115,56 @@ def main():
     # Generate First Commands
     # ---------------------------
     ctrl.controller(traj, quad, potfld, Ts)
+
+    # JIT simulation step (compiled at the first step, then cached by numba)
+    # ---------------------------
+    if (useJIT):
+        simStep = simJIT.SimJIT(quad, ctrl, wind, traj, potfld, Ts)
     
-    # Initialize Result Matrixes
+    # Initialize Telemetry (streamed to disk, in a temporary directory if telemetryDir is None)
     # ---------------------------
-    numTimeStep = int(Tf/Ts+1)
-
-    t_all          = np.zeros(numTimeStep)
-    s_all          = np.zeros([numTimeStep, len(quad.state)])
-    pos_all        = np.zeros([numTimeStep, len(quad.pos)])
-    vel_all        = np.zeros([numTimeStep, len(quad.vel)])
-    quat_all       = np.zeros([numTimeStep, len(quad.quat)])
-    omega_all      = np.zeros([numTimeStep, len(quad.omega)])
-    euler_all      = np.zeros([numTimeStep, len(quad.euler)])
-    sDes_traj_all  = np.zeros([numTimeStep, len(traj.sDes)])
-    sDes_calc_all  = np.zeros([numTimeStep, len(ctrl.sDesCalc)])
-    w_cmd_all      = np.zeros([numTimeStep, len(ctrl.w_cmd)])
-    wMotor_all     = np.zeros([numTimeStep, len(quad.wMotor)])
-    thr_all        = np.zeros([numTimeStep, len(quad.thr)])
-    tor_all        = np.zeros([numTimeStep, len(quad.tor)])
-    notInRange_all = np.zeros([numTimeStep, potfld.num_points], dtype=bool)
-    inRange_all    = np.zeros([numTimeStep, potfld.num_points], dtype=bool)
-    inField_all    = np.zeros([numTimeStep, potfld.num_points], dtype=bool)
-    minDist_all    = np.zeros(numTimeStep)
-
-    t_all[0]            = Ti
-    s_all[0,:]          = quad.state
-    pos_all[0,:]        = quad.pos
-    vel_all[0,:]        = quad.vel
-    quat_all[0,:]       = quad.quat
-    omega_all[0,:]      = quad.omega
-    euler_all[0,:]      = quad.euler
-    sDes_traj_all[0,:]  = traj.sDes
-    sDes_calc_all[0,:]  = ctrl.sDesCalc
-    w_cmd_all[0,:]      = ctrl.w_cmd
-    wMotor_all[0,:]     = quad.wMotor
-    thr_all[0,:]        = quad.thr
-    tor_all[0,:]        = quad.tor
-    notInRange_all[0,:] = potfld.notWithinRange
-    inRange_all[0,:]    = potfld.inRangeNotField
-    inField_all[0,:]    = potfld.withinField
-    minDist_all[0]      = potfld.distanceMin
+    # The point cloud masks are recorded as index lists of the points within range but not
+    # within field (inRange) and within field (inField), the points not within range are the rest.
+    rec = Recorder(telemetryDir, decimation)
+    rec.addChannel("t")
+    rec.addChannel("s",         len(quad.state))
+    rec.addChannel("pos",       len(quad.pos))
+    rec.addChannel("vel",       len(quad.vel))
+    rec.addChannel("quat",      len(quad.quat))
+    rec.addChannel("omega",     len(quad.omega))
+    rec.addChannel("euler",     len(quad.euler))
+    rec.addChannel("sDes_traj", len(traj.sDes))
+    rec.addChannel("sDes_calc", len(ctrl.sDesCalc))
+    rec.addChannel("w_cmd",     len(ctrl.w_cmd))
+    rec.addChannel("wMotor",    len(quad.wMotor))
+    rec.addChannel("thr",       len(quad.thr))
+    rec.addChannel("tor",       len(quad.tor))
+    rec.addChannel("minDist")
+    rec.addMaskChannel("inRange", potfld.num_points)
+    rec.addMaskChannel("inField", potfld.num_points)
+
+    def record(t):
+        rec.record({"t": t, "s": quad.state, "pos": quad.pos, "vel": quad.vel, "quat": quad.quat,
+                    "omega": quad.omega, "euler": quad.euler, "sDes_traj": traj.sDes, "sDes_calc": ctrl.sDesCalc,
+                    "w_cmd": ctrl.w_cmd, "wMotor": quad.wMotor, "thr": quad.thr, "tor": quad.tor,
+                    "minDist": potfld.distanceMin, "inRange": potfld.idx_inRangeNotField, "inField": potfld.idx_withinField})
+
+    record(Ti)
 
     # Run Simulation
     # ---------------------------
     t = Ti
-    i = 1
     while round(t,3) < Tf:
         
-        t = quad_sim(t, Ts, quad, ctrl, wind, traj, potfld)
+        if (useJIT):
+            t = simStep.step(t)
+        else:
+            t = quad_sim(t, Ts, quad, ctrl, wind, traj, potfld)
         
         # print("{:.3f}".format(t))
-        t_all[i]             = t
-        s_all[i,:]           = quad.state
-        pos_all[i,:]         = quad.pos
-        vel_all[i,:]         = quad.vel
-        quat_all[i,:]        = quad.quat
-        omega_all[i,:]       = quad.omega
-        euler_all[i,:]       = quad.euler
-        sDes_traj_all[i,:]   = traj.sDes
-        sDes_calc_all[i,:]   = ctrl.sDesCalc
-        w_cmd_all[i,:]       = ctrl.w_cmd
-        wMotor_all[i,:]      = quad.wMotor
-        thr_all[i,:]         = quad.thr
-        tor_all[i,:]         = quad.tor
-        notInRange_all[i,:]  = potfld.notWithinRange
-        inRange_all[i,:]     = potfld.inRangeNotField
-        inField_all[i,:]     = potfld.withinField
-        minDist_all[i]       = potfld.distanceMin
-
-        i += 1
+        record(t)
     
+    tel = rec.close()
     end_time = time.time()
     print("Simulated {:.2f}s in {:.6f}s.".format(t, end_time - start_time))
 
@@ -166,10 +172,15 @@ def main():
     # ---------------------------
 
     def figures():
-        utils.makeFigures(quad.params, t_all, pos_all, vel_all, quat_all, omega_all, euler_all, w_cmd_all, wMotor_all, thr_all, tor_all, sDes_traj_all, sDes_calc_all, potfld, minDist_all)
+        utils.makeFigures(quad.params, tel["t"], tel["pos"], tel["vel"], tel["quat"], tel["omega"], tel["euler"], tel["w_cmd"], tel["wMotor"], tel["thr"], tel["tor"], tel["sDes_traj"], tel["sDes_calc"], potfld, tel["minDist"])
         plt.show()
 
-    utils.third_PV_animation(t_all, traj.wps, pos_all, quat_all, euler_all, sDes_traj_all, Ts, quad.params, traj.xyzType, traj.yawType, potfld, notInRange_all, inRange_all, inField_all, ifsave, figures)
+    # The temporary telemetry directory is deleted once the animation and figures are closed
+    try:
+        utils.third_PV_animation(tel["t"], traj.wps, tel["pos"], tel["quat"], tel["euler"], tel["sDes_traj"], Ts, quad.params, traj.xyzType, traj.yawType, potfld, tel["inField"], ifsave, figures, saveFile, saveFPS)
+    finally:
+        if telemetryDir is None:
+            tel.delete()
     
 
 if __name__ == "__main__":
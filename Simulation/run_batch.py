@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Headless batch runs of scenario sweeps, one simulation per process (ProcessPoolExecutor).
+# A scenario is a dict of the settings of main() in run_3D_simulation.py that differ from
+# defaultScenario; every run returns a row of summary metrics and the rows are written to a
+# single CSV table.
+# Run from the repository root:
+#   python Simulation/run_batch.py scenarios.json [--workers N] [--out results.csv]
+# scenarios.json is a list of scenarios, or {"base": scenario, "sweep": {key: [values], ...}}
+# for all the combinations of the swept values on top of the base scenario, e.g.
+#   {"base": {"Tf": 60}, "sweep": {"wind": [["None"], ["Sine", 2.0, 90, -15]],
+#                                  "gains": [{}, {"pos_P_gain": [1.5, 1.5, 2.0]}]}}
+
+import csv
+import json
+import time
+import random
+import argparse
+import itertools
+import traceback
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from trajectory import Trajectory
+from potentialField import PotField
+from ctrl import Control, CtrlGains
+from quadFiles.quad import Quadcopter
+from utils.windModel import Wind, WindField
+from environmentGeneration.environment import windFieldFile
+from run_3D_simulation import quad_sim
+import simJIT
+import config
+
+deg2rad = np.pi/180.0
+rad2deg = 180.0/np.pi
+
+defaultScenario = {
+    "name":        "default",
+    "integrator":  None,          # "dopri5", "rk4" or "semi_implicit", or None as in main(): rk4 with useJIT, dopri5 otherwise
+    "useJIT":      False,
+    "Ts":          0.005,
+    "Tf":          95,
+    "ctrlType":    "xyz_pos",
+    "trajSelect":  [2, 4, 0],
+    "waypoints":   None,          # {"t": [s], "wp": [[m]], "yaw": [deg], "v_average": m/s} (with the initial waypoint), or None for waypoints.py
+    "wind":        ["None", 2.0, 90, -15],   # Wind() arguments, e.g. ["Dryden", 3.0, 90, -15, 1.5, 20, seed, Tf, 0.01] for turbulence
+    "gains":       {},            # CtrlGains() gains and limits to override, e.g. {"pos_P_gain": [1.5, 1.5, 2.0], "tiltMax": 0.3}
+    "orient":      None,          # config.SimConfig() settings, config.py's if None
+    "usePrecession": None,
+    "useWindDrag": None,
+    "environment": None,          # generated environment (generate_environment.py), or None for pointcloud_grid
+    "windField":   False,         # add the environment's wind field (generate_environment.py --wind-speed) to the wind
+    "rangeMargin": 0.5,
+    "seed":        0,             # seed of the random wind
+    "stopAtEnd":   True,          # stop the run when the last waypoint is reached
+}
+
+metricNames = ["name", "completed", "completion_time", "sim_time", "min_obstacle_dist", "max_tilt_deg",
+               "max_speed", "final_pos_error", "run_time", "error"]
+
+def makeScenario(scenario):
+    # Full scenario (missing settings from defaultScenario)
+    unknown = set(scenario) - set(defaultScenario)
+    if unknown:
+        raise Exception("Unknown scenario settings: {}.".format(", ".join(sorted(unknown))))
+    full = dict(defaultScenario)
+    full.update(scenario)
+    return full
+
+
+def expandSweep(base, sweep):
+    # Scenarios of all the combinations of the swept values
+    keys = list(sweep)
+    scenarios = []
+    for values in itertools.product(*(sweep[k] for k in keys)):
+        scenario = dict(base)
+        scenario.update(zip(keys, values))
+        scenario["name"] = "{}_{}".format(base.get("name", "run"), len(scenarios))
+        scenarios.append(scenario)
+    return scenarios
+
+
+def runScenario(scenario):
+    # Runs one scenario without display, returns its row of metrics (the error message,
+    # if the run failed, is in "error")
+    scenario = makeScenario(scenario)
+    row = dict.fromkeys(metricNames, np.nan)
+    row["name"] = scenario["name"]
+    row["error"] = ""
+    try:
+        row.update(simulate(scenario))
+    except Exception:
+        row["error"] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+    return row
+
+
+def simulate(s):
+    start_time = time.perf_counter()
+    random.seed(s["seed"])
+    np.random.seed(s["seed"])
+    cfg = config.SimConfig(s["orient"], s["usePrecession"], s["useWindDrag"], s["useJIT"])
+
+    Ti = 0
+    Ts = s["Ts"]
+    waypoints = None
+    if s["waypoints"] is not None:
+        wps = s["waypoints"]
+        waypoints = (np.array(wps["t"], dtype=float), np.array(wps["wp"], dtype=float),
+                     np.array(wps["yaw"], dtype=float)*deg2rad, wps["v_average"])
+
+    integrator = s["integrator"]
+    if integrator is None:
+        integrator = "rk4" if s["useJIT"] else "dopri5"
+
+    # Same setup as main() in run_3D_simulation.py
+    # ---------------------------
+    quad = Quadcopter(Ti, integrator, cfg)
+    traj = Trajectory(quad, s["ctrlType"], np.array(s["trajSelect"]), waypoints)
+    potfld = PotField(1, s["rangeMargin"], s["environment"])
+    ctrl = Control(quad, traj.yawType, CtrlGains(**s["gains"]))
+    wind = Wind(*s["wind"])
+    if s["windField"]:
+        if s["environment"] is None:
+            raise Exception("A wind field requires a generated environment.")
+        wind.setField(WindField.load(windFieldFile(s["environment"])))
+
+    traj.precompute(Ti, Ts, s["Tf"])
+    traj.desiredState(0, Ts, quad)
+    potfld.isWithinRange(quad)
+    potfld.isWithinField(quad)
+    potfld.rep_force(quad, traj)
+    ctrl.controller(traj, quad, potfld, Ts)
+    if (s["useJIT"]):
+        simStep = simJIT.SimJIT(quad, ctrl, wind, traj, potfld, Ts)
+
+    # Running metrics (the minimum distance is -1 when no point is within field)
+    minDist = np.inf
+    maxTilt = 0
+    maxSpeed = 0
+    completion_time = np.nan
+
+    t = Ti
+    while round(t,3) < s["Tf"]:
+        if (s["useJIT"]):
+            t = simStep.step(t)
+        else:
+            t = quad_sim(t, Ts, quad, ctrl, wind, traj, potfld)
+        if (potfld.distanceMin >= 0):
+            minDist = min(minDist, potfld.distanceMin)
+        maxTilt = max(maxTilt, np.arccos(np.clip(np.cos(quad.euler[0])*np.cos(quad.euler[1]), -1, 1)))
+        maxSpeed = max(maxSpeed, np.sqrt(quad.vel[0]**2 + quad.vel[1]**2 + quad.vel[2]**2))
+        if traj.end_reached and np.isnan(completion_time):
+            completion_time = t
+            if s["stopAtEnd"]:
+                break
+
+    return {"completed": bool(traj.end_reached),
+            "completion_time": completion_time,
+            "sim_time": t,
+            "min_obstacle_dist": minDist,
+            "max_tilt_deg": maxTilt*rad2deg,
+            "max_speed": maxSpeed,
+            "final_pos_error": np.linalg.norm(quad.pos - traj.wps[-1]),
+            "run_time": time.perf_counter() - start_time}
+
+
+def runBatch(scenarios, maxWorkers=None, callback=None):
+    # Runs the scenarios over a process pool (one simulation per core by default), returns
+    # their rows in the same order. callback(row) is called as the runs finish.
+    rows = [None]*len(scenarios)
+    with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = {executor.submit(runScenario, scenario): i for (i, scenario) in enumerate(scenarios)}
+        for future in as_completed(futures):
+            row = future.result()
+            rows[futures[future]] = row
+            if callback is not None:
+                callback(row)
+    return rows
+
+
+def writeTable(rows, file):
+    with open(file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=metricNames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def loadScenarios(file):
+    with open(file) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return expandSweep(data.get("base", {}), data.get("sweep", {}))
+    for (i, scenario) in enumerate(data):
+        scenario.setdefault("name", "run_{}".format(i))
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scenarios headless over a process pool and write their metrics to a CSV table.")
+    parser.add_argument("scenarios", nargs="?", help="scenario file (JSON), the default scenario if omitted")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: number of cores)")
+    parser.add_argument("--out", default="batch_results.csv", help="CSV table of the results (default: batch_results.csv)")
+    args = parser.parse_args()
+
+    scenarios = loadScenarios(args.scenarios) if args.scenarios else [{}]
+    for scenario in scenarios:
+        makeScenario(scenario)  # Invalid settings are reported before any run
+
+    start_time = time.time()
+    numDone = [0]
+    def progress(row):
+        numDone[0] += 1
+        status = row["error"] if row["error"] else "min dist {:.3f}m, max tilt {:.1f}°".format(row["min_obstacle_dist"], row["max_tilt_deg"])
+        print("[{}/{}] {}: {}".format(numDone[0], len(scenarios), row["name"], status))
+
+    rows = runBatch(scenarios, args.workers, progress)
+    writeTable(rows, args.out)
+    print("Ran {} scenarios in {:.1f}s, results in {}".format(len(scenarios), time.time() - start_time, args.out))
+
+
+if __name__ == "__main__":
+    if (config.orient == "NED" or config.orient == "ENU"):
+        main()
+    else:
+        raise Exception("{} is not a valid orientation. Verify config.py file.".format(config.orient))
@@ -0,0 +1,936 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# JIT-compiled (numba) version of quad_sim() in run_3D_simulation.py.
+# The whole inner step (Quadcopter.update, Trajectory.desiredState, the PotField methods,
+# Control.controller and the mixer) runs as one compiled function on plain arrays.
+# Every operation is done in the same order as in the NumPy code (including NumPy's pairwise
+# summation), so both backends produce the same trajectories up to floating point round-off
+# of the BLAS products.
+#
+# SimJIT makes the arrays of the Quadcopter, Trajectory, PotField and Control objects views
+# of (or the same arrays as) the packed arrays used by the compiled step, and writes the
+# scalar attributes back after every step, so the objects can be read as usual.
+# The PotField index arrays (idx_withinRange, idx_withinField and idx_inRangeNotField) are
+# rebuilt after every step from the points within range of the compiled step.
+# Not updated in JIT mode: the Quadcopter integrator object, and the PotField candidates,
+# fieldPointcloud and fieldDistance.
+#
+# Supported: "rk4" and "semi_implicit" integrators, all control types, position trajectories
+# 0 (hover), 1 (pos_waypoint_timed) and 2 (pos_waypoint_arrived), all yaw trajectories.
+
+import numpy as np
+from math import sin, cos, tan, sqrt, atan2, asin, acos, copysign
+
+from quadFiles.stateDotKernels import loadKernels, numbaKernel
+from quadFiles.quad import idx_vel
+
+try:
+    from numba import njit
+    numbaAvailable = True
+except ImportError:
+    numbaAvailable = False
+
+
+def jit(f):
+    if numbaAvailable:
+        return njit(cache=True)(f)
+    return f
+
+
+ctrlTypeOptions = ["xyz_pos", "xy_vel_z_pos", "xyz_vel"]
+integratorCodes = {"rk4": 0, "semi_implicit": 1}
+
+
+# State derivative kernels
+# ---------------------------
+# All the compiled kernels are module globals, selected by kernelCode in the compiled step.
+# (A kernel passed as an argument would make numba recompile the step in every new process.)
+kernelOptions = [(orient, usePrecession, useWindDrag) for orient in ["NED", "ENU"] for usePrecession in [False, True] for useWindDrag in [False, True]]
+if numbaAvailable:
+    stateDot0, stateDot1, stateDot2, stateDot3, stateDot4, stateDot5, stateDot6, stateDot7 = [numbaKernel(loadKernels(*k)) for k in kernelOptions]
+
+@jit
+def stateDot(kernelCode, out, state, cmd, velW, qW1, qW2, prm):
+    if (kernelCode == 0):
+        stateDot0(out, state, cmd, velW, qW1, qW2, prm)
+    elif (kernelCode == 1):
+        stateDot1(out, state, cmd, velW, qW1, qW2, prm)
+    elif (kernelCode == 2):
+        stateDot2(out, state, cmd, velW, qW1, qW2, prm)
+    elif (kernelCode == 3):
+        stateDot3(out, state, cmd, velW, qW1, qW2, prm)
+    elif (kernelCode == 4):
+        stateDot4(out, state, cmd, velW, qW1, qW2, prm)
+    elif (kernelCode == 5):
+        stateDot5(out, state, cmd, velW, qW1, qW2, prm)
+    elif (kernelCode == 6):
+        stateDot6(out, state, cmd, velW, qW1, qW2, prm)
+    else:
+        stateDot7(out, state, cmd, velW, qW1, qW2, prm)
+
+
+# Small helpers
+# ---------------------------
+@jit
+def sign(x):
+    if (x > 0.0):
+        return 1.0
+    elif (x < 0.0):
+        return -1.0
+    return 0.0
+
+@jit
+def clip(x, lo, hi):
+    return min(max(x, lo), hi)
+
+@jit
+def norm3(x0, x1, x2):
+    return sqrt(x0*x0 + x1*x1 + x2*x2)
+
+@jit
+def quatToEuler(q0, q1, q2, q3, euler):
+    # Same as utils.quatToYPR_ZYX (pitch sine clipped to [-1, 1]), as euler = phi, theta, psi
+    euler[2] = atan2(2.0*(q1*q2 + q0*q3), q0*q0 + q1*q1 - q2*q2 - q3*q3)
+    euler[1] = asin(clip(-2.0*(q1*q3 - q0*q2), -1.0, 1.0))
+    euler[0] = atan2(2.0*(q2*q3 + q0*q1), q0*q0 - q1*q1 - q2*q2 + q3*q3)
+
+@jit
+def quatMultiply(q, p, out):
+    out[0] = q[0]*p[0] - q[1]*p[1] - q[2]*p[2] - q[3]*p[3]
+    out[1] = q[1]*p[0] + q[0]*p[1] - q[3]*p[2] + q[2]*p[3]
+    out[2] = q[2]*p[0] + q[3]*p[1] + q[0]*p[2] - q[1]*p[3]
+    out[3] = q[3]*p[0] - q[2]*p[1] + q[1]*p[2] + q[0]*p[3]
+
+@jit
+def quatInverse(q, out):
+    n = sqrt(q[0]*q[0] + q[1]*q[1] + q[2]*q[2] + q[3]*q[3])
+    out[0] =  q[0]/n
+    out[1] = -q[1]/n
+    out[2] = -q[2]/n
+    out[3] = -q[3]/n
+
+@jit
+def pairwiseSum(a, lo, n):
+    # Same summation order as NumPy's pairwise sum (np.sum of a contiguous array)
+    if (n < 8):
+        res = 0.0
+        for i in range(lo, lo + n):
+            res += a[i]
+        return res
+    elif (n <= 128):
+        r0 = a[lo]
+        r1 = a[lo+1]
+        r2 = a[lo+2]
+        r3 = a[lo+3]
+        r4 = a[lo+4]
+        r5 = a[lo+5]
+        r6 = a[lo+6]
+        r7 = a[lo+7]
+        i = 8
+        while (i < n - (n % 8)):
+            r0 += a[lo+i]
+            r1 += a[lo+i+1]
+            r2 += a[lo+i+2]
+            r3 += a[lo+i+3]
+            r4 += a[lo+i+4]
+            r5 += a[lo+i+5]
+            r6 += a[lo+i+6]
+            r7 += a[lo+i+7]
+            i += 8
+        res = ((r0 + r1) + (r2 + r3)) + ((r4 + r5) + (r6 + r7))
+        while (i < n):
+            res += a[lo+i]
+            i += 1
+        return res
+    else:
+        n2 = n//2
+        n2 -= n2 % 8
+        return pairwiseSum(a, lo, n2) + pairwiseSum(a, lo + n2, n - n2)
+
+@jit
+def npSum(a, n):
+    # np.sum(a[:n]), NumPy reduces in buffers of 8192 elements
+    res = 0.0
+    lo = 0
+    while (lo < n):
+        m = min(8192, n - lo)
+        res += pairwiseSum(a, lo, m)
+        lo += m
+    return res
+
+
+# Wind (same as Wind.randomWind)
+# ---------------------------
+# (with a lookup table, windPrm[25:27] = [tableDt, number of samples], followed by the table rows)
+def windToArray(wind):
+    windPrm = np.zeros(25)
+    windPrm[1:4] = [wind.velW_med, wind.qW1_med, wind.qW2_med]
+    if (wind.table is not None):
+        windPrm[0] = 2
+        windPrm = np.concatenate((windPrm, [wind.tableDt, wind.table.shape[1]], wind.table.ravel()))
+    elif (wind.windType == 'SINE') or (wind.windType == 'RANDOMSINE'):
+        windPrm[0] = 1
+        windPrm[4:13]  = [wind.velW_a1, wind.velW_f1, wind.velW_d1, wind.velW_a2, wind.velW_f2, wind.velW_d2, wind.velW_a3, wind.velW_f3, wind.velW_d3]
+        windPrm[13:19] = [wind.qW1_a1, wind.qW1_f1, wind.qW1_d1, wind.qW1_a2, wind.qW1_f2, wind.qW1_d2]
+        windPrm[19:25] = [wind.qW2_a1, wind.qW2_f1, wind.qW2_d1, wind.qW2_a2, wind.qW2_f2, wind.qW2_d2]
+    return windPrm
+
+@jit
+def windAt(t, w):
+    if (w[0] == 2):
+        # Same as Wind.tableWind
+        n = int(w[26])
+        x = t/w[25]
+        if (x <= 0):
+            i = 0
+            f = 0.0
+        elif (int(x) >= n - 1):
+            i = n - 2
+            f = 1.0
+        else:
+            i = int(x)
+            f = x - i
+        velW = w[27 + i] + (w[28 + i] - w[27 + i])*f
+        qW1  = w[27 + n + i] + (w[28 + n + i] - w[27 + n + i])*f
+        qW2  = w[27 + 2*n + i] + (w[28 + 2*n + i] - w[27 + 2*n + i])*f
+    elif (w[0] == 1):
+        velW = w[4]*sin(w[5]*t - w[6]) + w[7]*sin(w[8]*t - w[9]) + w[10]*sin(w[11]*t - w[12]) + w[1]
+        qW1  = w[13]*sin(w[14]*t - w[15]) + w[16]*sin(w[17]*t - w[18]) + w[2]
+        qW2  = w[19]*sin(w[20]*t - w[21]) + w[22]*sin(w[23]*t - w[24]) + w[3]
+        velW = max(0.0, velW)
+    else:
+        velW = w[1]
+        qW1  = w[2]
+        qW2  = w[3]
+    return velW, qW1, qW2
+
+
+# Quadcopter.update
+# ---------------------------
+@jit
+def quadUpdate(t, Ts, s, sdot, k1, k2, k3, ytmp, intState, integrType, isVel,
+               vel_dot, omega_dot, dcm, euler, wMotor, thr, tor, cmd, kernelCode, prm, windPrm):
+
+    prev_vel0 = s[7]
+    prev_vel1 = s[8]
+    prev_vel2 = s[9]
+    prev_omega0 = s[10]
+    prev_omega1 = s[11]
+    prev_omega2 = s[12]
+
+    t0 = intState[0]
+    h = t - t0
+    if (h != 0):
+        if (integrType == 0):
+            # RK4 (same as integrators.RK4)
+            velW, qW1, qW2 = windAt(t0, windPrm)
+            stateDot(kernelCode, k1, s, cmd, velW, qW1, qW2, prm)
+            for i in range(21):
+                ytmp[i] = k1[i]*(h/2) + s[i]
+            velW, qW1, qW2 = windAt(t0 + h/2, windPrm)
+            stateDot(kernelCode, k2, ytmp, cmd, velW, qW1, qW2, prm)
+            for i in range(21):
+                ytmp[i] = k2[i]*(h/2) + s[i]
+            stateDot(kernelCode, k3, ytmp, cmd, velW, qW1, qW2, prm)
+            for i in range(21):
+                ytmp[i] = k3[i]*h + s[i]
+            velW, qW1, qW2 = windAt(t0 + h, windPrm)
+            stateDot(kernelCode, sdot, ytmp, cmd, velW, qW1, qW2, prm)
+            for i in range(21):
+                s[i] = s[i] + ((((k2[i] + k3[i])*2 + k1[i]) + sdot[i])*(h/6))
+        else:
+            # Semi-implicit Euler (same as integrators.SemiImplicitEuler)
+            velW, qW1, qW2 = windAt(t0, windPrm)
+            stateDot(kernelCode, k1, s, cmd, velW, qW1, qW2, prm)
+            for i in range(21):
+                if isVel[i]:
+                    s[i] += h*k1[i]
+            velW, qW1, qW2 = windAt(t, windPrm)
+            stateDot(kernelCode, sdot, s, cmd, velW, qW1, qW2, prm)
+            for i in range(21):
+                if not isVel[i]:
+                    s[i] += h*sdot[i]
+        intState[0] = t
+
+    wMotor[0] = s[13]
+    wMotor[1] = s[15]
+    wMotor[2] = s[17]
+    wMotor[3] = s[19]
+
+    vel_dot[0] = (s[7] - prev_vel0)/Ts
+    vel_dot[1] = (s[8] - prev_vel1)/Ts
+    vel_dot[2] = (s[9] - prev_vel2)/Ts
+    omega_dot[0] = (s[10] - prev_omega0)/Ts
+    omega_dot[1] = (s[11] - prev_omega1)/Ts
+    omega_dot[2] = (s[12] - prev_omega2)/Ts
+
+    # Extended state (same as utils.quat2Dcm and utils.quatToYPR_ZYX)
+    q0 = s[3]
+    q1 = s[4]
+    q2 = s[5]
+    q3 = s[6]
+    dcm[0,0] = q0*q0 + q1*q1 - q2*q2 - q3*q3
+    dcm[0,1] = 2.0*(q1*q2 - q0*q3)
+    dcm[0,2] = 2.0*(q1*q3 + q0*q2)
+    dcm[1,0] = 2.0*(q1*q2 + q0*q3)
+    dcm[1,1] = q0*q0 - q1*q1 + q2*q2 - q3*q3
+    dcm[1,2] = 2.0*(q2*q3 - q0*q1)
+    dcm[2,0] = 2.0*(q1*q3 - q0*q2)
+    dcm[2,1] = 2.0*(q2*q3 + q0*q1)
+    dcm[2,2] = q0*q0 - q1*q1 - q2*q2 + q3*q3
+    quatToEuler(q0, q1, q2, q3, euler)
+
+    # Forces
+    kTh = prm[-2]
+    kTo = prm[-1]
+    for i in range(4):
+        thr[i] = kTh*wMotor[i]*wMotor[i]
+        tor[i] = kTo*wMotor[i]*wMotor[i]
+
+
+# Trajectory.desiredState (position and yaw waypoints)
+# ---------------------------
+@jit
+def desiredState(t, Ts, pos, sDes, trajI, trajF, trajPrm, t_wps, wps, y_wps, T_segment):
+
+    # trajI : t_idx, arrived, end_reached, omit_yaw_follow
+    # trajF : timeStartNext, current_heading
+    ctrlType = trajPrm[0]
+    xyzType  = trajPrm[1]
+    yawType  = trajPrm[2]
+    if not (ctrlType == 0) or (xyzType == 0):
+        return
+
+    if (xyzType == 1):
+        # pos_waypoint_timed
+        if (t == 0):
+            trajI[0] = 0
+        elif (t >= t_wps[-1]):
+            trajI[0] = -1
+        else:
+            i = 0
+            while not (t <= t_wps[i]):
+                i += 1
+            trajI[0] = i - 1
+
+    elif (xyzType == 2):
+        # pos_waypoint_arrived
+        dist_consider_arrived = 0.4 # Distance to waypoint that is considered as "arrived"
+        time_wait = 2               # Time to wait after arriving at waypoint before setting new waypoint
+
+        if (t == 0):
+            trajI[0] = 0
+            trajI[2] = 0
+            trajI[1] = 1
+            trajF[0] = 0
+        elif not (trajI[2]):
+            t_idx = trajI[0]
+            distance_to_next_wp = ((wps[t_idx,0]-pos[0])**2 + (wps[t_idx,1]-pos[1])**2 + (wps[t_idx,2]-pos[2])**2)**(0.5)
+            if (trajI[1] == 0) and (distance_to_next_wp < dist_consider_arrived):
+                trajI[1] = 1
+                trajI[3] = 1
+                trajF[0] = t + time_wait
+            if (trajI[1] == 1):
+                if (t >= trajF[0]):
+                    trajI[1] = 0
+                    trajI[3] = 0
+                    trajI[0] += 1
+                    if (trajI[0] >= wps.shape[0]):
+                        trajI[2] = 1
+                        trajI[0] = -1
+
+    t_idx = trajI[0]
+    desYaw = 0.0
+    desYawRate = 0.0
+    if (yawType == 1):
+        desYaw = y_wps[t_idx]
+    elif (yawType == 2):
+        if (t == 0) or (t >= t_wps[-1]):
+            desYaw = y_wps[t_idx]
+        else:
+            scale = (t - t_wps[t_idx])/T_segment[t_idx]
+            desYaw = (1 - scale)*y_wps[t_idx] + scale*y_wps[t_idx + 1]
+            desYawRate = (desYaw - trajF[1]) / Ts
+            trajF[1] = desYaw
+
+    for i in range(19):
+        sDes[i] = 0.0
+    sDes[0] = wps[t_idx,0]
+    sDes[1] = wps[t_idx,1]
+    sDes[2] = wps[t_idx,2]
+    sDes[14] = desYaw
+    sDes[18] = desYawRate
+
+
+# PotField.isWithinRange, isWithinField and rep_force
+# ---------------------------
+@jit
+def gridQueryBox(x, y, z, halfSize, pcx, pcy, pcz, gridPrm, numCells, cellStart, pointIdx, idx):
+    # Same as GridIndex.queryBox (spatialIndex.py), writes the sorted indexes in idx and returns their number
+    nx = numCells[0]
+    ny = numCells[1]
+    i0 = max(int(np.floor((x - halfSize - 1e-6*gridPrm[3] - gridPrm[0])/gridPrm[3])), 0)
+    i1 = min(int(np.floor((x + halfSize + 1e-6*gridPrm[3] - gridPrm[0])/gridPrm[3])), numCells[0] - 1)
+    j0 = max(int(np.floor((y - halfSize - 1e-6*gridPrm[4] - gridPrm[1])/gridPrm[4])), 0)
+    j1 = min(int(np.floor((y + halfSize + 1e-6*gridPrm[4] - gridPrm[1])/gridPrm[4])), numCells[1] - 1)
+    k0 = max(int(np.floor((z - halfSize - 1e-6*gridPrm[5] - gridPrm[2])/gridPrm[5])), 0)
+    k1 = min(int(np.floor((z + halfSize + 1e-6*gridPrm[5] - gridPrm[2])/gridPrm[5])), numCells[2] - 1)
+    n = 0
+    if (i0 > i1):
+        return n
+    for k in range(k0, k1+1):
+        for j in range(j0, j1+1):
+            start = cellStart[(k*ny + j)*nx + i0]
+            end = cellStart[(k*ny + j)*nx + i1 + 1]
+            for m in range(start, end):
+                i = pointIdx[m]
+                if (abs(x - pcx[i]) <= halfSize) & (abs(y - pcy[i]) <= halfSize) & (abs(z - pcz[i]) <= halfSize):
+                    idx[n] = i
+                    n += 1
+    idx[:n].sort()
+    return n
+
+@jit
+def potentialField(pos, sDes, pcT, withinRange, notWithinRange, withinField, inRangeNotField,
+                   F_rep, work, idxWork, potPrm, potI, gridPrm, numCells, cellStart, pointIdx):
+
+    rangeRadius = potPrm[0]
+    fieldRadius = potPrm[1]
+    x = pos[0]
+    y = pos[1]
+    z = pos[2]
+
+    target0 = sDes[0] - x
+    target1 = sDes[1] - y
+    target2 = sDes[2] - z
+    target_norm = norm3(target0, target1, target2)
+    useInfluence = abs(target_norm) > 0.000001
+
+    # Only the mask entries of the points within the range at the previous step
+    # (idxWork[:potI[0]]) and at this step are updated
+    pcx = pcT[0]
+    pcy = pcT[1]
+    pcz = pcT[2]
+    for j in range(potI[0]):
+        i = idxWork[j]
+        withinRange[i] = False
+        notWithinRange[i] = True
+        withinField[i] = False
+        inRangeNotField[i] = False
+
+    # Points within the range, from the grid index of the point cloud
+    numRange = gridQueryBox(x, y, z, rangeRadius, pcx, pcy, pcz, gridPrm, numCells, cellStart, pointIdx, idxWork)
+    potI[0] = numRange
+    for j in range(numRange):
+        i = idxWork[j]
+        withinRange[i] = True
+        notWithinRange[i] = False
+
+    # Distances and repulsive force of the points within the range
+    k = 0.4
+    distanceMin = np.inf
+    numField = 0
+    for j in range(numRange):
+        i = idxWork[j]
+        px = pcx[i]
+        py = pcy[i]
+        pz = pcz[i]
+        dx = px - x
+        dy = py - y
+        dz = pz - z
+        d = sqrt(dx*dx + dy*dy + dz*dz)
+        distanceMin = min(distanceMin, d)
+        if (d <= fieldRadius):
+            withinField[i] = True
+            c = k*(1/d - 1/fieldRadius)*(1/(d*d))
+            Fx = c*(x - px)/d
+            Fy = c*(y - py)/d
+            Fz = c*(z - pz)/d
+            if useInfluence:
+                influence = (dx*target0 + dy*target1 + dz*target2)/(d*target_norm)
+                influence = abs(influence*influence)
+                Fx = Fx*influence
+                Fy = Fy*influence
+                Fz = Fz*influence
+            work[0,numField] = Fx
+            work[1,numField] = Fy
+            work[2,numField] = Fz
+            numField += 1
+        else:
+            inRangeNotField[i] = True
+
+    F_rep[0] = npSum(work[0], numField)
+    F_rep[1] = npSum(work[1], numField)
+    F_rep[2] = npSum(work[2], numField)
+
+    if (numRange == 0):
+        return -1.0
+    return distanceMin
+
+
+# Control.controller and utils.mixerFM
+# ---------------------------
+@jit
+def saturateVel(vel_sp, velMax, velMaxAll, separately):
+    if separately:
+        for i in range(3):
+            vel_sp[i] = clip(vel_sp[i], -velMax[i], velMax[i])
+    else:
+        totalVel_sp = norm3(vel_sp[0], vel_sp[1], vel_sp[2])
+        if (totalVel_sp > velMaxAll):
+            for i in range(3):
+                vel_sp[i] = vel_sp[i]/totalVel_sp*velMaxAll
+
+@jit
+def rotToQuat(R11, R12, R13, R21, R22, R23, R31, R32, R33, q):
+    # Same as utils.RotToQuat
+    tr = R11 + R22 + R33
+    if tr > R11 and tr > R22 and tr > R33:
+        e0 = 0.5 * sqrt(1 + tr)
+        r = 0.25 / e0
+        e1 = (R32 - R23) * r
+        e2 = (R13 - R31) * r
+        e3 = (R21 - R12) * r
+    elif R11 > R22 and R11 > R33:
+        e1 = 0.5 * sqrt(1 - tr + 2*R11)
+        r = 0.25 / e1
+        e0 = (R32 - R23) * r
+        e2 = (R12 + R21) * r
+        e3 = (R13 + R31) * r
+    elif R22 > R33:
+        e2 = 0.5 * sqrt(1 - tr + 2*R22)
+        r = 0.25 / e2
+        e0 = (R13 - R31) * r
+        e1 = (R12 + R21) * r
+        e3 = (R23 + R32) * r
+    else:
+        e3 = 0.5 * sqrt(1 - tr + 2*R33)
+        r = 0.25 / e3
+        e0 = (R21 - R12) * r
+        e1 = (R13 + R31) * r
+        e2 = (R23 + R32) * r
+    # Positive scalar part (as utils.RotToQuat, also at e0 = 0), then normalize
+    sgn = copysign(1.0, e0)
+    e0 = e0*sgn
+    e1 = e1*sgn
+    e2 = e2*sgn
+    e3 = e3*sgn
+    n = sqrt(e0**2 + e1**2 + e2**2 + e3**2)
+    q[0] = e0/n
+    q[1] = e1/n
+    q[2] = e2/n
+    q[3] = e3/n
+
+@jit
+def controller(Ts, s, vel_dot, omega_dot, dcm, sDes, trajI, trajF, trajPrm, F_rep,
+               ctrlVec, ctrlQuat, ctrlS, gains, ctrlPrm, mixerFMinv, w_cmd, sDesCalc, qtmp):
+
+    pos   = s[0:3]
+    quat  = s[3:7]
+    vel   = s[7:10]
+    omega = s[10:13]
+
+    pos_sp        = ctrlVec[0]
+    vel_sp        = ctrlVec[1]
+    acc_sp        = ctrlVec[2]
+    thrust_sp     = ctrlVec[3]
+    thrust_rep_sp = ctrlVec[4]
+    eul_sp        = ctrlVec[5]
+    pqr_sp        = ctrlVec[6]
+    rate_sp       = ctrlVec[7]
+    rateCtrl      = ctrlVec[8]
+    thr_int       = ctrlVec[9]
+    qd_full = ctrlQuat[0]
+    qd_red  = ctrlQuat[1]
+    qd      = ctrlQuat[2]
+    qe      = ctrlQuat[3]
+
+    pos_P_gain  = gains[0]
+    vel_P_gain  = gains[1]
+    vel_D_gain  = gains[2]
+    vel_I_gain  = gains[3]
+    att_P_gain  = gains[4]
+    rate_P_gain = gains[5]
+    rate_D_gain = gains[6]
+    velMax      = gains[7]
+    rateMax     = gains[8]
+
+    velMaxAll    = ctrlPrm[0]
+    tiltMax      = ctrlPrm[1]
+    yaw_w        = ctrlPrm[2]
+    mB           = ctrlPrm[3]
+    g            = ctrlPrm[4]
+    minThr       = ctrlPrm[5]
+    maxThr       = ctrlPrm[6]
+    useIntergral = ctrlPrm[7]
+    separately   = ctrlPrm[8] != 0
+    minWmotor    = ctrlPrm[9]
+    maxWmotor    = ctrlPrm[10]
+    pfVel        = ctrlPrm[11]
+    pfSatFor     = ctrlPrm[12]
+    pfFor        = ctrlPrm[13]
+    isENU        = ctrlPrm[14] != 0
+
+    ctrlType = trajPrm[0]
+    yawType  = trajPrm[2]
+
+    # Desired State
+    # ---------------------------
+    for i in range(3):
+        pos_sp[i]    = sDes[i]
+        vel_sp[i]    = sDes[3+i]
+        acc_sp[i]    = sDes[6+i]
+        thrust_sp[i] = sDes[9+i]
+        eul_sp[i]    = sDes[12+i]
+        pqr_sp[i]    = sDes[15+i]
+    yawFF = sDes[18]
+
+    # Position Control (xyz_pos, xy_vel_z_pos)
+    # ---------------------------
+    if (ctrlType == 0) or (ctrlType == 1):
+        vel_sp[2] += pos_P_gain[2]*(pos_sp[2] - pos[2])
+    if (ctrlType == 0):
+        vel_sp[0] += pos_P_gain[0]*(pos_sp[0] - pos[0])
+        vel_sp[1] += pos_P_gain[1]*(pos_sp[1] - pos[1])
+    saturateVel(vel_sp, velMax, velMaxAll, separately)
+
+    if (ctrlType == 0):
+        # Add repulsive force "velocity" to velocity setpoint
+        for i in range(3):
+            vel_sp[i] += pfVel*F_rep[i]
+        saturateVel(vel_sp, velMax, velMaxAll, separately)
+
+        # Yaw follow
+        if (yawType == 4 and trajI[3] == 0):
+            totalVel_sp = norm3(vel_sp[0], vel_sp[1], vel_sp[2])
+            if (totalVel_sp > 0.1):
+                eul_sp[2] = atan2(vel_sp[1], vel_sp[0])
+                current_heading = trajF[1]
+                if ((sign(eul_sp[2]) - sign(current_heading)) != 0 and abs(eul_sp[2]-current_heading) >= 2*np.pi-0.1):
+                    current_heading = current_heading + sign(eul_sp[2])*2*np.pi
+                delta_psi = eul_sp[2] - current_heading
+                yawFF = delta_psi / Ts
+                trajF[1] = eul_sp[2]
+
+    # Z Velocity Control (Thrust in D-direction)
+    # ---------------------------
+    vel_z_error = vel_sp[2] - vel[2]
+    if isENU:
+        thrust_z_sp = (vel_P_gain[2]*vel_z_error - vel_D_gain[2]*vel_dot[2] +
+                       mB*(acc_sp[2] + g) + thr_int[2] + pfSatFor*F_rep[2])
+        uMax = maxThr
+        uMin = minThr
+    else:
+        thrust_z_sp = (vel_P_gain[2]*vel_z_error - vel_D_gain[2]*vel_dot[2] +
+                       mB*(acc_sp[2] - g) + thr_int[2] + pfSatFor*F_rep[2])
+        uMax = -minThr
+        uMin = -maxThr
+    stop_int_D = (thrust_z_sp >= uMax and vel_z_error >= 0.0) or (thrust_z_sp <= uMin and vel_z_error <= 0.0)
+    if not (stop_int_D):
+        thr_int[2] += vel_I_gain[2]*vel_z_error*Ts * useIntergral
+        thr_int[2] = min(abs(thr_int[2]), maxThr)*sign(thr_int[2])
+    thrust_sp[2] = clip(thrust_z_sp, uMin, uMax)
+
+    # XY Velocity Control (Thrust in NE-direction)
+    # ---------------------------
+    vel_x_error = vel_sp[0] - vel[0]
+    vel_y_error = vel_sp[1] - vel[1]
+    thrust_x_sp = (vel_P_gain[0]*vel_x_error - vel_D_gain[0]*vel_dot[0] +
+                   mB*(acc_sp[0]) + thr_int[0] + pfSatFor*F_rep[0])
+    thrust_y_sp = (vel_P_gain[1]*vel_y_error - vel_D_gain[1]*vel_dot[1] +
+                   mB*(acc_sp[1]) + thr_int[1] + pfSatFor*F_rep[1])
+    thrust_max_xy_tilt = abs(thrust_sp[2])*tan(tiltMax)
+    thrust_max_xy = sqrt(maxThr**2 - thrust_sp[2]**2)
+    thrust_max_xy = min(thrust_max_xy, thrust_max_xy_tilt)
+    thrust_sp[0] = thrust_x_sp
+    thrust_sp[1] = thrust_y_sp
+    if (thrust_x_sp*thrust_x_sp + thrust_y_sp*thrust_y_sp > thrust_max_xy**2):
+        mag = sqrt(thrust_x_sp*thrust_x_sp + thrust_y_sp*thrust_y_sp)
+        thrust_sp[0] = thrust_x_sp/mag*thrust_max_xy
+        thrust_sp[1] = thrust_y_sp/mag*thrust_max_xy
+    vel_err_lim_x = vel_x_error - (thrust_x_sp - thrust_sp[0])*(2.0/vel_P_gain[0])
+    vel_err_lim_y = vel_y_error - (thrust_y_sp - thrust_sp[1])*(2.0/vel_P_gain[1])
+    thr_int[0] += vel_I_gain[0]*vel_err_lim_x*Ts * useIntergral
+    thr_int[1] += vel_I_gain[1]*vel_err_lim_y*Ts * useIntergral
+
+    # Thrust to Attitude (full desired quaternion)
+    # ---------------------------
+    for i in range(3):
+        thrust_rep_sp[i] = thrust_sp[i] + pfFor*F_rep[i]
+    yaw_sp = eul_sp[2]
+    n = norm3(thrust_rep_sp[0], thrust_rep_sp[1], thrust_rep_sp[2])
+    bz0 = -(thrust_rep_sp[0]/n)
+    bz1 = -(thrust_rep_sp[1]/n)
+    bz2 = -(thrust_rep_sp[2]/n)
+    if isENU:
+        bz0 = -bz0
+        bz1 = -bz1
+        bz2 = -bz2
+    yC0 = -sin(yaw_sp)
+    yC1 = cos(yaw_sp)
+    yC2 = 0.0
+    bx0 = yC1*bz2 - yC2*bz1
+    bx1 = yC2*bz0 - yC0*bz2
+    bx2 = yC0*bz1 - yC1*bz0
+    n = norm3(bx0, bx1, bx2)
+    bx0 = bx0/n
+    bx1 = bx1/n
+    bx2 = bx2/n
+    by0 = bz1*bx2 - bz2*bx1
+    by1 = bz2*bx0 - bz0*bx2
+    by2 = bz0*bx1 - bz1*bx0
+    rotToQuat(bx0, by0, bz0, bx1, by1, bz1, bx2, by2, bz2, qd_full)
+
+    # Attitude Control
+    # ---------------------------
+    e_z0 = dcm[0,2]
+    e_z1 = dcm[1,2]
+    e_z2 = dcm[2,2]
+    n = norm3(thrust_rep_sp[0], thrust_rep_sp[1], thrust_rep_sp[2])
+    e_z_d0 = -(thrust_rep_sp[0]/n)
+    e_z_d1 = -(thrust_rep_sp[1]/n)
+    e_z_d2 = -(thrust_rep_sp[2]/n)
+    if isENU:
+        e_z_d0 = -e_z_d0
+        e_z_d1 = -e_z_d1
+        e_z_d2 = -e_z_d2
+    n1 = norm3(e_z0, e_z1, e_z2)
+    n2 = norm3(e_z_d0, e_z_d1, e_z_d2)
+    qe_red0 = (e_z0*e_z_d0 + e_z1*e_z_d1 + e_z2*e_z_d2) + sqrt(n1**2 * n2**2)
+    qe_red1 = e_z1*e_z_d2 - e_z2*e_z_d1
+    qe_red2 = e_z2*e_z_d0 - e_z0*e_z_d2
+    qe_red3 = e_z0*e_z_d1 - e_z1*e_z_d0
+    n = sqrt(qe_red0*qe_red0 + qe_red1*qe_red1 + qe_red2*qe_red2 + qe_red3*qe_red3)
+    qtmp[0,0] = qe_red0/n
+    qtmp[0,1] = qe_red1/n
+    qtmp[0,2] = qe_red2/n
+    qtmp[0,3] = qe_red3/n
+    quatMultiply(qtmp[0], quat, qd_red)
+
+    # Mixed desired quaternion (between reduced and full) and resulting desired quaternion qd
+    quatInverse(qd_red, qtmp[1])
+    q_mix = qtmp[2]
+    quatMultiply(qtmp[1], qd_full, q_mix)
+    sgn = sign(q_mix[0])
+    for i in range(4):
+        q_mix[i] = q_mix[i]*sgn
+    q_mix[0] = clip(q_mix[0], -1.0, 1.0)
+    q_mix[3] = clip(q_mix[3], -1.0, 1.0)
+    qtmp[3,0] = cos(yaw_w*acos(q_mix[0]))
+    qtmp[3,1] = 0.0
+    qtmp[3,2] = 0.0
+    qtmp[3,3] = sin(yaw_w*asin(q_mix[3]))
+    quatMultiply(qd_red, qtmp[3], qd)
+
+    # Resulting error quaternion
+    quatInverse(quat, qtmp[1])
+    quatMultiply(qtmp[1], qd, qe)
+
+    # Rate setpoint, with the yaw rate feed-forward
+    sgn = sign(qe[0])
+    for i in range(3):
+        rate_sp[i] = (2.0*sgn*qe[1+i])*att_P_gain[i]
+    yawFF = clip(yawFF, -rateMax[2], rateMax[2])
+    qi = qtmp[1]
+    rate_sp[0] += 2.0*(qi[1]*qi[3] + qi[0]*qi[2])*yawFF
+    rate_sp[1] += 2.0*(qi[2]*qi[3] - qi[0]*qi[1])*yawFF
+    rate_sp[2] += (qi[0]**2 - qi[1]**2 - qi[2]**2 + qi[3]**2)*yawFF
+    for i in range(3):
+        rate_sp[i] = clip(rate_sp[i], -rateMax[i], rateMax[i])
+
+    # Rate Control
+    # ---------------------------
+    for i in range(3):
+        rateCtrl[i] = rate_P_gain[i]*(rate_sp[i] - omega[i]) - rate_D_gain[i]*omega_dot[i]
+
+    # Mixer
+    # ---------------------------
+    thr = norm3(thrust_rep_sp[0], thrust_rep_sp[1], thrust_rep_sp[2])
+    for i in range(4):
+        w2 = mixerFMinv[i,0]*thr + mixerFMinv[i,1]*rateCtrl[0] + mixerFMinv[i,2]*rateCtrl[1] + mixerFMinv[i,3]*rateCtrl[2]
+        w_cmd[i] = sqrt(clip(w2, minWmotor**2, maxWmotor**2))
+
+    # Calculated Desired States
+    # ---------------------------
+    for i in range(3):
+        sDesCalc[i]   = pos_sp[i]
+        sDesCalc[3+i] = vel_sp[i]
+        sDesCalc[6+i] = thrust_sp[i]
+        sDesCalc[13+i] = rate_sp[i]
+    for i in range(4):
+        sDesCalc[9+i] = qd[i]
+
+    ctrlS[0] = yawFF
+
+
+# Full step (same as quad_sim)
+# ---------------------------
+@jit
+def simStep(t, Ts, s, sdot, k1, k2, k3, ytmp, intState, integrType, isVel,
+            vel_dot, omega_dot, dcm, euler, wMotor, thr, tor, kernelCode, prm, windPrm,
+            sDes, trajI, trajF, trajPrm, t_wps, wps, y_wps, T_segment,
+            pcT, withinRange, notWithinRange, withinField, inRangeNotField, F_rep, work, idxWork, potPrm, potS, potI,
+            gridPrm, numCells, cellStart, pointIdx,
+            ctrlVec, ctrlQuat, ctrlS, gains, ctrlPrm, mixerFMinv, w_cmd, sDesCalc, qtmp):
+
+    # Dynamics (using last timestep's commands)
+    quadUpdate(t, Ts, s, sdot, k1, k2, k3, ytmp, intState, integrType, isVel,
+               vel_dot, omega_dot, dcm, euler, wMotor, thr, tor, w_cmd, kernelCode, prm, windPrm)
+    t += Ts
+
+    # Trajectory for Desired States
+    desiredState(t, Ts, s[0:3], sDes, trajI, trajF, trajPrm, t_wps, wps, y_wps, T_segment)
+
+    # Potential Field Influence
+    potS[0] = potentialField(s[0:3], sDes, pcT, withinRange, notWithinRange, withinField, inRangeNotField,
+                             F_rep, work, idxWork, potPrm, potI, gridPrm, numCells, cellStart, pointIdx)
+
+    # Generate Commands (for next iteration)
+    controller(Ts, s, vel_dot, omega_dot, dcm, sDes, trajI, trajF, trajPrm, F_rep,
+               ctrlVec, ctrlQuat, ctrlS, gains, ctrlPrm, mixerFMinv, w_cmd, sDesCalc, qtmp)
+
+    return t
+
+
+class SimJIT:
+    # Create after the first desiredState/PotField/controller calls (as in main()),
+    # then use step(t) instead of quad_sim(t, Ts, quad, ctrl, wind, traj, potfld).
+
+    def __init__(self, quad, ctrl, wind, traj, potfld, Ts):
+
+        if not numbaAvailable:
+            raise Exception("numba is not installed, the JIT simulation step is not available.")
+        if not (quad.integratorType in integratorCodes):
+            raise Exception("The JIT simulation step supports the {} integrators, not {}.".format(list(integratorCodes), quad.integratorType))
+        ctrlType = ctrlTypeOptions.index(traj.ctrlType)
+        if (ctrlType == 0 and not (traj.xyzType in (0, 1, 2))) or (ctrlType != 0 and traj.xyzType == 1):
+            raise Exception("Position trajectory type {} isn't supported by the JIT simulation step.".format(traj.xyzType))
+        if (traj.xyzType == 1) and (np.diff(traj.t_wps) <= 0).any():
+            raise Exception("Time array isn't properly ordered.")
+        if (wind.field is not None):
+            raise Exception("Wind fields aren't supported by the JIT simulation step.")
+
+        self.Ts = Ts
+        self.quad = quad
+        self.ctrl = ctrl
+        self.traj = traj
+        self.potfld = potfld
+
+        # Quadcopter
+        # ---------------------------
+        quad.state = np.array(quad.state, dtype=float)
+        quad.pos   = quad.state[0:3]
+        quad.quat  = quad.state[3:7]
+        quad.vel   = quad.state[7:10]
+        quad.omega = quad.state[10:13]
+        quad.vel_dot   = np.array(quad.vel_dot, dtype=float)
+        quad.omega_dot = np.array(quad.omega_dot, dtype=float)
+        quad.dcm    = np.array(quad.dcm, dtype=float)
+        quad.euler  = np.array(quad.euler, dtype=float)
+        quad.wMotor = np.array(quad.wMotor, dtype=float)
+        quad.thr    = np.array(quad.thr, dtype=float)
+        quad.tor    = np.array(quad.tor, dtype=float)
+
+        self.kernelCode = kernelOptions.index((quad.cfg.orient, quad.cfg.usePrecession, quad.cfg.useWindDrag))
+        # kTh and kTo are appended for the rotor forces
+        self.prm = np.hstack((quad.prm.asArray(quad.kernels.paramNames), quad.prm.kTh, quad.prm.kTo))
+        self.windPrm = windToArray(wind)
+        self.k1 = np.zeros(21)
+        self.k2 = np.zeros(21)
+        self.k3 = np.zeros(21)
+        self.ytmp = np.zeros(21)
+        self.intState = np.array([quad.integrator.t], dtype=float)
+        self.integrType = integratorCodes[quad.integratorType]
+        self.isVel = np.zeros(21, dtype=bool)
+        self.isVel[idx_vel] = True
+
+        # Trajectory
+        # ---------------------------
+        traj.sDes = np.array(traj.sDes, dtype=float)
+        self.trajI = np.array([getattr(traj, "t_idx", 0), traj.arrived, traj.end_reached, traj.omit_yaw_follow], dtype=np.int64)
+        self.trajF = np.array([getattr(traj, "timeStartNext", 0), traj.current_heading], dtype=float)
+        self.trajPrm = np.array([ctrlType, traj.xyzType, traj.yawType], dtype=np.int64)
+        self.t_wps = np.array(traj.t_wps, dtype=float)
+        self.wps   = np.array(traj.wps, dtype=float)
+        self.y_wps = np.array(traj.y_wps, dtype=float)
+        self.T_segment = np.array(getattr(traj, "T_segment", np.zeros(1)), dtype=float)
+
+        # Potential Field
+        # ---------------------------
+        self.pcT = np.ascontiguousarray(potfld.pointcloud.T, dtype=float)
+        potfld.withinRange     = np.array(potfld.withinRange, dtype=bool)
+        potfld.notWithinRange  = np.array(potfld.notWithinRange, dtype=bool)
+        potfld.withinField     = np.array(potfld.withinField, dtype=bool)
+        potfld.inRangeNotField = np.array(potfld.inRangeNotField, dtype=bool)
+        potfld.F_rep = np.array(potfld.F_rep, dtype=float)
+        self.work = np.zeros([3, potfld.num_points])
+        self.idxWork = np.zeros(potfld.num_points, dtype=np.int64)
+        self.potPrm = np.array([potfld.rangeRadius, potfld.fieldRadius], dtype=float)
+        self.potS = np.array([potfld.distanceMin], dtype=float)
+        self.idxWork[:len(potfld.idx_withinRange)] = potfld.idx_withinRange
+        self.potI = np.array([len(potfld.idx_withinRange)], dtype=np.int64)
+        self.gridPrm = np.hstack((potfld.index.origin, potfld.index.cellSize)).astype(float)
+        self.numCells = np.array(potfld.index.numCells, dtype=np.int64)
+        self.cellStart = np.array(potfld.index.cellStart, dtype=np.int64)
+        self.pointIdx = np.array(potfld.index.pointIdx, dtype=np.int64)
+
+        # Controller (the setpoint vectors become rows of ctrlVec and ctrlQuat)
+        # ---------------------------
+        self.ctrlVec = np.vstack((ctrl.pos_sp, ctrl.vel_sp, ctrl.acc_sp, ctrl.thrust_sp, ctrl.thrust_rep_sp,
+                                  ctrl.eul_sp, ctrl.pqr_sp, ctrl.rate_sp, ctrl.rateCtrl, ctrl.thr_int)).astype(float)
+        (ctrl.pos_sp, ctrl.vel_sp, ctrl.acc_sp, ctrl.thrust_sp, ctrl.thrust_rep_sp,
+         ctrl.eul_sp, ctrl.pqr_sp, ctrl.rate_sp, ctrl.rateCtrl, ctrl.thr_int) = self.ctrlVec
+        self.ctrlQuat = np.vstack((ctrl.qd_full, ctrl.qd_red, ctrl.qd, ctrl.qe)).astype(float)
+        (ctrl.qd_full, ctrl.qd_red, ctrl.qd, ctrl.qe) = self.ctrlQuat
+        self.ctrlS = np.array([ctrl.yawFF], dtype=float)
+        gains = ctrl.gains
+        self.gains = np.vstack((gains.pos_P_gain, gains.vel_P_gain, gains.vel_D_gain, gains.vel_I_gain,
+                                gains.att_P_gain, gains.rate_P_gain, gains.rate_D_gain,
+                                gains.velMax, gains.rateMax)).astype(float)
+        params = quad.params
+        self.ctrlPrm = np.array([gains.velMaxAll, gains.tiltMax, ctrl.yaw_w, params["mB"], params["g"],
+                                 params["minThr"], params["maxThr"], params["useIntergral"], gains.saturateVel_separetely,
+                                 params["minWmotor"], params["maxWmotor"], potfld.pfVel, potfld.pfSatFor, potfld.pfFor,
+                                 ctrl.cfg.orient == "ENU"], dtype=float)
+        self.mixerFMinv = np.array(params["mixerFMinv"], dtype=float)
+        ctrl.w_cmd = np.array(ctrl.w_cmd, dtype=float)
+        ctrl.sDesCalc = np.array(ctrl.sDesCalc, dtype=float)
+        self.qtmp = np.zeros([4, 4])
+
+    def step(self, t):
+
+        quad = self.quad
+        ctrl = self.ctrl
+        traj = self.traj
+        potfld = self.potfld
+
+        t = simStep(t, self.Ts, quad.state, quad.sdot, self.k1, self.k2, self.k3, self.ytmp, self.intState, self.integrType, self.isVel,
+                    quad.vel_dot, quad.omega_dot, quad.dcm, quad.euler, quad.wMotor, quad.thr, quad.tor, self.kernelCode, self.prm, self.windPrm,
+                    traj.sDes, self.trajI, self.trajF, self.trajPrm, self.t_wps, self.wps, self.y_wps, self.T_segment,
+                    self.pcT, potfld.withinRange, potfld.notWithinRange, potfld.withinField, potfld.inRangeNotField,
+                    potfld.F_rep, self.work, self.idxWork, self.potPrm, self.potS, self.potI,
+                    self.gridPrm, self.numCells, self.cellStart, self.pointIdx,
+                    self.ctrlVec, self.ctrlQuat, self.ctrlS, self.gains, self.ctrlPrm, self.mixerFMinv, ctrl.w_cmd, ctrl.sDesCalc, self.qtmp)
+
+        # Scalar attributes
+        # ---------------------------
+        quad.phi, quad.theta, quad.psi = quad.euler.tolist()
+        traj.t_idx, traj.arrived, traj.end_reached, traj.omit_yaw_follow = self.trajI.tolist()
+        traj.timeStartNext, traj.current_heading = self.trajF.tolist()
+        potfld.distanceMin = self.potS[0]
+        ctrl.yawFF = self.ctrlS[0]
+
+        # PotField index arrays (idxWork[:potI[0]] are the sorted points within range)
+        # ---------------------------
+        idx = self.idxWork[:self.potI[0]].copy()
+        potfld.idx_withinRange = idx
+        potfld.idx_withinField = idx[potfld.withinField[idx]]
+        potfld.idx_inRangeNotField = idx[potfld.inRangeNotField[idx]]
+
+        return t
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Uniform grid index of a point cloud, for the "points within a box around pos" queries
+# of the potential field. Built once, the points are bucketed in cubic cells (a multiple
+# of the point cloud's grid step, so that grid points never fall on a cell boundary by
+# round-off) and stored cell by cell (CSR layout: cellStart, pointIdx).
+# A query only reads the cells overlapping the box, so its cost depends on the number of
+# points near pos, not on the size of the point cloud.
+
+import numpy as np
+
+
+def gridCellSize(gridStep, cellSize):
+    # Cell size, rounded up to a multiple of the grid step (per axis)
+    gridStep = np.asarray(gridStep, dtype=float)
+    return np.ceil(cellSize/gridStep - 1e-9)*gridStep
+
+
+class GridIndex:
+
+    def __init__(self, points, gridStep, cellSize):
+        self.points = points
+        self.num_points = len(points)
+        self.cellSize = gridCellSize(gridStep, cellSize)
+
+        # Cells (x index varies fastest, so that a row of cells along x is one contiguous run)
+        self.origin = points.min(axis=0).astype(float)
+        cellIdx = np.floor((points - self.origin)/self.cellSize).astype(np.int64)
+        self.numCells = cellIdx.max(axis=0) + 1
+        cellKey = self.cellKey(cellIdx[:,0], cellIdx[:,1], cellIdx[:,2])
+
+        # CSR layout: the points of cell c are pointIdx[cellStart[c]:cellStart[c+1]], in increasing order
+        self.pointIdx = np.argsort(cellKey, kind="stable")
+        self.cellStart = np.zeros(np.prod(self.numCells) + 1, dtype=np.int64)
+        self.cellStart[1:] = np.cumsum(np.bincount(cellKey, minlength=np.prod(self.numCells)))
+
+    @classmethod
+    def load(cls, file, points):
+        # Index saved by save(), for the same points
+        index = cls.__new__(cls)
+        index.points = points
+        index.num_points = len(points)
+        with np.load(file) as data:
+            for name in ("cellSize", "origin", "numCells", "cellStart", "pointIdx"):
+                setattr(index, name, data[name])
+        if not (len(index.pointIdx) == index.num_points):
+            raise Exception("The spatial index in {} doesn't match the point cloud.".format(file))
+        return index
+
+    def save(self, file):
+        np.savez(file, cellSize=self.cellSize, origin=self.origin, numCells=self.numCells,
+                 cellStart=self.cellStart, pointIdx=self.pointIdx)
+
+    def cellKey(self, i, j, k):
+        return (k*self.numCells[1] + j)*self.numCells[0] + i
+
+    def candidates(self, center, halfSize):
+        # Indexes (unsorted) of the points of all cells overlapping the box center +- halfSize
+        # (the box is padded by a fraction of a cell, the exact test is left to the caller)
+        pad = 1e-6*self.cellSize
+        lo = np.floor((center - halfSize - pad - self.origin)/self.cellSize).astype(np.int64)
+        hi = np.floor((center + halfSize + pad - self.origin)/self.cellSize).astype(np.int64)
+        lo = np.maximum(lo, 0)
+        hi = np.minimum(hi, self.numCells - 1)
+        if (lo > hi).any():
+            return np.zeros(0, dtype=np.int64)
+
+        runs = []
+        for k in range(lo[2], hi[2]+1):
+            for j in range(lo[1], hi[1]+1):
+                start = self.cellStart[self.cellKey(lo[0], j, k)]
+                end = self.cellStart[self.cellKey(hi[0], j, k) + 1]
+                if (end > start):
+                    runs.append(self.pointIdx[start:end])
+        if not runs:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(runs)
+
+    def queryBox(self, center, halfSize):
+        # Sorted indexes of the points with abs(center - point) <= halfSize on every axis
+        # (same test and same order as np.where on the full point cloud)
+        idx = self.candidates(center, halfSize)
+        pts = self.points[idx]
+        inBox = (abs(center[0]-pts[:,0]) <= halfSize) & \
+                (abs(center[1]-pts[:,1]) <= halfSize) & \
+                (abs(center[2]-pts[:,2]) <= halfSize)
+        return np.sort(idx[inBox])
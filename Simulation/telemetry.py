@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Streaming telemetry of a simulation run.
+# The Recorder has registered channels and stores one column per channel on disk: the
+# records are buffered in memory and appended to the channel's file every chunkSize
+# records, so memory stays flat whatever the length of the run and the size of the point
+# cloud. Only one step out of every `decimation` is recorded.
+#   dense channels:  one value (scalar or array of fixed shape) per record, <name>.bin
+#   mask channels:   sparse set of point cloud indexes per record, delta-encoded: the indexes
+#                    entering and leaving the set at every record (<name>.delta.*), and the
+#                    full set every keyframeInterval records (<name>.key.*) for random access
+# The layout of the files (dtypes, shapes, number of records) is in telemetry.json.
+# Telemetry(directory) reads a recording, the channels are memory-mapped.
+
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+
+
+class Recorder:
+
+    def __init__(self, directory=None, decimation=1, chunkSize=1024):
+        # directory None records in a new temporary directory
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="telemetry_")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.decimation = int(decimation)
+        self.chunkSize = int(chunkSize)
+        self.channels = {}
+        self.numSteps = 0
+        self.numRecords = 0
+        self.numBuffered = 0
+        self.closed = False
+
+    def addChannel(self, name, shape=(), dtype=np.float64):
+        # Dense channel, the buffer holds chunkSize records
+        if name in self.channels:
+            raise Exception("Telemetry channel {} already exists.".format(name))
+        shape = tuple(int(n) for n in np.atleast_1d(shape)) if np.size(shape) else ()
+        self.channels[name] = {"kind": "dense", "shape": shape, "dtype": np.dtype(dtype),
+                               "buffer": np.zeros((self.chunkSize,) + shape, dtype=dtype),
+                               "file": open(os.path.join(self.directory, name + ".bin"), "wb")}
+
+    def addMaskChannel(self, name, num_points, keyframeInterval=250):
+        # Mask channel, recorded from the sorted indexes of the points in the set
+        if name in self.channels:
+            raise Exception("Telemetry channel {} already exists.".format(name))
+        dtype = np.int32 if (num_points < 2**31) else np.int64
+        self.channels[name] = {"kind": "mask", "num_points": int(num_points), "dtype": np.dtype(dtype),
+                               "keyframeInterval": int(keyframeInterval), "prev": np.zeros(0, dtype=dtype),
+                               "delta": IndexStream(os.path.join(self.directory, name + ".delta")),
+                               "key": IndexStream(os.path.join(self.directory, name + ".key"))}
+
+    def record(self, values):
+        # values: {channel name: value} of this step, for all channels
+        step = self.numSteps
+        self.numSteps += 1
+        if (step % self.decimation != 0):
+            return
+        row = self.numBuffered
+        for name, channel in self.channels.items():
+            if (channel["kind"] == "dense"):
+                channel["buffer"][row] = values[name]
+            else:
+                # Points entering and leaving the set since the previous record, and the full
+                # set every keyframeInterval records
+                idx = np.array(values[name], dtype=channel["dtype"])
+                channel["delta"].append(np.setdiff1d(idx, channel["prev"], assume_unique=True))
+                channel["delta"].append(np.setdiff1d(channel["prev"], idx, assume_unique=True))
+                if (self.numRecords % channel["keyframeInterval"] == 0):
+                    channel["key"].append(idx)
+                channel["prev"] = idx
+        self.numRecords += 1
+        self.numBuffered += 1
+        if (self.numBuffered == self.chunkSize):
+            self.flush()
+
+    def flush(self):
+        # Appends the buffered records to the channel files
+        for channel in self.channels.values():
+            if (channel["kind"] == "dense"):
+                channel["buffer"][:self.numBuffered].tofile(channel["file"])
+            else:
+                channel["delta"].flush()
+                channel["key"].flush()
+        self.numBuffered = 0
+
+    def close(self):
+        # Writes the remaining records and the layout of the files, returns the recording
+        if not self.closed:
+            self.flush()
+            layout = {"decimation": self.decimation, "numSteps": self.numSteps, "numRecords": self.numRecords, "channels": {}}
+            for name, channel in self.channels.items():
+                if (channel["kind"] == "dense"):
+                    channel["file"].close()
+                    layout["channels"][name] = {"kind": "dense", "shape": list(channel["shape"]), "dtype": channel["dtype"].str}
+                else:
+                    channel["delta"].close()
+                    channel["key"].close()
+                    layout["channels"][name] = {"kind": "mask", "num_points": channel["num_points"], "dtype": channel["dtype"].str,
+                                                "keyframeInterval": channel["keyframeInterval"]}
+            with open(os.path.join(self.directory, "telemetry.json"), "w") as f:
+                json.dump(layout, f, indent=4)
+            self.closed = True
+        return Telemetry(self.directory)
+
+
+class IndexStream:
+    # Index lists appended to <file>.idx (concatenated) and <file>.ptr (start of every list in
+    # <file>.idx, and the end of the last one)
+
+    def __init__(self, file):
+        self.file = open(file + ".idx", "wb")
+        self.ptrFile = open(file + ".ptr", "wb")
+        self.buffer = []
+        self.ptr = [0]
+        self.numIdx = 0
+
+    def append(self, idx):
+        self.buffer.append(idx)
+        self.numIdx += len(idx)
+        self.ptr.append(self.numIdx)
+
+    def flush(self):
+        if self.buffer:
+            np.concatenate(self.buffer).tofile(self.file)
+        np.array(self.ptr, dtype=np.int64).tofile(self.ptrFile)
+        self.buffer = []
+        self.ptr = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        self.ptrFile.close()
+
+
+class MaskLog:
+    # Delta-encoded mask channel: for every record, the points entering and leaving the set
+    # since the previous record, and the full set every keyframeInterval records.
+    # A record is rebuilt from the nearest keyframe before it, or from the last record read
+    # if that is nearer (reading the records in order only applies the deltas in between).
+
+    def __init__(self, delta, deltaPtr, key, keyPtr, num_points, keyframeInterval):
+        self.delta = delta
+        self.deltaPtr = deltaPtr
+        self.key = key
+        self.keyPtr = keyPtr
+        self.num_points = num_points
+        self.keyframeInterval = keyframeInterval
+        self.cursor = -1
+        self.current = np.zeros(0, dtype=delta.dtype)
+
+    def __len__(self):
+        return (len(self.deltaPtr) - 1)//2
+
+    def entering(self, i):
+        # Sorted indexes of the points that entered the set at record i
+        return self.delta[self.deltaPtr[2*i]:self.deltaPtr[2*i+1]]
+
+    def leaving(self, i):
+        # Sorted indexes of the points that left the set at record i
+        return self.delta[self.deltaPtr[2*i+1]:self.deltaPtr[2*i+2]]
+
+    def keyframe(self, j):
+        return self.key[self.keyPtr[j]:self.keyPtr[j+1]]
+
+    def __getitem__(self, i):
+        # Sorted indexes of the points in the set at record i
+        if (i < 0):
+            i += len(self)
+        if not (0 <= i < len(self)):
+            raise IndexError("Record {} out of range.".format(i))
+        start = i - i % self.keyframeInterval
+        if (start > self.cursor) or (self.cursor > i):
+            self.cursor = start
+            self.current = np.array(self.keyframe(start//self.keyframeInterval))
+        if (i > self.cursor):
+            # The deltas of records cursor+1 to i are contiguous, and a point alternately enters
+            # and leaves the set: the points that changed an odd number of times toggle
+            events = self.delta[self.deltaPtr[2*(self.cursor+1)]:self.deltaPtr[2*i+2]]
+            if (len(events) != 0):
+                idx, count = np.unique(events, return_counts=True)
+                self.current = np.setxor1d(self.current, idx[count % 2 == 1], assume_unique=True)
+        self.cursor = i
+        return self.current
+
+    def changes(self, i0, i1):
+        # Net points entering and leaving the set between records i0 and i1 (i0 <= i1)
+        if (i1 == i0 + 1):
+            return self.entering(i1), self.leaving(i1)
+        set0 = self[i0]
+        set1 = self[i1]
+        return np.setdiff1d(set1, set0, assume_unique=True), np.setdiff1d(set0, set1, assume_unique=True)
+
+    def mask(self, i):
+        # Mask over the point cloud at record i
+        mask = np.zeros(self.num_points, dtype=bool)
+        mask[self[i]] = True
+        return mask
+
+
+class Telemetry:
+    # Recording written by a Recorder (memory-mapped, read-only)
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "telemetry.json")) as f:
+            layout = json.load(f)
+        self.decimation = layout["decimation"]
+        self.numSteps = layout["numSteps"]
+        self.numRecords = layout["numRecords"]
+        self.channels = layout["channels"]
+
+    def __contains__(self, name):
+        return name in self.channels
+
+    def __getitem__(self, name):
+        # Dense channel (numRecords x shape), or MaskLog of a mask channel
+        channel = self.channels[name]
+        if (channel["kind"] == "dense"):
+            return self.memmap(name + ".bin", channel["dtype"], (self.numRecords,) + tuple(channel["shape"]))
+        return MaskLog(self.memmap(name + ".delta.idx", channel["dtype"]), self.memmap(name + ".delta.ptr", np.int64),
+                       self.memmap(name + ".key.idx", channel["dtype"]), self.memmap(name + ".key.ptr", np.int64),
+                       channel["num_points"], channel["keyframeInterval"])
+
+    def memmap(self, fileName, dtype, shape=None):
+        file = os.path.join(self.directory, fileName)
+        dtype = np.dtype(dtype)
+        if (os.path.getsize(file) == 0):
+            return np.zeros(shape if shape is not None else 0, dtype=dtype)
+        data = np.memmap(file, dtype=dtype, mode="r")
+        return data if shape is None else data.reshape(shape)
+
+    def delete(self):
+        # Deletes the recording's directory
+        shutil.rmtree(self.directory)
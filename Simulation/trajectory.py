@@ -17,19 +17,25 @@ Please feel free to use and modify this, but keep the above information. Thanks!
 import numpy as np
 from numpy import pi
 from numpy.linalg import norm
+from bisect import bisect_left, bisect_right
+from math import factorial
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import splu
 from waypoints import makeWaypoints
-import config
 
 class Trajectory:
 
-    def __init__(self, quad, ctrlType, trajSelect):
+    def __init__(self, quad, ctrlType, trajSelect, waypoints=None):
 
         self.ctrlType = ctrlType
         self.xyzType = trajSelect[0]
         self.yawType = trajSelect[1]
         self.averVel = trajSelect[2]
 
-        t_wps, wps, y_wps, v_wp = makeWaypoints()
+        # waypoints: (t, wp, yaw, v_average) as returned by makeWaypoints(), which is used if None
+        if waypoints is None:
+            waypoints = makeWaypoints()
+        t_wps, wps, y_wps, v_wp = waypoints
         self.t_wps = t_wps
         self.wps   = wps
         self.y_wps = y_wps
@@ -48,6 +54,24 @@ class Trajectory:
         
         if (self.yawType == 4):
             self.y_wps = np.zeros(len(self.t_wps))
+
+        # Waypoint times as a list, for the binary searches of the current segment
+        self.t_wps_list = list(self.t_wps)
+
+        # Minimum velocity, acceleration, jerk or snap trajectory (xyzType 3 to 6): the polynomial
+        # coefficients of all the segments are solved once, with the coefficients of their
+        # velocity and acceleration, for desiredState's Horner evaluations
+        if (self.ctrlType == "xyz_pos") and (self.xyzType in (3, 4, 5, 6)):
+            if not (len(self.t_wps) == self.wps.shape[0]):
+                raise Exception("Time array and waypoint array not the same size.")
+            elif (np.diff(self.t_wps) <= 0).any():
+                raise Exception("Time array isn't properly ordered.")
+            coeffs = minSomethingTraj(self.wps, self.T_segment, int(self.xyzType) - 2)
+            n = coeffs.shape[1]
+            T = self.T_segment[:,np.newaxis,np.newaxis]
+            self.coeffsPos = coeffs
+            self.coeffsVel = coeffs[:,1:]*np.arange(1, n)[:,np.newaxis]/T
+            self.coeffsAcc = coeffs[:,2:]*(np.arange(2, n)*np.arange(1, n-1))[:,np.newaxis]/T**2
         
         # Get initial heading
         self.current_heading = quad.psi
@@ -66,8 +90,107 @@ class Trajectory:
         self.desYawRate = 0.         # Desired yaw speed
         self.sDes = np.hstack((self.desPos, self.desVel, self.desAcc, self.desThr, self.desEul, self.desPQR, self.desYawRate)).astype(float)
 
+        # Setpoint table of the whole run (see precompute), None if not generated
+        self.sDes_all = None
+
+
+    def isTimeBased(self):
+        # True if the desired states only depend on time (not on the quadcopter's state).
+        # pos_waypoint_arrived waits for the quadcopter to reach every waypoint.
+        return not (self.ctrlType == "xyz_pos" and self.xyzType == 2)
+
+
+    def precompute(self, Ti, Ts, Tf):
+        # Generate the desired states (sDes) of all the time steps of a run at once, for the
+        # time-based trajectories. desiredState then only reads the row of the current time step.
+        # The times are accumulated like the simulation loop does (t += Ts), so that the table
+        # is identical to the desired states calculated at every step.
+        # Returns the table (steps x 19), or None for a reactive trajectory (per step path).
+        if not self.isTimeBased():
+            self.sDes_all = None
+            return None
+
+        numTimeStep = int(Tf/Ts+1)
+        t = np.cumsum(np.hstack((Ti, np.full(numTimeStep-1, Ts)))).astype(float)
+        sDes = np.zeros([numTimeStep, 19])
+        sDes[:] = self.sDes
+        t_idx = np.zeros(numTimeStep, dtype=int)
+        end = np.zeros(numTimeStep, dtype=int)
+
+        if (self.ctrlType == "xyz_vel") or (self.ctrlType == "xy_vel_z_pos"):
+            if (self.xyzType == 1):
+                sDes[:] = 0.
+                sDes[(t >= 1) & (t < 4), 3:6] = [3, 2, 0]
+                sDes[t >= 4, 3:6] = [3, -1, 0]
+
+        elif (self.ctrlType == "xyz_pos"):
+            if (self.xyzType == 99):
+                sDes[:] = 0.
+                sDes[:,18] = 30.0*pi/180
+                sDes[(t >= 1) & (t < 4), 0:3] = [2, 2, 1]
+                sDes[t >= 4, 0:3] = [2, -2, -2]
+                sDes[t >= 4, 14] = pi/3
+
+            elif (self.xyzType != 0):
+                sDes[:] = 0.
+                interior = (t > 0) & (t < self.t_wps[-1])
+
+                # Positions (and velocities and accelerations of the minimum derivative trajectories)
+                if (self.xyzType == 1):
+                    if not (len(self.t_wps) == self.wps.shape[0]):
+                        raise Exception("Time array and waypoint array not the same size.")
+                    elif (np.diff(self.t_wps) <= 0).any():
+                        raise Exception("Time array isn't properly ordered.")
+                    t_idx[interior] = np.searchsorted(self.t_wps, t[interior], side="left") - 1
+                    t_idx[t >= self.t_wps[-1]] = -1
+                    sDes[:,0:3] = self.wps[t_idx,:]
+                else:
+                    moving = t < self.t_wps[-1]
+                    t_idx[moving] = np.maximum(np.searchsorted(self.t_wps, t[moving], side="right") - 1, 0)
+                    t_idx[~moving] = -1
+                    end[~moving] = 1
+                    idx = t_idx[moving]
+                    scale = (t[moving] - self.t_wps[idx])/self.T_segment[idx]
+                    sDes[moving,0:3] = polyEvalArray(self.coeffsPos[idx], scale)
+                    sDes[moving,3:6] = polyEvalArray(self.coeffsVel[idx], scale)
+                    sDes[moving,6:9] = polyEvalArray(self.coeffsAcc[idx], scale)
+                    sDes[~moving,0:3] = self.wps[-1,:]
+
+                # Yaw
+                if (self.yawType == 1):
+                    if not (len(self.t_wps) == len(self.y_wps)):
+                        raise Exception("Time array and waypoint array not the same size.")
+                    sDes[:,14] = self.y_wps[t_idx]
+                elif (self.yawType == 2):
+                    if not (len(self.t_wps) == len(self.y_wps)):
+                        raise Exception("Time array and waypoint array not the same size.")
+                    sDes[:,14] = self.y_wps[t_idx]
+                    idx = t_idx[interior]
+                    scale = (t[interior] - self.t_wps[idx])/self.T_segment[idx]
+                    yaw = (1 - scale)*self.y_wps[idx] + scale*self.y_wps[idx + 1]
+                    sDes[interior,14] = yaw
+                    # Yaw rate from the heading of the previous step (the initial heading first).
+                    # current_heading is left as is: it is the state of the per step path.
+                    if (len(yaw) > 0):
+                        sDes[interior,18] = (yaw - np.hstack((self.current_heading, yaw[:-1])))/Ts
+
+        self.t_all = t
+        self.sDes_all = sDes
+        self.t_idx_all = t_idx
+        self.end_all = end
+        return sDes
+
 
     def desiredState(self, t, Ts, quad):
+
+        # Row of the setpoint table (precompute), if the time step is in it
+        if self.sDes_all is not None:
+            k = int(round((t - self.t_all[0])/Ts))
+            if (0 <= k < len(self.t_all)):
+                self.sDes = self.sDes_all[k]
+                self.t_idx = self.t_idx_all[k]
+                self.end_reached = self.end_all[k]
+                return
         
         self.desPos = np.zeros(3)    # Desired position (x, y, z)
         self.desVel = np.zeros(3)    # Desired velocity (xdot, ydot, zdot)
@@ -90,9 +213,27 @@ class Trajectory:
             elif (t >= self.t_wps[-1]):
                 self.t_idx = -1
             else:
-                self.t_idx = np.where(t <= self.t_wps)[0][0] - 1
+                # Index of the first waypoint time >= t, minus 1
+                self.t_idx = bisect_left(self.t_wps_list, t) - 1
             
             self.desPos = self.wps[self.t_idx,:]
+
+
+        def pos_waypoint_min():
+
+            if (t >= self.t_wps[-1]):
+                # Stopped at the last waypoint
+                self.t_idx = -1
+                self.end_reached = 1
+                self.desPos = self.wps[-1,:]
+            else:
+                # Current segment (binary search), and position, velocity and acceleration of its
+                # polynomials at the segment's normalized time
+                self.t_idx = max(bisect_right(self.t_wps_list, t) - 1, 0)
+                scale = (t - self.t_wps[self.t_idx])/self.T_segment[self.t_idx]
+                self.desPos = polyEval(self.coeffsPos[self.t_idx], scale)
+                self.desVel = polyEval(self.coeffsVel[self.t_idx], scale)
+                self.desAcc = polyEval(self.coeffsAcc[self.t_idx], scale)
                             
         
         def pos_waypoint_arrived():
@@ -176,6 +317,9 @@ class Trajectory:
                 # Go to next waypoint when arrived at waypoint
                 elif (self.xyzType == 2):
                     pos_waypoint_arrived()
+                # Minimum velocity, acceleration, jerk or snap trajectory through the waypoints
+                elif (self.xyzType in (3, 4, 5, 6)):
+                    pos_waypoint_min()
                 
                 # List of possible yaw trajectories
                 # ---------------------------
@@ -197,6 +341,82 @@ class Trajectory:
 
 
 
+## Minimum derivative trajectories
+
+def get_poly_cc(n, k, t):
+    # Coefficients of the k-th derivative of the polynomial c[0] + c[1]*t + ... + c[n-1]*t^(n-1), at t
+    cc = np.zeros(n)
+    for i in range(k, n):
+        cc[i] = factorial(i)/factorial(i-k)*t**(i-k)
+    return cc
+
+
+def minSomethingTraj(waypoints, times, order):
+    # Polynomial coefficients (segments x 2*order x 3) of the trajectory through the waypoints
+    # minimizing the integral of the squared order-th derivative of the position (1: velocity,
+    # 2: acceleration, 3: jerk, 4: snap), with times[i] the duration of segment i.
+    # Each segment is a polynomial of degree 2*order-1 of its normalized time (0 to 1). The
+    # segments go through their waypoints, start and end at rest (derivatives 1 to order-1 at
+    # zero), and the derivatives 1 to 2*order-2 are continuous at the inner waypoints. All the
+    # conditions are solved together as one sparse linear system (same for the 3 axes).
+    n = 2*int(order)
+    nSeg = len(times)
+    rows = []
+    cols = []
+    vals = []
+    b = np.zeros([n*nSeg, 3])
+
+    def addRow(row, seg, cc):
+        nz = np.nonzero(cc)[0]
+        rows.extend([row]*len(nz))
+        cols.extend(seg*n + nz)
+        vals.extend(cc[nz])
+
+    row = 0
+    # Position at the start and end of every segment
+    for i in range(nSeg):
+        addRow(row, i, get_poly_cc(n, 0, 0))
+        b[row] = waypoints[i]
+        addRow(row+1, i, get_poly_cc(n, 0, 1))
+        b[row+1] = waypoints[i+1]
+        row += 2
+    # Start and end at rest
+    for k in range(1, order):
+        addRow(row, 0, get_poly_cc(n, k, 0))
+        addRow(row+1, nSeg-1, get_poly_cc(n, k, 1))
+        row += 2
+    # Continuity of the derivatives (in real time) at the inner waypoints
+    for i in range(nSeg-1):
+        for k in range(1, 2*order-1):
+            addRow(row, i, get_poly_cc(n, k, 1)/times[i]**k)
+            addRow(row, i+1, -get_poly_cc(n, k, 0)/times[i+1]**k)
+            row += 1
+
+    A = csc_matrix((vals, (rows, cols)), shape=(n*nSeg, n*nSeg))
+    coeffs = splu(A).solve(b)
+    return coeffs.reshape(nSeg, n, 3)
+
+
+def polyEval(c, t):
+    # Horner evaluation of the polynomials c[0] + c[1]*t + ... (one column of c per axis)
+    if (len(c) == 0):
+        return np.zeros(3)
+    p = c[-1]
+    for j in range(len(c)-2, -1, -1):
+        p = p*t + c[j]
+    return p
+
+
+def polyEvalArray(c, t):
+    # Horner evaluation of the polynomials c[i,0] + c[i,1]*t[i] + ... (for every row i)
+    if (c.shape[1] == 0):
+        return np.zeros([len(t), 3])
+    p = c[:,-1]
+    for j in range(c.shape[1]-2, -1, -1):
+        p = p*t[:,np.newaxis] + c[:,j]
+    return p
+
+
 ## Testing scripts
 
 def testXYZposition(t):
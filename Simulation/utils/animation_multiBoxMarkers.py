@@ -12,17 +12,73 @@ import vispy
 from vispy import app, scene
 from vispy.scene import visuals
 from vispy.color import ColorArray
+import vispy.io
 import time
 import sys
+import os
+
+try:
+    import imageio
+    imageioAvailable = True
+except ImportError:
+    imageioAvailable = False
 
 import utils
-from utils.vispyMods import MyScene, BoxMarkers, NonUpdatingTurntable
-import config
+from utils.vispyMods import MyScene, BoxMarkers, InstancedBoxMarkers, ChunkedBoxMarkers, NonUpdatingTurntable, TrailLine
 
 rad2deg = 180.0/pi
 deg2rad = pi/180.0
 
-def third_PV_animation(t_all, waypoints, pos_all, quat_all, euler_all, sDes_tr_all, Ts, params, xyzType, yawType, potfld, notInRange_all, inRange_all, inField_all, ifsave, figures):
+# Draw the boxes with instancing (the GPU stores one unit box, and a position and a visibility
+# per box), for large point clouds. False to use BoxMarkers (OpenGL without instancing).
+useInstancing = True
+
+# Draw the point cloud by chunks (with instancing), in full detail near the camera center,
+# decimated farther and not at all beyond farDist (see ChunkedBoxMarkers)
+useChunks = True
+chunkSize = 8.0
+nearDist = 15.0
+farDist = 60.0
+
+# Writer of the rendered frames, for the offline export (ifsave)
+# A video or .gif with imageio (saveFile extension), or else a .png image sequence in a folder
+# (saveFile without its extension).
+class FrameWriter:
+    def __init__(self, saveFile, fps):
+        root, ext = os.path.splitext(saveFile)
+        self.writer = None
+        if (ext != "" and ext.lower() != ".png"):
+            if imageioAvailable:
+                self.writer = imageio.get_writer(saveFile, fps=fps)
+            else:
+                print("imageio is not installed, writing the frames as .png files in {}.".format(root))
+        if self.writer is None:
+            os.makedirs(root, exist_ok=True)
+            self.path = root
+        else:
+            self.path = saveFile
+        self.folder = root
+        self.numFrames = 0
+
+    def write(self, img):
+        if self.writer is None:
+            vispy.io.write_png(os.path.join(self.folder, "frame_{:06d}.png".format(self.numFrames)), img)
+        else:
+            self.writer.append_data(img)
+        self.numFrames += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def third_PV_animation(t_all, waypoints, pos_all, quat_all, euler_all, sDes_tr_all, Ts, params, xyzType, yawType, potfld, inField_log, ifsave, figures, saveFile="Videos/animation.mp4", saveFPS=30):
+    
+    # ifsave: offline export, the log is stepped through at saveFPS frames per second of
+    # simulation time (not wall-clock time) and every frame is rendered offscreen and written
+    # in saveFile (see FrameWriter). Without a display, the EGL backend of vispy is used.
+    if ifsave and sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        vispy.use(app="egl")
     
     x = pos_all[:,0]
     y = pos_all[:,1]
@@ -39,15 +95,16 @@ def third_PV_animation(t_all, waypoints, pos_all, quat_all, euler_all, sDes_tr_a
     psi_ini = euler_all[0,2]*rad2deg
 
     # Add Canvas
-    canvas = MyScene(pointcloud=potfld.pointcloud, keys='interactive', show=True)
-    canvas.measure_fps()
+    canvas = MyScene(pointcloud=potfld.pointcloud, orient=params["orient"], keys='interactive', show=not ifsave)
+    if not ifsave:
+        canvas.measure_fps()
     
     # Add Camera
     view = canvas.central_widget.add_view()
     view.camera = NonUpdatingTurntable(distance=3.5, elevation=8, azimuth=(-90-psi_ini), fov=90)
     
     # Flip Z coordinates if NED
-    if (config.orient == "NED"):
+    if (params["orient"] == "NED"):
         z    = -z
         zDes = -zDes
         z_wp = -z_wp
@@ -55,20 +112,33 @@ def third_PV_animation(t_all, waypoints, pos_all, quat_all, euler_all, sDes_tr_a
         view.camera.flip = flip[0], not flip[1], flip[2] # Flip camera in Y axis
 
     # Get initial points
-    canvas.yellowPoints = np.where(np.logical_or(notInRange_all[0,:], inRange_all[0,:]))[0]
-    canvas.redPoints = np.where(inField_all[0,:])[0]
+    # (delta-encoded telemetry mask log of the points within field)
+    canvas.redPoints = inField_log[0]
 
     # Create scatter object and fill in the data
     color_points = (1, 1, 0.5, 1)
     color_field  = (1, 0, 0, 0.5)
     color_wp     = (0, 1, 0, 0.5)
     color_edges  = (0, 0, 0, 0.3)
-    scatter = BoxMarkers(potfld.pointcloud, 0.1, 0.1, 0.1, 
+    if useInstancing:
+        Markers = InstancedBoxMarkers
+    else:
+        Markers = BoxMarkers
+    if useInstancing and useChunks:
+        scatter = ChunkedBoxMarkers(canvas.pointcloud, 0.1, 0.1, 0.1, color=color_points, edge_color=color_edges,
+                    parent=view.scene, chunk_size=chunkSize, near_dist=nearDist, far_dist=farDist)
+    else:
+        scatter = Markers(canvas.pointcloud, 0.1, 0.1, 0.1, 
                     color=color_points, edge_color=color_edges, parent=view.scene)
-    scatter_field = BoxMarkers(potfld.pointcloud, potfld.gridStep[0], potfld.gridStep[1], potfld.gridStep[2], 
-                    color=color_field, edge_color=color_edges, variable_vis=True, parent=view.scene)
-    scatter_field.set_visible_boxes(canvas.redPoints)
-    scatter_wp = BoxMarkers(waypoints, 0.1, 0.1, 0.1,
+    if useInstancing:
+        # Only the points within field are in the instance buffer (replaced when they change)
+        scatter_field = Markers(canvas.pointcloud[canvas.redPoints], potfld.gridStep[0], potfld.gridStep[1], potfld.gridStep[2],
+                        color=color_field, edge_color=color_edges, parent=view.scene)
+    else:
+        scatter_field = Markers(canvas.pointcloud, potfld.gridStep[0], potfld.gridStep[1], potfld.gridStep[2], 
+                        color=color_field, edge_color=color_edges, variable_vis=True, parent=view.scene)
+        scatter_field.set_visible_boxes(canvas.redPoints)
+    scatter_wp = Markers(waypoints, 0.1, 0.1, 0.1,
                     color=color_wp, edge_color=color_edges, parent=view.scene)
     # Add a colored 3D axis for orientation
     axis = visuals.XYZAxis(parent=view.scene)
@@ -76,21 +146,103 @@ def third_PV_animation(t_all, waypoints, pos_all, quat_all, euler_all, sDes_tr_a
     # Lines to draw quadrotor and past trajectory
     line1 = scene.visuals.LinePlot([[],[],[]], width=6, color='red',  marker_size=0, parent=view.scene)
     line2 = scene.visuals.LinePlot([[],[],[]], width=6, color='blue', marker_size=0, parent=view.scene)
-    line3 = scene.visuals.LinePlot([[],[],[]], width=2, color='red',  marker_size=0, parent=view.scene)
+    line3 = TrailLine(capacity=len(t_all), color='red', width=2, parent=view.scene)
+
+    # Past trajectory vertices (only the new ones are uploaded at every frame)
+    trail = np.array(pos_all, dtype=np.float32)
+    if (params["orient"] == "NED"):
+        trail[:,2] = -trail[:,2]
     
     # Drone params
     dxm = params["dxm"]
     dym = params["dym"]
     dzm = params["dzm"]
 
+    def drawFrame(idx_now):
+        # Get drone state for the frame's index
+        pos = pos_all[idx_now]
+        x = pos[0]
+        y = pos[1]
+        z = pos[2]
+        quat = quat_all[idx_now]
+
+        # Determine by how much yaw (psi) has changed since last frame
+        if (idx_now==0):
+            psi_diff = 0
+        else:
+            psi_diff = (euler_all[idx_now,2] - euler_all[canvas.idx_prev,2])*rad2deg
+    
+        # Normal NED frame changes
+        if (params["orient"] == "NED"):
+            z = -z
+            quat = np.array([quat[0], -quat[1], -quat[2], quat[3]])
+            psi_diff = -psi_diff
+    
+        # Find motor positions
+        R = utils.quat2Dcm(quat)    
+        motorPoints = np.array([[dxm, -dym, dzm], [0, 0, 0], [dxm, dym, dzm], [-dxm, dym, dzm], [0, 0, 0], [-dxm, -dym, dzm]])
+        motorPoints = np.dot(R, np.transpose(motorPoints))
+        motorPoints[0,:] = motorPoints[0,:] + x 
+        motorPoints[1,:] = motorPoints[1,:] + y 
+        motorPoints[2,:] = motorPoints[2,:] + z 
+        
+        # Draw quadrotor and past trajectory
+        line1.set_data(np.array([motorPoints[0, 0:3], motorPoints[1, 0:3], motorPoints[2, 0:3]]).T, marker_size=0,)
+        line2.set_data(np.array([motorPoints[0, 3:6], motorPoints[1, 3:6], motorPoints[2, 3:6]]).T, marker_size=0,)
+        if (line3.count > idx_now+1):
+            line3.set_data(trail[0:idx_now+1])
+        else:
+            line3.append(trail[line3.count:idx_now+1])
+
+        # Move field markers
+        # (only the points entering or leaving the field since the last frame are read)
+        entering, leaving = inField_log.changes(canvas.idx_prev, idx_now)
+        if (entering.size != 0) or (leaving.size != 0):
+            canvas.redPoints = inField_log[idx_now]
+            if useInstancing:
+                scatter_field.set_data(canvas.pointcloud[canvas.redPoints])
+            else:
+                scatter_field.set_visible_boxes(canvas.redPoints)
+
+        # Change camera angle and position
+        view.camera.azimuth = view.camera.azimuth + psi_diff
+        view.camera.center = [x, y, z]
+        if useInstancing and useChunks:
+            scatter.update(np.array([x, y, z]))
+        
+        # Update view
+        view.camera.view_changed()
+        
+        # Set previous index
+        canvas.idx_prev = idx_now
+
+    if ifsave:
+        # Index of every frame (the first time step after the frame's time, as in update)
+        frameTimes = np.arange(t_all[0], t_all[-1], 1.0/saveFPS)
+        frameIdx = np.minimum(np.searchsorted(t_all, frameTimes, side="right"), len(t_all)-1)
+
+        writer = FrameWriter(saveFile, saveFPS)
+        for idx_now in frameIdx:
+            drawFrame(idx_now)
+            writer.write(canvas.render())
+        writer.close()
+        canvas.close()
+        print("Saved {} frames in {}.".format(writer.numFrames, writer.path))
+
+        figures()
+        return
+
     def update(ev):
         if canvas.idx_prev == 0:
             # Start time
             canvas.startTime = time.perf_counter()
 
-        # Get time and find the index of the simulation
+        # Get time and find the index of the simulation (the first time step after currentTime,
+        # 0 once past the end of the log)
         currentTime = time.perf_counter()-canvas.startTime
-        idx_now = np.argmax(t_all > currentTime)
+        idx_now = np.searchsorted(t_all, currentTime, side="right")
+        if (idx_now == len(t_all)):
+            idx_now = 0
 
         if (idx_now < canvas.idx_prev):
             # Stop animation
@@ -98,58 +250,7 @@ def third_PV_animation(t_all, waypoints, pos_all, quat_all, euler_all, sDes_tr_a
             canvas.figs_displayed = True
             figures()
         else:
-            # Get drone state for current time
-            Simtime = t_all[idx_now]
-            pos = pos_all[idx_now]
-            x = pos[0]
-            y = pos[1]
-            z = pos[2]
-            x_from0 = pos_all[0:idx_now+1, 0]
-            y_from0 = pos_all[0:idx_now+1, 1]
-            z_from0 = pos_all[0:idx_now+1, 2]
-            quat = quat_all[idx_now]
-
-            # Determine by how much yaw (psi) has changed since last frame
-            if (idx_now==0):
-                psi_diff = 0
-            else:
-                psi_diff = (euler_all[idx_now,2] - euler_all[canvas.idx_prev,2])*rad2deg
-        
-            # Normal NED frame changes
-            if (config.orient == "NED"):
-                z = -z
-                z_from0 = -z_from0
-                quat = np.array([quat[0], -quat[1], -quat[2], quat[3]])
-                psi_diff = -psi_diff
-        
-            # Find motor positions
-            R = utils.quat2Dcm(quat)    
-            motorPoints = np.array([[dxm, -dym, dzm], [0, 0, 0], [dxm, dym, dzm], [-dxm, dym, dzm], [0, 0, 0], [-dxm, -dym, dzm]])
-            motorPoints = np.dot(R, np.transpose(motorPoints))
-            motorPoints[0,:] = motorPoints[0,:] + x 
-            motorPoints[1,:] = motorPoints[1,:] + y 
-            motorPoints[2,:] = motorPoints[2,:] + z 
-            
-            # Draw quadrotor and past trajectory
-            line1.set_data(np.array([motorPoints[0, 0:3], motorPoints[1, 0:3], motorPoints[2, 0:3]]).T, marker_size=0,)
-            line2.set_data(np.array([motorPoints[0, 3:6], motorPoints[1, 3:6], motorPoints[2, 3:6]]).T, marker_size=0,)
-            line3.set_data(np.array([x_from0, y_from0, z_from0]).T, marker_size=0)
-
-            # Move field markers
-            redPoints = np.where(inField_all[idx_now,:])[0]
-            if np.setdiff1d(redPoints, canvas.redPoints).size != 0:
-                canvas.redPoints = redPoints
-                scatter_field.set_visible_boxes(redPoints)
-
-            # Change camera angle and position
-            view.camera.azimuth = view.camera.azimuth + psi_diff
-            view.camera.center = [x, y, z]
-            
-            # Update view
-            view.camera.view_changed()
-            
-            # Set previous index
-            canvas.idx_prev = idx_now
+            drawFrame(idx_now)
     
     canvas.timer.connect(update)
     canvas.timer.start()
@@ -10,7 +10,6 @@ import numpy as np
 from numpy import pi
 import matplotlib.pyplot as plt
 import utils
-import config
 
 rad2deg = 180.0/pi
 deg2rad = pi/180.0
@@ -86,14 +85,10 @@ def makeFigures(params, time, pos_all, vel_all, quat_all, omega_all, euler_all,
     y_err = y_sp - y
     z_err = z_sp - z
 
-    psiDes   = np.zeros(q0Des.shape[0])
-    thetaDes = np.zeros(q0Des.shape[0])
-    phiDes   = np.zeros(q0Des.shape[0])
-    for ii in range(q0Des.shape[0]):
-        YPR = utils.quatToYPR_ZYX(sDes_calc[ii,9:13])
-        psiDes[ii]   = YPR[0]*rad2deg
-        thetaDes[ii] = YPR[1]*rad2deg
-        phiDes[ii]   = YPR[2]*rad2deg
+    YPRDes   = utils.quatToYPR_ZYX(sDes_calc[:,9:13])*rad2deg
+    psiDes   = YPRDes[:,0]
+    thetaDes = YPRDes[:,1]
+    phiDes   = YPRDes[:,2]
     
     plt.show()
 
@@ -218,6 +213,6 @@ def makeFigures(params, time, pos_all, vel_all, quat_all, omega_all, euler_all,
     plt.gca().set_aspect('equal', adjustable='box')
     plt.xlabel('x (m)')
     plt.ylabel('y (m)')
-    if (config.orient == "NED"):
+    if (params["orient"] == "NED"):
         plt.gca().invert_yaxis()
     plt.draw()
\ No newline at end of file
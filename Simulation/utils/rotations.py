@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Quaternion and rotation functions, for one rotation or for N rotations at once.
+# Every function takes a single quaternion (4,) / vector (3,) / rotation matrix (3, 3), or
+# stacks of them, (N, 4) / (N, 3) / (N, 3, 3), and returns the same kind of stack.
+#   single:  scalar kernel, the components are read as Python floats and written one by
+#            one in the result, no intermediate array (no allocation at all with "out")
+#   stacked: whole-array operations on the component columns (no loop over the rotations)
+# The optional "out" argument is the array in which the result is written (and returned).
+# Quaternions are [q0 q1 q2 q3] = [w x y z], Euler angles are YPR = [psi, theta, phi] (ZYX).
+# Compared to the previous utils functions, RotToQuat keeps e0 = 0 as it is (instead of
+# returning NaN) and quatToYPR_ZYX clips the sine of the pitch to [-1, 1] (numerical drift).
+
+import numpy as np
+from math import sqrt, atan2, asin, copysign
+
+
+# Normalize quaternion, or any vector
+def vectNormalize(q, out=None):
+    q = np.asarray(q, dtype=float)
+    if (q.ndim == 1):
+        return np.divide(q, sqrt(np.dot(q, q)), out=out)
+    return np.divide(q, np.sqrt(np.einsum("ij,ij->i", q, q))[:,np.newaxis], out=out)
+
+
+# Cross product of 3-vectors (same as np.cross)
+def cross(a, b, out=None):
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if (a.ndim == 1 and b.ndim == 1):
+        a0, a1, a2 = a.tolist()
+        b0, b1, b2 = b.tolist()
+        if out is None:
+            out = np.empty(3)
+        out[0] = a1*b2 - a2*b1
+        out[1] = a2*b0 - a0*b2
+        out[2] = a0*b1 - a1*b0
+        return out
+
+    a = np.atleast_2d(a)
+    b = np.atleast_2d(b)
+    if out is None:
+        out = np.empty([max(len(a), len(b)), 3])
+    a0, a1, a2 = a[:,0], a[:,1], a[:,2]
+    b0, b1, b2 = b[:,0], b[:,1], b[:,2]
+    out[:,0] = a1*b2 - a2*b1
+    out[:,1] = a2*b0 - a0*b2
+    out[:,2] = a0*b1 - a1*b0
+    return out
+
+
+# Quaternion multiplication (q*p)
+def quatMultiply(q, p, out=None):
+    q = np.asarray(q, dtype=float)
+    p = np.asarray(p, dtype=float)
+    if (q.ndim == 1 and p.ndim == 1):
+        q0, q1, q2, q3 = q.tolist()
+        p0, p1, p2, p3 = p.tolist()
+        if out is None:
+            out = np.empty(4)
+        out[0] = q0*p0 - q1*p1 - q2*p2 - q3*p3
+        out[1] = q1*p0 + q0*p1 - q3*p2 + q2*p3
+        out[2] = q2*p0 + q3*p1 + q0*p2 - q1*p3
+        out[3] = q3*p0 - q2*p1 + q1*p2 + q0*p3
+        return out
+
+    q = np.atleast_2d(q)
+    p = np.atleast_2d(p)
+    if out is None:
+        out = np.empty([max(len(q), len(p)), 4])
+    q0, q1, q2, q3 = q[:,0], q[:,1], q[:,2], q[:,3]
+    p0, p1, p2, p3 = p[:,0], p[:,1], p[:,2], p[:,3]
+    out[:,0] = q0*p0 - q1*p1 - q2*p2 - q3*p3
+    out[:,1] = q1*p0 + q0*p1 - q3*p2 + q2*p3
+    out[:,2] = q2*p0 + q3*p1 + q0*p2 - q1*p3
+    out[:,3] = q3*p0 - q2*p1 + q1*p2 + q0*p3
+    return out
+
+
+# Inverse quaternion (conjugate divided by the norm)
+def inverse(q, out=None):
+    q = np.asarray(q, dtype=float)
+    if (q.ndim == 1):
+        q0, q1, q2, q3 = q.tolist()
+        n = sqrt(q0*q0 + q1*q1 + q2*q2 + q3*q3)
+        if out is None:
+            out = np.empty(4)
+        out[0] = q0/n
+        out[1] = -q1/n
+        out[2] = -q2/n
+        out[3] = -q3/n
+        return out
+
+    n = np.sqrt(np.einsum("ij,ij->i", q, q))[:,np.newaxis]
+    return np.divide(q*np.array([1.0, -1.0, -1.0, -1.0]), n, out=out)
+
+
+# Rotation matrix (Direct Cosine Matrix) of a quaternion
+def quat2Dcm(q, out=None):
+    q = np.asarray(q, dtype=float)
+    if (q.ndim == 1):
+        q0, q1, q2, q3 = q.tolist()
+        if out is None:
+            out = np.empty([3, 3])
+        out[0,0] = q0*q0 + q1*q1 - q2*q2 - q3*q3
+        out[0,1] = 2.0*(q1*q2 - q0*q3)
+        out[0,2] = 2.0*(q1*q3 + q0*q2)
+        out[1,0] = 2.0*(q1*q2 + q0*q3)
+        out[1,1] = q0*q0 - q1*q1 + q2*q2 - q3*q3
+        out[1,2] = 2.0*(q2*q3 - q0*q1)
+        out[2,0] = 2.0*(q1*q3 - q0*q2)
+        out[2,1] = 2.0*(q2*q3 + q0*q1)
+        out[2,2] = q0*q0 - q1*q1 - q2*q2 + q3*q3
+        return out
+
+    if out is None:
+        out = np.empty([len(q), 3, 3])
+    q0, q1, q2, q3 = q[:,0], q[:,1], q[:,2], q[:,3]
+    out[:,0,0] = q0*q0 + q1*q1 - q2*q2 - q3*q3
+    out[:,0,1] = 2.0*(q1*q2 - q0*q3)
+    out[:,0,2] = 2.0*(q1*q3 + q0*q2)
+    out[:,1,0] = 2.0*(q1*q2 + q0*q3)
+    out[:,1,1] = q0*q0 - q1*q1 + q2*q2 - q3*q3
+    out[:,1,2] = 2.0*(q2*q3 - q0*q1)
+    out[:,2,0] = 2.0*(q1*q3 - q0*q2)
+    out[:,2,1] = 2.0*(q2*q3 + q0*q1)
+    out[:,2,2] = q0*q0 - q1*q1 - q2*q2 + q3*q3
+    return out
+
+
+# Quaternion of a rotation matrix (from page 68 of MotionGenesis book)
+def RotToQuat(R, out=None):
+    R = np.asarray(R, dtype=float)
+    if (R.ndim == 2):
+        (R11, R12, R13), (R21, R22, R23), (R31, R32, R33) = R.tolist()
+        tr = R11 + R22 + R33
+
+        if tr > R11 and tr > R22 and tr > R33:
+            e0 = 0.5 * sqrt(1 + tr)
+            r = 0.25 / e0
+            e1 = (R32 - R23) * r
+            e2 = (R13 - R31) * r
+            e3 = (R21 - R12) * r
+        elif R11 > R22 and R11 > R33:
+            e1 = 0.5 * sqrt(1 - tr + 2*R11)
+            r = 0.25 / e1
+            e0 = (R32 - R23) * r
+            e2 = (R12 + R21) * r
+            e3 = (R13 + R31) * r
+        elif R22 > R33:
+            e2 = 0.5 * sqrt(1 - tr + 2*R22)
+            r = 0.25 / e2
+            e0 = (R13 - R31) * r
+            e1 = (R12 + R21) * r
+            e3 = (R23 + R32) * r
+        else:
+            e3 = 0.5 * sqrt(1 - tr + 2*R33)
+            r = 0.25 / e3
+            e0 = (R21 - R12) * r
+            e1 = (R13 + R31) * r
+            e2 = (R23 + R32) * r
+
+        # Positive scalar part, then normalize
+        s = copysign(1.0, e0)
+        e0, e1, e2, e3 = e0*s, e1*s, e2*s, e3*s
+        n = sqrt(e0*e0 + e1*e1 + e2*e2 + e3*e3)
+        if out is None:
+            out = np.empty(4)
+        out[0] = e0/n
+        out[1] = e1/n
+        out[2] = e2/n
+        out[3] = e3/n
+        return out
+
+    R11, R12, R13 = R[:,0,0], R[:,0,1], R[:,0,2]
+    R21, R22, R23 = R[:,1,0], R[:,1,1], R[:,1,2]
+    R31, R32, R33 = R[:,2,0], R[:,2,1], R[:,2,2]
+    tr = R11 + R22 + R33
+
+    # Branch of every matrix (the largest of the trace and the diagonal terms), as masks
+    case0 = (tr > R11) & (tr > R22) & (tr > R33)
+    case1 = ~case0 & (R11 > R22) & (R11 > R33)
+    case2 = ~case0 & ~case1 & (R22 > R33)
+
+    # The largest component, then the others from it
+    big = np.where(case0, 1 + tr, np.where(case1, 1 - tr + 2*R11, np.where(case2, 1 - tr + 2*R22, 1 - tr + 2*R33)))
+    big = 0.5*np.sqrt(big)
+    r = 0.25/big
+    if out is None:
+        out = np.empty([len(R), 4])
+    out[:,0] = np.where(case0, big, np.where(case1, (R32 - R23)*r, np.where(case2, (R13 - R31)*r, (R21 - R12)*r)))
+    out[:,1] = np.where(case0, (R32 - R23)*r, np.where(case1, big, np.where(case2, (R12 + R21)*r, (R13 + R31)*r)))
+    out[:,2] = np.where(case0, (R13 - R31)*r, np.where(case1, (R12 + R21)*r, np.where(case2, big, (R23 + R32)*r)))
+    out[:,3] = np.where(case0, (R21 - R12)*r, np.where(case1, (R13 + R31)*r, np.where(case2, (R23 + R32)*r, big)))
+
+    # Positive scalar part, then normalize
+    out *= np.copysign(1.0, out[:,0])[:,np.newaxis]
+    out /= np.sqrt(np.einsum("ij,ij->i", out, out))[:,np.newaxis]
+    return out
+
+
+# Yaw, pitch and roll (ZYX) of a quaternion, YPR = [psi, theta, phi]
+def quatToYPR_ZYX(q, out=None):
+    q = np.asarray(q, dtype=float)
+    if (q.ndim == 1):
+        q0, q1, q2, q3 = q.tolist()
+        if out is None:
+            out = np.empty(3)
+        out[0] = atan2(2.0*(q1*q2 + q0*q3), q0*q0 + q1*q1 - q2*q2 - q3*q3)
+        out[1] = asin(min(max(-2.0*(q1*q3 - q0*q2), -1.0), 1.0))
+        out[2] = atan2(2.0*(q2*q3 + q0*q1), q0*q0 - q1*q1 - q2*q2 + q3*q3)
+        return out
+
+    if out is None:
+        out = np.empty([len(q), 3])
+    q0, q1, q2, q3 = q[:,0], q[:,1], q[:,2], q[:,3]
+    out[:,0] = np.arctan2(2.0*(q1*q2 + q0*q3), q0*q0 + q1*q1 - q2*q2 - q3*q3)
+    out[:,1] = np.arcsin(np.clip(-2.0*(q1*q3 - q0*q2), -1.0, 1.0))
+    out[:,2] = np.arctan2(2.0*(q2*q3 + q0*q1), q0*q0 - q1*q1 - q2*q2 + q3*q3)
+    return out
@@ -1,4 +1,6 @@
 from .boxmarkers import BoxMarkers
 from .varvismesh import VarVisMeshVisual
 from .smallmods import MyScene, ColorMarkers, NonUpdatingTurntable
-
+from .instancedboxmarkers import InstancedBoxMarkers
+from .chunkedboxmarkers import ChunkedBoxMarkers
+from .trail import TrailLine
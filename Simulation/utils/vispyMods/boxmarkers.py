@@ -79,47 +79,17 @@ class BoxMarkersVisual(CompoundVisual):
         self.nb_fi = self.filled_indices_box.shape[0]
         self.nb_oi = self.outline_indices_box.shape[0]
 
-        # Create empty arrays for vertices, filled_indices and outline_indices
-        vertices = np.zeros(self.nb_v*point_coords.shape[0],
-                        [('position', np.float32, 3),
-                         ('texcoord', np.float32, 2),
-                         ('normal', np.float32, 3),
-                         ('color', np.float32, 4)])
-        filled_indices = np.zeros([self.nb_fi*point_coords.shape[0], 3], np.uint32)
-        outline_indices = np.zeros([self.nb_oi*point_coords.shape[0], 2], np.uint32)
+        # Vertices, filled_indices and outline_indices of all the boxes
+        vertices, filled_indices, outline_indices = self._make_boxes(point_coords, scale)
         if self.variable_vis:
-            # "box_to_face" and "box_to_outl" represent array of faces and 
-            # outlines indexes associated to each box
-            box_to_face = np.zeros([point_coords.shape[0], self.nb_fi], np.uint32)
-            box_to_outl = np.zeros([point_coords.shape[0], self.nb_oi], np.uint32)
-
-        # Iterate for every marker
-        for i in range(self.nb_points):
-            idx_v_start  = self.nb_v*i
-            idx_v_end    = self.nb_v*(i+1)
-            idx_fi_start = self.nb_fi*i
-            idx_fi_end   = self.nb_fi*(i+1)
-            idx_oi_start = self.nb_oi*i
-            idx_oi_end   = self.nb_oi*(i+1)
-
-            # Scale and translate unit box
-            vertices[idx_v_start:idx_v_end]['position'] = self.vertices_box['position']*scale + point_coords[i]
-            filled_indices[idx_fi_start:idx_fi_end] = self.filled_indices_box + idx_v_start
-            outline_indices[idx_oi_start:idx_oi_end] = self.outline_indices_box + idx_v_start
-            if self.variable_vis:
-                box_to_face[i,:] = np.arange(idx_fi_start,idx_fi_end)
-                box_to_outl[i,:] = np.arange(idx_oi_start,idx_oi_end)
-        
-        if self.variable_vis:
-            self.box_to_face = box_to_face
-            self.box_to_outl = box_to_outl
             self._visible_boxes = np.arange(self.nb_points)
+            self._box_vis = np.ones(self.nb_points, dtype=bool)
 
         # Create MeshVisual for faces and borders
-        self._mesh = VarVisMeshVisual(self.nb_points, vertices['position'], filled_indices,
+        self._mesh = VarVisMeshVisual(self.nb_points, vertices, filled_indices,
                                 vertex_colors, face_colors, color, variable_vis=variable_vis)
         if edge_color:
-            self._border = VarVisMeshVisual(self.nb_points, vertices['position'], outline_indices,
+            self._border = VarVisMeshVisual(self.nb_points, vertices, outline_indices,
                                       color=edge_color, mode='lines', variable_vis=variable_vis)
         else:
             self._border = VarVisMeshVisual(self.nb_points)
@@ -131,6 +101,25 @@ class BoxMarkersVisual(CompoundVisual):
         self.freeze()
 
 
+    def _make_boxes(self, point_coords, scale):
+        """Vertices, filled indices and outline indices of the boxes at
+        point_coords (the unit box is scaled, then copied at every point).
+        """
+        nb_points = point_coords.shape[0]
+        vertices = (self.vertices_box['position']*scale)[np.newaxis,:,:] + np.asarray(point_coords)[:,np.newaxis,:]
+        offsets = (np.arange(nb_points, dtype=np.uint32)*self.nb_v)[:,np.newaxis,np.newaxis]
+        filled_indices = self.filled_indices_box[np.newaxis,:,:] + offsets
+        outline_indices = self.outline_indices_box[np.newaxis,:,:] + offsets
+        return (vertices.reshape(-1, 3).astype(np.float32), filled_indices.reshape(-1, 3).astype(np.uint32),
+                outline_indices.reshape(-1, 2).astype(np.uint32))
+
+    def _box_elements(self, idx_box, nb_elements):
+        """Indexes of the faces (or outlines) of the boxes idx_box, each box
+        having nb_elements consecutive faces (or outlines).
+        """
+        idx_box = np.asarray(idx_box, dtype=np.int64)
+        return np.ravel(idx_box[:,np.newaxis]*nb_elements + np.arange(nb_elements))
+
     def set_visible_boxes(self, idx_box_vis):
         """Set which boxes are visible.
         
@@ -145,16 +134,20 @@ class BoxMarkersVisual(CompoundVisual):
             raise ValueError('Variable visibility must be enabled via "variable_vis"')
         
         # Find which boxes are now visible that weren't last update of 'self.visible_boxes',
-        # and vice-versa
-        newbox_vis = np.setdiff1d(idx_box_vis, self.visible_boxes)
-        oldbox_vis = np.setdiff1d(self.visible_boxes, idx_box_vis)
+        # and vice-versa (with the visibility flag of every box, in a time proportional to
+        # the number of visible boxes, not to the number of boxes)
+        idx_box_vis = np.asarray(idx_box_vis, dtype=np.int64)
+        newbox_vis = idx_box_vis[~self._box_vis[idx_box_vis]]
+        self._box_vis[self.visible_boxes] = False
+        self._box_vis[idx_box_vis] = True
+        oldbox_vis = self.visible_boxes[~self._box_vis[self.visible_boxes]]
         
         # Get the new visible vertices indexes for the faces (mesh) and outlines (border)
         # and the new invisible vertices indexes
-        idx_face_vis = np.ravel(self.box_to_face[newbox_vis])
-        idx_outl_vis = np.ravel(self.box_to_outl[newbox_vis])
-        idx_face_invis = np.ravel(self.box_to_face[oldbox_vis])
-        idx_outl_invis = np.ravel(self.box_to_outl[oldbox_vis])
+        idx_face_vis = self._box_elements(newbox_vis, self.nb_fi)
+        idx_outl_vis = self._box_elements(newbox_vis, self.nb_oi)
+        idx_face_invis = self._box_elements(oldbox_vis, self.nb_fi)
+        idx_outl_invis = self._box_elements(oldbox_vis, self.nb_oi)
 
         # Update mesh visibility bool array
         self.mesh.set_visible_faces(idx_face_vis)
@@ -199,47 +192,17 @@ class BoxMarkersVisual(CompoundVisual):
 
         self.nb_points = point_coords.shape[0]
 
-        # Create empty arrays for vertices, filled_indices and outline_indices
-        vertices = np.zeros(self.nb_v*point_coords.shape[0],
-                        [('position', np.float32, 3),
-                         ('texcoord', np.float32, 2),
-                         ('normal', np.float32, 3),
-                         ('color', np.float32, 4)])
-        filled_indices = np.zeros([self.nb_fi*point_coords.shape[0], 3], np.uint32)
-        outline_indices = np.zeros([self.nb_oi*point_coords.shape[0], 2], np.uint32)
-        if self.variable_vis:
-            # "box_to_face" and "box_to_outl" represent array of faces and 
-            # outlines indexes associated to each box
-            box_to_face = np.zeros([point_coords.shape[0], self.nb_fi], np.uint32)
-            box_to_outl = np.zeros([point_coords.shape[0], self.nb_oi], np.uint32)
-
         scale = np.array([width, height, depth])
 
-        # Iterate for every marker
-        for i in range(point_coords.shape[0]):
-            idx_v_start  = self.nb_v*i
-            idx_v_end    = self.nb_v*(i+1)
-            idx_fi_start = self.nb_fi*i
-            idx_fi_end   = self.nb_fi*(i+1)
-            idx_oi_start = self.nb_oi*i
-            idx_oi_end   = self.nb_oi*(i+1)
-
-            # Scale and translate unit box
-            vertices[idx_v_start:idx_v_end]['position'] = self.vertices_box['position']*scale + point_coords[i]
-            filled_indices[idx_fi_start:idx_fi_end] = self.filled_indices_box + idx_v_start
-            outline_indices[idx_oi_start:idx_oi_end] = self.outline_indices_box + idx_v_start
-            if self.variable_vis:
-                box_to_face[i,:] = np.arange(idx_fi_start,idx_fi_end)
-                box_to_outl[i,:] = np.arange(idx_oi_start,idx_oi_end)
-
+        # Vertices, filled_indices and outline_indices of all the boxes
+        vertices, filled_indices, outline_indices = self._make_boxes(point_coords, scale)
         if self.variable_vis:
-            self.box_to_face = box_to_face
-            self.box_to_outl = box_to_outl
             self._visible_boxes = np.arange(self.nb_points)
+            self._box_vis = np.ones(self.nb_points, dtype=bool)
 
         # Create MeshVisual for faces and borders
-        self.mesh.set_data(vertices['position'], filled_indices, vertex_colors, face_colors, color)
-        self.border.set_data(vertices['position'], outline_indices, color=edge_color)
+        self.mesh.set_data(vertices, filled_indices, vertex_colors, face_colors, color)
+        self.border.set_data(vertices, outline_indices, color=edge_color)
 
     
     @property
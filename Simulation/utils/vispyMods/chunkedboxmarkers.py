@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+# Point cloud split in cubic chunks, drawn with a level of detail per chunk.
+# The points are sorted by chunk, so that every chunk is a run of consecutive points, in all
+# the points (full detail) and in 1 point out of "decimation" of every chunk (decimated).
+# At every frame, the distance of every chunk (its bounding sphere) to the camera center sets
+# its level of detail:
+#   2: within near_dist, full detail
+#   1: within far_dist, decimated (without edges)
+#   0: farther, not drawn
+# Two InstancedBoxMarkers only hold the points of the chunks drawn at full detail and
+# decimated: the GPU work scales with the drawn points, not with the point cloud. Their
+# instance buffers are rebuilt (the drawn runs of points, concatenated) when a chunk changes
+# level.
+
+import numpy as np
+
+from .instancedboxmarkers import InstancedBoxMarkers
+
+
+class ChunkedBoxMarkers:
+    def __init__(self, point_coords, width, height, depth, color=(0.5, 0.5, 1, 1), edge_color=None, parent=None,
+                 chunk_size=8.0, near_dist=15.0, far_dist=60.0, decimation=8):
+
+        point_coords = np.asarray(point_coords, dtype=float)
+        self.near_dist = near_dist
+        self.far_dist = far_dist
+
+        # Chunk of every point, and points sorted by chunk
+        keys = np.floor(point_coords/chunk_size).astype(np.int64)
+        key_min = keys.min(axis=0)
+        dims = keys.max(axis=0) - key_min + 1
+        linear = np.ravel_multi_index((keys - key_min).T, dims)
+        chunk_linear, chunk_of_point, counts = np.unique(linear, return_inverse=True, return_counts=True)
+        order = np.argsort(chunk_of_point, kind="stable")
+        sorted_points = point_coords[order]
+        self.nb_chunks = chunk_linear.shape[0]
+        self.chunk_centers = (np.array(np.unravel_index(chunk_linear, dims)).T + key_min + 0.5)*chunk_size
+        self.chunk_radius = 0.5*np.sqrt(3)*chunk_size
+
+        # Range of points of every chunk (full detail)
+        self.full_end = np.cumsum(counts)
+        self.full_start = self.full_end - counts
+
+        # Decimated points, 1 out of "decimation" of every chunk (the first one included)
+        rank = np.arange(len(order)) - np.repeat(self.full_start, counts)
+        keep = (rank % decimation == 0)
+        dec_counts = (counts + decimation - 1)//decimation
+        self.dec_end = np.cumsum(dec_counts)
+        self.dec_start = self.dec_end - dec_counts
+
+        # Sorted and decimated points (float32, as in the instance buffers)
+        self.sorted_points = sorted_points.astype(np.float32)
+        self.dec_points = self.sorted_points[keep]
+
+        # Nothing drawn before the first update
+        no_points = np.zeros([0, 3])
+        self.full = InstancedBoxMarkers(no_points, width, height, depth,
+                                        color=color, edge_color=edge_color, parent=parent)
+        self.decimated = InstancedBoxMarkers(no_points, width, height, depth,
+                                             color=color, parent=parent)
+        self.lod = np.zeros(self.nb_chunks, dtype=np.int8)
+
+
+    def update(self, center):
+        # Level of detail of every chunk for the camera center, and instance buffers of the
+        # visuals with chunks changing level
+        dist = np.sqrt(np.sum((self.chunk_centers - center)**2, axis=1)) - self.chunk_radius
+        lod = np.where(dist < self.near_dist, 2, np.where(dist < self.far_dist, 1, 0)).astype(np.int8)
+
+        if ((lod == 2) != (self.lod == 2)).any():
+            drawn = (lod == 2)
+            self.full.set_data(self.sorted_points[runs_index(self.full_start[drawn], self.full_end[drawn])])
+        if ((lod == 1) != (self.lod == 1)).any():
+            drawn = (lod == 1)
+            self.decimated.set_data(self.dec_points[runs_index(self.dec_start[drawn], self.dec_end[drawn])])
+        self.lod = lod
+
+
+def runs_index(start, end):
+    # Indexes of the runs start[i] to end[i] (excluded), concatenated
+    counts = end - start
+    return np.arange(counts.sum()) + np.repeat(start - (np.cumsum(counts) - counts), counts)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Code heavily inspired by:
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+#
+# Modified by:
+# author: John Bass
+# email: john.bobzwik@gmail.com
+# license: MIT
+# Please feel free to use and modify this, but keep the above information. Thanks!
+# -----------------------------------------------------------------------------
+
+""" Box markers drawn with instancing: one unit box, and an offset and a
+visibility per box.
+"""
+import numpy as np
+
+from vispy.geometry import create_box
+from vispy.gloo import VertexBuffer, IndexBuffer
+from vispy.visuals.visual import Visual, CompoundVisual
+from vispy.scene.visuals import create_visual_node
+from vispy.color import Color
+from .varvismesh import contiguous_runs
+
+
+# Shader code: the unit box is scaled and moved to the offset of its instance.
+# The invisible instances are moved out of the clip volume (nothing to rasterize).
+vertex_template = """
+void main() {
+    vec3 pos = $position*$scale + $offset;
+    gl_Position = $transform(vec4(pos, 1.0));
+    if ($visible < 0.5) {
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0);
+    }
+}
+"""
+
+fragment_template = """
+void main() {
+    gl_FragColor = $color;
+}
+"""
+
+
+class InstancedBoxPartVisual(Visual):
+    """Faces ('triangles') or outlines ('lines') of the instanced boxes.
+
+    Parameters
+    ----------
+    vertices : VertexBuffer
+        Vertices of the unit box.
+    indices : array_like
+        Filled or outline indices of the unit box.
+    offsets : VertexBuffer
+        Position of every box (instance attribute).
+    visible : VertexBuffer
+        Visibility of every box, 1 or 0 (instance attribute).
+    scale : array_like
+        Width, height and depth of the boxes.
+    color : Color
+        The `Color` of the faces or outlines.
+    mode : str
+        The drawing mode.
+    """
+
+    def __init__(self, vertices, indices, offsets, visible, scale, color, mode='triangles', **kwargs):
+        Visual.__init__(self, vcode=vertex_template, fcode=fragment_template, **kwargs)
+        self.set_gl_state('translucent', depth_test=True, cull_face=False)
+        self._draw_mode = mode
+        self._index_buffer = IndexBuffer(np.ascontiguousarray(indices, dtype=np.uint32))
+        self._program.vert['position'] = vertices
+        self._program.vert['offset'] = offsets
+        self._program.vert['visible'] = visible
+        self._program.vert['scale'] = tuple(np.asarray(scale, dtype=float))
+        self._program.frag['color'] = Color(color).rgba
+        self.freeze()
+
+    def _prepare_transforms(self, view):
+        view.view_program.vert['transform'] = view.transforms.get_transform()
+
+    def _prepare_draw(self, view):
+        if (self._program.vert['offset'].value.size == 0):
+            return False
+
+
+class InstancedBoxMarkersVisual(CompoundVisual):
+    """Visual that displays a box at every point, with instanced rendering.
+
+    Same usage as BoxMarkersVisual, but the GPU only stores one unit box, the
+    position of every box and its visibility (a float per box). The cost of
+    building it and of changing the visible boxes doesn't depend on the
+    number of vertices of a box.
+
+    Parameters
+    ----------
+    point_coords : array_like
+        Marker coordinates
+    width : float
+        Box width.
+    height : float
+        Box height.
+    depth : float
+        Box depth.
+    color : Color
+        The `Color` to use when drawing the cube faces.
+    edge_color : tuple or Color
+        The `Color` to use when drawing the cube edges. If `None`, then no
+        cube edges are drawn.
+    variable_vis : bool
+        If the visibility of the boxes can be changed (set_visible_boxes).
+    """
+
+    def __init__(self, point_coords=np.array([[0,0,0]]), width=1, height=1, depth=1,
+                 color=(0.5, 0.5, 1, 1), edge_color=None, variable_vis=False, **kwargs):
+
+        self.point_coords = point_coords
+        self.nb_points = point_coords.shape[0]
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.color = color
+        self._variable_vis = variable_vis
+
+        # Unit box (shared by all the instances)
+        vertices_box, filled_indices_box, outline_indices_box = create_box(1, 1, 1)
+        self._vertices = VertexBuffer(np.ascontiguousarray(vertices_box['position'], dtype=np.float32))
+
+        # Instance attributes
+        self._offsets = VertexBuffer(np.ascontiguousarray(point_coords, dtype=np.float32), divisor=1)
+        self._box_visible = np.ones(self.nb_points, dtype=np.float32)
+        self._visible_vbo = VertexBuffer(self._box_visible, divisor=1)
+        if variable_vis:
+            self._visible_boxes = np.arange(self.nb_points)
+
+        scale = (width, height, depth)
+        self._mesh = InstancedBoxPartVisual(self._vertices, filled_indices_box, self._offsets,
+                                            self._visible_vbo, scale, color)
+        subvisuals = [self._mesh]
+        self._border = None
+        if edge_color:
+            self._border = InstancedBoxPartVisual(self._vertices, outline_indices_box, self._offsets,
+                                                  self._visible_vbo, scale, edge_color, mode='lines')
+            subvisuals.append(self._border)
+
+        CompoundVisual.__init__(self, subvisuals, **kwargs)
+        self.mesh.set_gl_state(polygon_offset_fill=True,
+                               polygon_offset=(1, 1), depth_test=True)
+
+        self.freeze()
+
+
+    def set_visible_boxes(self, idx_box_vis):
+        """Set which boxes are visible.
+
+        Parameters
+        ----------
+
+        idx_box_vis : Array like
+            Index array of ALL visible boxes of point_coords
+        """
+
+        if not self.variable_vis:
+            raise ValueError('Variable visibility must be enabled via "variable_vis"')
+
+        # Only the runs of consecutive boxes changed are uploaded
+        idx_box_vis = np.asarray(idx_box_vis, dtype=np.int64)
+        self._box_visible[self.visible_boxes] = 0
+        self._box_visible[idx_box_vis] = 1
+        for start, end in contiguous_runs(np.hstack((self.visible_boxes, idx_box_vis))):
+            self._visible_vbo.set_subdata(self._box_visible[start:end], offset=start)
+        self.update()
+
+        self.visible_boxes = idx_box_vis
+
+
+    def set_data(self, point_coords):
+        """Move the boxes (the number of boxes can change).
+
+        Parameters
+        ----------
+        point_coords : array_like
+            Marker coordinates
+        """
+        self.point_coords = point_coords
+        self.nb_points = point_coords.shape[0]
+        self._offsets.set_data(np.ascontiguousarray(point_coords, dtype=np.float32))
+        self._box_visible = np.ones(self.nb_points, dtype=np.float32)
+        self._visible_vbo.set_data(self._box_visible)
+        if self.variable_vis:
+            self._visible_boxes = np.arange(self.nb_points)
+        self.update()
+
+    def _compute_bounds(self, axis, view):
+        if (self.nb_points == 0):
+            return None
+        data = self.point_coords[:,axis]
+        return data.min(), data.max()
+
+
+    @property
+    def variable_vis(self):
+        """Bool if instance of InstancedBoxMarkersVisual posseses variable visibility.
+        """
+        return self._variable_vis
+
+    @variable_vis.setter
+    def variable_vis(self, variable_vis):
+        raise ValueError('Not allowed to change "variable_vis" after initialization.')
+
+    @property
+    def visible_boxes(self):
+        """Array of indexes of boxes that are currently visible.
+        """
+        if not self.variable_vis:
+            raise ValueError('Variable visibility must be enabled via "variable_vis".')
+        return self._visible_boxes
+
+    @visible_boxes.setter
+    def visible_boxes(self, visible_boxes):
+        if not self.variable_vis:
+            raise ValueError('Variable visibility must be enabled via "variable_vis".')
+        self._visible_boxes = visible_boxes
+
+    @property
+    def mesh(self):
+        """The Visual that draws the faces.
+        """
+        return self._mesh
+
+    @property
+    def border(self):
+        """The Visual that draws the outlines (None without edge_color).
+        """
+        return self._border
+
+
+InstancedBoxMarkers = create_visual_node(InstancedBoxMarkersVisual)
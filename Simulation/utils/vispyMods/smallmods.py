@@ -21,22 +21,21 @@ from vispy.color import ColorArray
 from vispy.util import keys
 from vispy.scene.cameras.perspective import PerspectiveCamera
 
-import config
 
 ###################################
 # SceneCanvas object with added parameters for the pointcloud
 
 class MyScene(vispy.scene.SceneCanvas):
-    def __init__(self, pointcloud, **kwargs):
+    def __init__(self, pointcloud, orient="NED", **kwargs):
         super(MyScene, self).__init__(**kwargs)
         self.unfreeze()
-        self.pointcloud = pointcloud
+        self.pointcloud = np.array(pointcloud, dtype=float)   # Copy, the given point cloud can be read-only
         self.startTime  = None
         self.idx_prev = 0
         self.yellowPoints = []
         self.redPoints = []
 
-        if (config.orient == "NED"):
+        if (orient == "NED"):
             self.pointcloud[:,2] = -self.pointcloud[:,2]
         
         # Boolean for figure display
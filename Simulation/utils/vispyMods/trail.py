@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Code heavily inspired by:
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+#
+# Modified by:
+# author: John Bass
+# email: john.bobzwik@gmail.com
+# license: MIT
+# Please feel free to use and modify this, but keep the above information. Thanks!
+# -----------------------------------------------------------------------------
+
+""" A line strip Visual for a trajectory that grows, in an append-only vertex buffer.
+"""
+import numpy as np
+
+from vispy import gloo
+from vispy.visuals.visual import Visual
+from vispy.scene.visuals import create_visual_node
+from vispy.color import Color
+
+
+vertex_template = """
+void main(void) {
+    gl_Position = $transform(vec4($position, 1.0));
+}
+"""
+
+fragment_template = """
+void main() {
+    gl_FragColor = $color;
+}
+"""
+
+
+class TrailLineVisual(Visual):
+    """Visual that displays the past trajectory as a line strip.
+
+    The vertices are kept in a preallocated vertex buffer. Only the new
+    vertices are uploaded (``append``) and only the filled part of the buffer
+    is drawn, so the cost of a frame doesn't grow with the trajectory length.
+    The buffer capacity is doubled when it is full.
+
+    Parameters
+    ----------
+    capacity : int
+        Initial number of vertices of the buffer.
+    color : Color
+        The `Color` of the line.
+    width : float
+        Line width in pixels.
+    """
+
+    def __init__(self, capacity=1024, color='red', width=1, **kwargs):
+        self._data = np.zeros([max(int(capacity), 2), 3], np.float32)
+        self._vbo = gloo.VertexBuffer(self._data)
+        self._count = 0
+
+        Visual.__init__(self, vcode=vertex_template, fcode=fragment_template, **kwargs)
+        self._draw_mode = 'line_strip'
+        self.set_gl_state('translucent', line_width=width)
+        self._program.frag['color'] = Color(color).rgba
+        self.freeze()
+
+    @property
+    def count(self):
+        """Number of vertices of the line"""
+        return self._count
+
+    def set_data(self, points):
+        """Replace all the vertices of the line.
+
+        Parameters
+        ----------
+        points : array_like
+            (N, 3) array of vertices.
+        """
+        self._count = 0
+        self.append(points)
+
+    def append(self, points):
+        """Add vertices at the end of the line (only these are uploaded).
+
+        Parameters
+        ----------
+        points : array_like
+            (N, 3) array of the new vertices.
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        n = points.shape[0]
+        end = self._count + n
+
+        if (end > self._data.shape[0]):
+            # Double the capacity, the whole buffer is uploaded once
+            data = np.zeros([max(end, 2*self._data.shape[0]), 3], np.float32)
+            data[0:self._count] = self._data[0:self._count]
+            data[self._count:end] = points
+            self._data = data
+            self._vbo.set_data(self._data)
+        elif (n > 0):
+            self._data[self._count:end] = points
+            self._vbo.set_subdata(points, offset=self._count)
+
+        self._count = end
+        self._program.vert['position'] = self._vbo[0:self._count]
+        self.update()
+
+    def _prepare_transforms(self, view):
+        view.view_program.vert['transform'] = view.transforms.get_transform()
+
+    def _prepare_draw(self, view):
+        if (self._count < 2):
+            return False
+
+    def _compute_bounds(self, axis, view):
+        if (self._count == 0):
+            return None
+        data = self._data[0:self._count, axis]
+        return data.min(), data.max()
+
+
+TrailLine = create_visual_node(TrailLineVisual)
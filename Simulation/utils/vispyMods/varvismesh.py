@@ -97,6 +97,19 @@ vec4 vec2to4(vec2 xyz) {
 """)
 
 
+def contiguous_runs(idx):
+    """Start and end (excluded) of the runs of consecutive indexes in idx
+    (for partial buffer updates of the changed elements).
+    """
+    idx = np.unique(idx)
+    if (idx.size == 0):
+        return []
+    breaks = np.nonzero(np.diff(idx) != 1)[0]
+    starts = idx[np.hstack((0, breaks+1))]
+    ends = idx[np.hstack((breaks, idx.size-1))] + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
 _null_color_transform = 'vec4 pass(vec4 color) { return color; }'
 _clim = 'float cmap(float val) { return (val - $cmin) / ($cmax - $cmin); }'
 
@@ -235,29 +248,43 @@ class VarVisMeshVisual(MeshVisual):
                 self._visible_verts = np.ones((faces.shape[0],2,1), dtype=np.int8)
             else:
                 self._visible_verts = np.ones((faces.shape[0],3,1), dtype=np.int8)
-            # Create visibility VertexBuffer
+            # Create visibility VertexBuffer (and the list of faces changed since its last update)
             self.vis_buffer = VertexBuffer()
             self.vis_buffer.set_data(self._visible_verts)
             self.shared_program.vert['vis_vert'] = self.vis_buffer
+            self._changed_faces = []
 
 
     def set_visible_faces(self, idx_vis):
         """Set idx_vis indexes of visible_verts to "visible" (1).
         """
         self.visible_verts[idx_vis,:,:] = 1
+        self._changed_faces.append(np.asarray(idx_vis))
 
 
     def set_invisible_faces(self, idx_vis):
         """Set idx_vis indexes of visible_verts to "invisible" (0).
         """
         self.visible_verts[idx_vis,:,:] = 0
+        self._changed_faces.append(np.asarray(idx_vis))
  
     
     def update_vis_buffer(self):
         """Update the visibility VertexBuffer.
+
+        Only the runs of consecutive faces changed since the last update are
+        uploaded (set_subdata), so the cost is proportional to the number of
+        changed faces, not to the size of the mesh.
         """
-        self.vis_buffer.set_data(self.visible_verts)
-        self.shared_program.vert['vis_vert'] = self.vis_buffer
+        if not self._changed_faces:
+            return
+        changed = np.concatenate(self._changed_faces)
+        self._changed_faces = []
+
+        nb_verts_face = self.visible_verts.shape[1]
+        for start, end in contiguous_runs(changed):
+            self.vis_buffer.set_subdata(self.visible_verts[start:end], offset=start*nb_verts_face)
+        self.update()
         
     
     @property
@@ -6,10 +6,29 @@ license: MIT
 Please feel free to use and modify this, but keep the above information. Thanks!
 """
 
+# Wind types:
+#   Wind('None')
+#   Wind('Fixed', velW, qW1, qW2)
+#   Wind('Sine', velW, qW1, qW2)                                 (sum of sines around the median values)
+#   Wind('RandomSine', velW_max, velW_min, qW1_max, qW1_min, qW2_max, qW2_min)
+#   Wind('Dryden', velW, qW1, qW2, sigma, L, seed, duration, dt)  (turbulence, see below)
+# velW is the wind speed (m/s), qW1 the heading and qW2 the elevation (deg).
+# The wind can be evaluated at one time (randomWind, used at every state_dot) or at an array
+# of times (windArrays). Any wind can also be precomputed into a lookup table with tabulate:
+# the wind is then linearly interpolated in the table, O(1) per evaluation whatever its type.
+#
+# The Dryden wind is the mean wind (velW, qW1, qW2) plus turbulence gusts along the mean wind
+# (u), across it (v) and vertically (w), generated once by filtering white noise from a random
+# generator with a fixed seed (same seed, same gusts), and then tabulated. sigma is the RMS
+# gust speed (m/s) and L the turbulence scale length (m). The Dryden filters use the mean wind
+# speed (at least 1 m/s) as the speed at which the turbulence is carried past the vehicle.
+# The gusts cover t = 0 to duration (at dt intervals), the wind stays at its last value after.
+
+import math
 import numpy as np
 from numpy import sin, cos, pi
 import random as rd
-import config
+from scipy import signal, linalg
 
 deg2rad = pi/180.0
 
@@ -88,12 +107,142 @@ class Wind:
             self.qW1_med  = 0
             self.qW2_med  = 0
 
+        elif (self.windType == 'DRYDEN'):
+
+            self.velW_med = args[1]
+            self.qW1_med  = args[2]*deg2rad
+            self.qW2_med  = args[3]*deg2rad
+
+            # Turbulence (RMS gust speed, scale length, seed) and generated duration
+            self.sigma    = args[4] if len(args) > 4 else 1.0   # m/s
+            self.L        = args[5] if len(args) > 5 else 20.0  # m
+            self.seed     = args[6] if len(args) > 6 else 0
+            duration      = args[7] if len(args) > 7 else 100.0 # s
+            dt            = args[8] if len(args) > 8 else 0.01  # s
+
         else:
 
             raise Exception('Not a valid wind type.')
 
+        # Lookup table (none until tabulate is called, except for the Dryden wind)
+        self.tableDt = None
+        self.table = None
+        if (self.windType == 'DRYDEN'):
+            self.tabulate(duration, dt)
+
+        # Spatial wind field added to the wind (none until setField is called)
+        self.field = None
+
+
+    def setField(self, field):
+        # field is a WindField (or None to remove it)
+        self.field = field
+
+
+    def addField(self, velW, qW1, qW2, fieldVel):
+        # Wind vector (world frame, as in the state_dot kernels) plus the wind field's velocity,
+        # back to speed, heading and elevation (scalars and a velocity tuple, or arrays and an
+        # (N, 3) velocity array for windArrays)
+        if (np.ndim(velW) == 0):
+            fx, fy, fz = fieldVel
+            if (fx == 0 and fy == 0 and fz == 0):
+                return velW, qW1, qW2
+            wx = velW*math.cos(qW2)*math.cos(qW1) + fx
+            wy = velW*math.cos(qW2)*math.sin(qW1) + fy
+            wz = -velW*math.sin(qW2) + fz
+            velW = math.sqrt(wx*wx + wy*wy + wz*wz)
+            qW1 = math.atan2(wy, wx)
+            qW2 = math.asin(min(max(-wz/velW, -1.0), 1.0)) if (velW > 0) else 0.0
+            return velW, qW1, qW2
+
+        # (the wind is unchanged where the field is zero, as in the scalar path)
+        noField = ~fieldVel.any(axis=1)
+        wx = velW*cos(qW2)*cos(qW1) + fieldVel[:,0]
+        wy = velW*cos(qW2)*sin(qW1) + fieldVel[:,1]
+        wz = -velW*sin(qW2) + fieldVel[:,2]
+        velF = np.sqrt(wx*wx + wy*wy + wz*wz)
+        qW1F = np.arctan2(wy, wx)
+        qW2F = np.arcsin(np.clip(np.divide(-wz, velF, out=np.zeros(len(velF)), where=(velF > 0)), -1, 1))
+        return np.where(noField, velW, velF), np.where(noField, qW1, qW1F), np.where(noField, qW2, qW2F)
+
+
+    def tabulate(self, duration, dt):
+        # Precomputes the wind from t = 0 to duration (at dt intervals) into the lookup table,
+        # randomWind and windArrays then interpolate in it
+        n = int(round(duration/dt)) + 1
+        t = np.arange(n)*dt
+        if (self.windType == 'DRYDEN'):
+            velW, qW1, qW2 = drydenWind(self.velW_med, self.qW1_med, self.qW2_med, self.sigma, self.L, dt, n, self.seed)
+        else:
+            velW, qW1, qW2 = self.windArrays(t)
+        self.table = np.array([velW, qW1, qW2])
+        self.tableDt = float(dt)
+
+
+    def tableWind(self, t):
+        # Linear interpolation in the lookup table (constant before 0 and after its end)
+        n = self.table.shape[1]
+        x = t/self.tableDt
+        if (x <= 0):
+            i = 0
+            f = 0.0
+        elif (int(x) >= n - 1):
+            i = n - 2
+            f = 1.0
+        else:
+            i = int(x)
+            f = x - i
+        v0 = self.table[:,i]
+        v1 = self.table[:,i+1]
+        return v0[0] + (v1[0] - v0[0])*f, v0[1] + (v1[1] - v0[1])*f, v0[2] + (v1[2] - v0[2])*f
+
+
+    def windArrays(self, t, pos=None):
+        # Wind at every time of the array t (and at every position of the (N, 3) array pos if
+        # the wind has a wind field), returns the arrays velW, qW1, qW2
+        t = np.asarray(t, dtype=float)
+        if (self.field is not None) and (pos is not None):
+            pos = np.asarray(pos, dtype=float)
+            t = np.broadcast_to(t, pos.shape[:-1])
+            velW, qW1, qW2 = self.windArrays(t)
+            return self.addField(velW, qW1, qW2, self.field.sample(pos))
+        if (self.table is not None):
+            n = self.table.shape[1]
+            x = np.clip(t/self.tableDt, 0, n - 1)
+            i = np.minimum(x.astype(int), n - 2)
+            f = x - i
+            v0 = self.table[:,i]
+            v1 = self.table[:,i+1]
+            velW, qW1, qW2 = v0 + (v1 - v0)*f
+
+        elif (self.windType == 'SINE') or (self.windType == 'RANDOMSINE'):
+
+            velW = self.velW_a1*sin(self.velW_f1*t - self.velW_d1) + self.velW_a2*sin(self.velW_f2*t - self.velW_d2) + self.velW_a3*sin(self.velW_f3*t - self.velW_d3) + self.velW_med
+            qW1  = self.qW1_a1*sin(self.qW1_f1*t - self.qW1_d1) + self.qW1_a2*sin(self.qW1_f2*t - self.qW1_d2) + self.qW1_med
+            qW2  = self.qW2_a1*sin(self.qW2_f1*t - self.qW2_d1) + self.qW2_a2*sin(self.qW2_f2*t - self.qW2_d2) + self.qW2_med
+
+            velW = np.maximum(0, velW)
+
+        else:
+            velW = np.full(t.shape, float(self.velW_med))
+            qW1  = np.full(t.shape, float(self.qW1_med))
+            qW2  = np.full(t.shape, float(self.qW2_med))
+
+        return velW, qW1, qW2
+
+
+    def randomWind(self, t, pos=None):
+        # Wind at time t, and at the position pos if the wind has a wind field
+        velW, qW1, qW2 = self.timeWind(t)
+        if (self.field is not None) and (pos is not None):
+            return self.addField(velW, qW1, qW2, self.field.samplePoint(pos))
+        return velW, qW1, qW2
+
+
+    def timeWind(self, t):
+        if (self.table is not None):
+            return self.tableWind(t)
 
-    def randomWind(self, t):
         if (self.windType == 'SINE') or (self.windType == 'RANDOMSINE'):
         
             velW = self.velW_a1*sin(self.velW_f1*t - self.velW_d1) + self.velW_a2*sin(self.velW_f2*t - self.velW_d2) + self.velW_a3*sin(self.velW_f3*t - self.velW_d3) + self.velW_med
@@ -107,4 +256,129 @@ class Wind:
             qW1  = self.qW1_med
             qW2  = self.qW2_med
         
-        return velW, qW1, qW2
\ No newline at end of file
+        return velW, qW1, qW2
+
+
+class WindField:
+    # Wind velocity (world frame) on a regular 3D grid, trilinearly interpolated at a position
+    # (no wind outside of the grid). field is (nx, ny, nz, 3), the velocity at the node (i, j, k)
+    # is at origin + (i, j, k)*step.
+
+    def __init__(self, origin, step, field):
+        self.origin = np.array(origin, dtype=float)
+        self.step = np.array(step, dtype=float)
+        self.field = np.ascontiguousarray(field, dtype=float)
+        self.shape = self.field.shape[0:3]
+        self.ox, self.oy, self.oz = self.origin.tolist()
+        self.sx, self.sy, self.sz = self.step.tolist()
+
+    @classmethod
+    def load(cls, file):
+        # Wind field written by generateWindField (environmentGeneration/environment.py)
+        with np.load(file) as data:
+            return cls(data["origin"], data["step"], data["field"])
+
+    def sample(self, pos):
+        # Velocity at the position pos (3,), or at every position of pos (N, 3)
+        pos = np.asarray(pos, dtype=float)
+        if (pos.ndim == 1):
+            return np.array(self.samplePoint(pos))
+
+        nx, ny, nz = self.shape
+        x = (pos[:,0] - self.ox)/self.sx
+        y = (pos[:,1] - self.oy)/self.sy
+        z = (pos[:,2] - self.oz)/self.sz
+        inside = (x >= 0) & (x <= nx - 1) & (y >= 0) & (y <= ny - 1) & (z >= 0) & (z <= nz - 1)
+        i = np.clip(np.floor(x).astype(int), 0, nx - 2)
+        j = np.clip(np.floor(y).astype(int), 0, ny - 2)
+        k = np.clip(np.floor(z).astype(int), 0, nz - 2)
+        fx = (x - i)[:,np.newaxis]
+        fy = (y - j)[:,np.newaxis]
+        fz = (z - k)[:,np.newaxis]
+        F = self.field
+        c00 = F[i,   j,   k] + (F[i,   j,   k+1] - F[i,   j,   k])*fz
+        c01 = F[i,   j+1, k] + (F[i,   j+1, k+1] - F[i,   j+1, k])*fz
+        c10 = F[i+1, j,   k] + (F[i+1, j,   k+1] - F[i+1, j,   k])*fz
+        c11 = F[i+1, j+1, k] + (F[i+1, j+1, k+1] - F[i+1, j+1, k])*fz
+        c0 = c00 + (c01 - c00)*fy
+        c1 = c10 + (c11 - c10)*fy
+        vel = c0 + (c1 - c0)*fx
+        vel[~inside] = 0
+        return vel
+
+    def samplePoint(self, pos):
+        # Scalar path (called at every state_dot), returns the velocity as a tuple: the 8
+        # surrounding nodes are read as one block, and interpolated with Python floats
+        px, py, pz = pos.tolist()
+        x = (px - self.ox)/self.sx
+        y = (py - self.oy)/self.sy
+        z = (pz - self.oz)/self.sz
+        nx, ny, nz = self.shape
+        if not ((0 <= x <= nx - 1) and (0 <= y <= ny - 1) and (0 <= z <= nz - 1)):
+            return (0.0, 0.0, 0.0)
+        i = min(int(x), nx - 2)
+        j = min(int(y), ny - 2)
+        k = min(int(z), nz - 2)
+        fx = x - i
+        fy = y - j
+        fz = z - k
+        (((a000, a001), (a010, a011)), ((a100, a101), (a110, a111))) = self.field[i:i+2, j:j+2, k:k+2].tolist()
+        vel = []
+        for m in range(3):
+            c00 = a000[m] + (a001[m] - a000[m])*fz
+            c01 = a010[m] + (a011[m] - a010[m])*fz
+            c10 = a100[m] + (a101[m] - a100[m])*fz
+            c11 = a110[m] + (a111[m] - a110[m])*fz
+            c0 = c00 + (c01 - c00)*fy
+            c1 = c10 + (c11 - c10)*fy
+            vel.append(c0 + (c1 - c0)*fx)
+        return tuple(vel)
+
+
+def drydenFilter(sigma, T, order, dt, noise):
+    # Dryden shaping filter of time constant T = L/V driven by the white noise sequence (unit
+    # variance, one sample per dt), scaled so that the stationary RMS of the output is sigma
+    #   order 1 (along the wind):            1/(1 + T*s)
+    #   order 2 (across the wind, vertical): (1 + sqrt(3)*T*s)/(1 + T*s)^2
+    if (order == 1):
+        num, den = [1.0], [T, 1.0]
+    else:
+        num, den = [np.sqrt(3)*T, 1.0], [T*T, 2*T, 1.0]
+    A, B, C, D = signal.tf2ss(num, den)
+    Ad, Bd, Cd, Dd, _ = signal.cont2discrete((A, B, C, D), dt, method="zoh")
+
+    # Stationary variance of the output for a unit variance input
+    P = linalg.solve_discrete_lyapunov(Ad, Bd @ Bd.T)
+    var = (Cd @ P @ Cd.T + Dd @ Dd.T)[0,0]
+
+    b, a = signal.ss2tf(Ad, Bd, Cd, Dd)
+    return sigma/np.sqrt(var)*signal.lfilter(b[0], a, noise)
+
+
+def drydenWind(velW_med, qW1_med, qW2_med, sigma, L, dt, n, seed):
+    # Mean wind plus Dryden gusts at n times (dt intervals), as wind speed, heading and elevation
+    # (exactly the mean wind without turbulence)
+    if (sigma == 0):
+        return np.full(n, float(velW_med)), np.full(n, float(qW1_med)), np.full(n, float(qW2_med))
+    V = max(velW_med, 1.0)
+    T = L/V
+
+    # White noise (with 5 time constants before t = 0, so that the gusts start in steady state)
+    n_warmup = int(np.ceil(5*T/dt))
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal([3, n_warmup + n])
+    u = drydenFilter(sigma, T, 1, dt, noise[0])[n_warmup:]
+    v = drydenFilter(sigma, T, 2, dt, noise[1])[n_warmup:]
+    w = drydenFilter(sigma, T, 2, dt, noise[2])[n_warmup:]
+
+    # Mean wind vector plus the gusts (u along the mean heading, v across it, w along the elevation axis)
+    x = velW_med*cos(qW1_med)*cos(qW2_med) + u*cos(qW1_med) - v*sin(qW1_med)
+    y = velW_med*sin(qW1_med)*cos(qW2_med) + u*sin(qW1_med) + v*cos(qW1_med)
+    z = velW_med*sin(qW2_med) + w
+
+    # Back to speed, heading (unwrapped, so that it can be interpolated) and elevation
+    velW = np.sqrt(x**2 + y**2 + z**2)
+    qW1 = np.unwrap(np.arctan2(y, x))
+    qW1 -= np.round((qW1[0] - qW1_med)/(2*pi))*2*pi
+    qW2 = np.arcsin(np.clip(np.divide(z, velW, out=np.zeros(n), where=(velW > 0)), -1, 1))
+    return velW, qW1, qW2
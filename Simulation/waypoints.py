@@ -8,7 +8,6 @@ Please feel free to use and modify this, but keep the above information. Thanks!
 
 import numpy as np
 from numpy import pi
-import config
 
 deg2rad = pi/180.0
 
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import types
+import numpy as np
+import pytest
+
+import config
+from trajectory import Trajectory
+from potentialField import PotField
+from ctrl import Control
+from ctrlBatch import ControlBatch
+from quadFiles.quad import Quadcopter
+from quadFiles.quadBatch import QuadcopterBatch
+from utils.windModel import Wind
+from run_3D_simulation import quad_sim
+
+
+def stackQuads(quads):
+    # QuadcopterBatch-like states of the scalar quads (one row per quad)
+    quad = types.SimpleNamespace(params=quads[0].params)
+    for name in ("pos", "quat", "vel", "omega", "vel_dot", "omega_dot", "dcm"):
+        setattr(quad, name, np.array([getattr(q, name) for q in quads]))
+    return quad
+
+
+@pytest.mark.parametrize("orient", ["NED", "ENU"])
+def test_controller_matches_scalar(orient):
+    # Scalar simulations of different trajectories, and the batch controller fed with their
+    # states and setpoints at every step
+    Ts = 0.005
+    cfg = config.SimConfig(orient)
+    waypoints = [(np.array([0, 2, 4.]), np.array([[0, 0, 0], [2, 1, -1], [4, -1, -1.]]), np.zeros(3), 1.6),
+                 (np.array([0, 1, 3.]), np.array([[0, 0, 0], [-1, 2, 1], [0, 4, 0.]]), np.zeros(3), 1.6),
+                 (np.array([0, 1.5, 3.]), np.array([[0, 0, 0], [0, 0, -3], [1, -2, -3.]]), np.zeros(3), 1.6)]
+    winds = [('None', 2.0, 90, -15), ('Sine', 2.0, 90, -15), ('Fixed', 3.0, 45, 10)]
+    sims = []
+    for wps, windArgs in zip(waypoints, winds):
+        quad = Quadcopter(0, "rk4", cfg)
+        traj = Trajectory(quad, "xyz_pos", np.array([1, 4, 0]), wps)
+        potfld = PotField(1)
+        ctrl = Control(quad, traj.yawType)
+        wind = Wind(*windArgs)
+        traj.desiredState(0, Ts, quad)
+        potfld.isWithinRange(quad)
+        potfld.isWithinField(quad)
+        potfld.rep_force(quad, traj)
+        ctrl.controller(traj, quad, potfld, Ts)
+        sims.append((quad, traj, potfld, ctrl, wind))
+    N = len(sims)
+    ctrlB = ControlBatch(QuadcopterBatch(0, N, "rk4", cfg), "xyz_pos", 4)
+
+    def batchStep():
+        ctrlB.controller(np.array([s[1].sDes for s in sims]), stackQuads([s[0] for s in sims]), Ts,
+                         np.array([s[2].F_rep for s in sims]), np.array([s[1].omit_yaw_follow for s in sims]))
+        for i, (quad, traj, potfld, ctrl, wind) in enumerate(sims):
+            np.testing.assert_allclose(ctrlB.w_cmd[i], ctrl.w_cmd, rtol=1e-12, atol=1e-9)
+            np.testing.assert_allclose(ctrlB.sDesCalc[i], ctrl.sDesCalc, rtol=1e-12, atol=1e-9)
+
+    batchStep()
+    t = [0]*N
+    for k in range(500):
+        for i, (quad, traj, potfld, ctrl, wind) in enumerate(sims):
+            t[i] = quad_sim(t[i], Ts, quad, ctrl, wind, traj, potfld)
+        batchStep()
+
+    # The vehicles flew different paths
+    assert np.ptp([s[0].pos for s in sims], axis=0).max() > 0.2
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import types
+import numpy as np
+import pytest
+
+from potentialField import PotField
+
+
+def bruteForce(potfld, pos):
+    # Masks and minimum distance recomputed on the full point cloud
+    vect = potfld.pointcloud - pos
+    withinRange = (abs(vect) <= potfld.rangeRadius).all(axis=1)
+    distance = np.sqrt(vect[:,0]*vect[:,0] + vect[:,1]*vect[:,1] + vect[:,2]*vect[:,2])
+    withinField = withinRange & (distance <= potfld.fieldRadius)
+    distanceMin = distance[withinRange].min() if withinRange.any() else -1
+    return withinRange, withinField, distanceMin
+
+
+def path(potfld, rng):
+    # Small steps through the cloud, jumps larger than rangeMargin, and jumps out of the
+    # cloud and back
+    pts = potfld.pointcloud
+    start = pts[rng.integers(0, len(pts))]
+    positions = [start + np.array([0.03, -0.02, 0.01])*k for k in range(60)]
+    for k in range(60):
+        step = rng.uniform(-1, 1, 3)*(0.05 if (k % 4) else 3.0)
+        positions.append(positions[-1] + step)
+    positions.append(pts.max(axis=0) + 50)
+    positions.append(pts[rng.integers(0, len(pts))] + rng.uniform(-1, 1, 3))
+    for k in range(40):
+        positions.append(positions[-1] + rng.uniform(-0.1, 0.1, 3))
+    return positions
+
+
+@pytest.mark.parametrize("rangeMargin", [0.0, 0.5, 2.0])
+def test_incremental_masks_match_brute_force(rangeMargin):
+    rng = np.random.default_rng(0)
+    potfld = PotField(1, rangeMargin)
+    quad = types.SimpleNamespace()
+    numField = 0
+    for pos in path(potfld, rng):
+        quad.pos = np.array(pos, dtype=float)
+        potfld.isWithinRange(quad)
+        potfld.isWithinField(quad)
+
+        withinRange, withinField, distanceMin = bruteForce(potfld, quad.pos)
+        assert np.array_equal(potfld.withinRange, withinRange)
+        assert np.array_equal(potfld.notWithinRange, ~withinRange)
+        assert np.array_equal(potfld.withinField, withinField)
+        assert np.array_equal(potfld.inRangeNotField, withinRange & ~withinField)
+        assert np.array_equal(potfld.idx_withinRange, np.flatnonzero(withinRange))
+        assert np.array_equal(potfld.idx_withinField, np.flatnonzero(withinField))
+        assert np.array_equal(potfld.idx_inRangeNotField, np.flatnonzero(withinRange & ~withinField))
+        assert potfld.distanceMin == distanceMin
+        numField += len(potfld.idx_withinField)
+
+        # The candidates always cover the range (re-anchored beyond rangeMargin)
+        assert abs(quad.pos - potfld.anchor).max() <= rangeMargin
+    assert numField > 0
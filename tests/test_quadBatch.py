@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import numpy as np
+import pytest
+
+import config
+from quadFiles.quad import Quadcopter
+from quadFiles.quadBatch import QuadcopterBatch
+from utils.windModel import Wind
+
+
+def perturbedStates(quad, rng, N):
+    # Hover state of quad with random position, attitude, velocities and motor speeds
+    state = np.tile(quad.state, (N, 1))
+    state[:,0:3] += rng.uniform(-1, 1, (N, 3))
+    quat = state[:,3:7] + rng.uniform(-0.2, 0.2, (N, 4))
+    state[:,3:7] = quat/np.linalg.norm(quat, axis=1)[:,np.newaxis]
+    state[:,7:13] += rng.uniform(-1, 1, (N, 6))
+    state[:,13:21] += rng.uniform(-20, 20, (N, 8))
+    return state
+
+
+@pytest.mark.parametrize("orient", ["NED", "ENU"])
+@pytest.mark.parametrize("windArgs", [("None", 2.0, 90, -15), ("Sine", 2.0, 90, -15)])
+def test_state_dot_matches_scalar(orient, windArgs):
+    rng = np.random.default_rng(0)
+    N = 6
+    cfg = config.SimConfig(orient)
+    quad = Quadcopter(0, "rk4", cfg)
+    quadB = QuadcopterBatch(0, N, "rk4", cfg)
+    wind = Wind(*windArgs)
+
+    state = perturbedStates(quad, rng, N)
+    cmd = quad.params["w_hover"] + rng.uniform(-50, 50, (N, 4))
+    sdot = quadB.state_dot(1.3, state, cmd, wind)
+    for i in range(N):
+        expected = quad.state_dot(1.3, state[i], cmd[i], wind).copy()
+        np.testing.assert_allclose(sdot[i], expected, rtol=1e-13, atol=1e-12)
+
+
+@pytest.mark.parametrize("integrator", ["rk4", "semi_implicit"])
+def test_update_matches_scalar(integrator):
+    # Vehicles with different constant commands, integrated together and one by one
+    N = 3
+    Ts = 0.005
+    quadB = QuadcopterBatch(0, N, integrator)
+    quads = [Quadcopter(0, integrator) for i in range(N)]
+    wind = Wind('Sine', 2.0, 90, -15)
+    cmd = quadB.params["w_hover"] + np.array([[0, 0, 0, 0], [20, -20, 20, -20], [30, 30, 30, 30.]])
+
+    t = 0
+    for k in range(200):
+        t += Ts
+        quadB.update(t, Ts, cmd, wind)
+        for i in range(N):
+            quads[i].update(t, Ts, cmd[i], wind)
+
+    for i in range(N):
+        np.testing.assert_allclose(quadB.state[i], quads[i].state, rtol=1e-10, atol=1e-10)
+        np.testing.assert_allclose(quadB.euler[i], quads[i].euler, rtol=1e-10, atol=1e-10)
+        np.testing.assert_allclose(quadB.dcm[i], quads[i].dcm, rtol=1e-10, atol=1e-10)
+        np.testing.assert_allclose(quadB.thr[i], quads[i].thr, rtol=1e-10, atol=1e-10)
+    assert not np.allclose(quadB.state[0], quadB.state[2])
+
+
+def test_euler_pitch_sine_clipped():
+    # Pitch sine slightly above 1 in magnitude (round-off), clipped as in utils.quatToYPR_ZYX
+    quadB = QuadcopterBatch(0, 2)
+    quadB.quat[0] = [np.sqrt(0.5), 0, np.sqrt(0.5)*(1 + 3e-16), 0]
+    quadB.quat[1] = [np.sqrt(0.5), 0, -np.sqrt(0.5)*(1 + 3e-16), 0]
+    quadB.extended_state()
+    assert not np.isnan(quadB.euler).any()
+    np.testing.assert_array_equal(quadB.theta, [np.pi/2, -np.pi/2])
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import numpy as np
+import pytest
+
+import utils.rotations as rot
+from benchmark_rotations import legacy
+
+
+def randomQuats(rng, n):
+    q = rng.standard_normal((n, 4))
+    return q/np.linalg.norm(q, axis=1)[:,np.newaxis]
+
+
+def randomArgs(name, rng, n):
+    # Arguments of the function for n rotations (unit quaternions, rotation matrices or vectors)
+    if name in ("vectNormalize", "inverse", "quatToYPR_ZYX", "quat2Dcm"):
+        return (randomQuats(rng, n),)
+    if name == "quatMultiply":
+        return (randomQuats(rng, n), randomQuats(rng, n))
+    if name == "cross":
+        return (rng.standard_normal((n, 3)), rng.standard_normal((n, 3)))
+    if name == "RotToQuat":
+        return (np.array([legacy["quat2Dcm"](q) for q in randomQuats(rng, n)]),)
+
+
+@pytest.mark.parametrize("name", sorted(legacy))
+def test_single_rotation_matches_previous(name):
+    rng = np.random.default_rng(1)
+    for args in zip(*randomArgs(name, rng, 200)):
+        np.testing.assert_allclose(getattr(rot, name)(*args), legacy[name](*args), rtol=0, atol=1e-14)
+
+
+@pytest.mark.parametrize("name", sorted(legacy))
+def test_stack_matches_previous(name):
+    rng = np.random.default_rng(2)
+    args = randomArgs(name, rng, 200)
+    expected = np.array([legacy[name](*a) for a in zip(*args)])
+    np.testing.assert_allclose(getattr(rot, name)(*args), expected, rtol=0, atol=1e-14)
+
+    # Same result in an out buffer
+    out = np.zeros_like(expected)
+    result = getattr(rot, name)(*args, out=out)
+    assert result is out
+    np.testing.assert_allclose(out, expected, rtol=0, atol=1e-14)
+
+
+def test_RotToQuat_branches():
+    # Rotations of pi about every axis (e0 = 0, where the previous version returned NaN) and
+    # the identity, one per branch
+    R = np.array([np.eye(3), np.diag([1., -1, -1]), np.diag([-1., 1, -1]), np.diag([-1., -1, 1])])
+    q = rot.RotToQuat(R)
+    assert np.array_equal(q, np.vstack((np.eye(4)[0], np.eye(4)[1:])))
+    assert not np.isnan(rot.RotToQuat(R[1])).any()
+
+
+def test_quatToYPR_ZYX_gimbal_lock():
+    # Pitch of 90 deg with round-off on the pitch sine (clipped to [-1, 1])
+    q = np.array([np.sqrt(0.5), 0, np.sqrt(0.5) + 1e-16, 0])
+    assert not np.isnan(rot.quatToYPR_ZYX(q)).any()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+import config
+import simJIT
+from trajectory import Trajectory
+from potentialField import PotField
+from ctrl import Control
+from quadFiles.quad import Quadcopter
+from utils.windModel import Wind
+from run_3D_simulation import quad_sim
+
+
+def makeSim(useJIT, trajSelect, Ts):
+    # Same setup as run_3D_simulation.main(), on a short waypoint trajectory near the walls
+    cfg = config.SimConfig(useJIT=useJIT)
+    quad = Quadcopter(0, "rk4", cfg)
+    waypoints = (np.array([0, 2, 4, 6.]), np.array([[0, 0, 0], [2, 1, -1], [4, -1, -1], [5, 0, 0.]]),
+                 np.array([0, 1.0, 2.5, -2.0]), 1.6)
+    traj = Trajectory(quad, "xyz_pos", np.array(trajSelect, dtype=float), waypoints)
+    potfld = PotField(1)
+    ctrl = Control(quad, traj.yawType)
+    wind = Wind('None', 2.0, 90, -15)
+
+    traj.precompute(0, Ts, 3.0)
+    traj.desiredState(0, Ts, quad)
+    potfld.isWithinRange(quad)
+    potfld.isWithinField(quad)
+    potfld.rep_force(quad, traj)
+    ctrl.controller(traj, quad, potfld, Ts)
+    simStep = simJIT.SimJIT(quad, ctrl, wind, traj, potfld, Ts) if useJIT else None
+    return quad, traj, potfld, ctrl, wind, simStep
+
+
+@pytest.mark.parametrize("trajSelect", [[1, 2, 0], [2, 4, 0]])
+def test_jit_step_matches_numpy_step(trajSelect):
+    # Same states up to the round-off of the BLAS products (amplified by the closed loop)
+    Ts = 0.005
+    quad, traj, potfld, ctrl, wind, _ = makeSim(False, trajSelect, Ts)
+    quadJ, trajJ, potfldJ, ctrlJ, _, simStep = makeSim(True, trajSelect, Ts)
+
+    t = 0
+    tJ = 0
+    for k in range(400):
+        t = quad_sim(t, Ts, quad, ctrl, wind, traj, potfld)
+        tJ = simStep.step(tJ)
+
+        assert tJ == t
+        np.testing.assert_allclose(quadJ.state, quad.state, rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(ctrlJ.w_cmd, ctrl.w_cmd, rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(trajJ.sDes, traj.sDes, rtol=1e-6, atol=1e-6)
+        assert trajJ.t_idx == traj.t_idx
+        assert potfldJ.distanceMin == pytest.approx(potfld.distanceMin, abs=1e-6)
+
+        # Masks and the index arrays recorded by the telemetry
+        assert np.array_equal(potfldJ.withinRange, potfld.withinRange)
+        assert np.array_equal(potfldJ.withinField, potfld.withinField)
+        assert np.array_equal(potfldJ.idx_withinRange, potfld.idx_withinRange)
+        assert np.array_equal(potfldJ.idx_withinField, potfld.idx_withinField)
+        assert np.array_equal(potfldJ.idx_inRangeNotField, potfld.idx_inRangeNotField)
+
+    assert len(potfld.idx_withinField) > 0
+
+
+def test_rotation_edge_cases_match_utils():
+    # Rotations of pi (e0 = 0) and pitch sines slightly above 1 in magnitude (round-off),
+    # the cases fixed in utils.rotations
+    import utils.rotations as rot
+
+    for R in (np.diag([1., -1, -1]), np.diag([-1., 1, -1]), np.diag([-1., -1, 1])):
+        q = np.zeros(4)
+        simJIT.rotToQuat(*R.ravel(), q)
+        assert not np.isnan(q).any()
+        assert np.array_equal(q, rot.RotToQuat(R))
+
+    for q in (np.array([np.sqrt(0.5), 0, np.sqrt(0.5)*(1 + 3e-16), 0]),
+              np.array([np.sqrt(0.5), 0, -np.sqrt(0.5)*(1 + 3e-16), 0])):
+        assert abs(2.0*q[0]*q[2]) > 1
+        euler = np.zeros(3)
+        simJIT.quatToEuler(q[0], q[1], q[2], q[3], euler)
+        assert not np.isnan(euler).any()
+        assert np.array_equal(euler, rot.quatToYPR_ZYX(q)[::-1])
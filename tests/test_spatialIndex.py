@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import numpy as np
+import pytest
+
+from spatialIndex import GridIndex
+from environmentGeneration.pointcloudFile import loadPointcloud
+
+
+def bruteBox(points, center, halfSize):
+    return np.where((abs(center - points) <= halfSize).all(axis=1))[0]
+
+
+def latticePoints(rng, gridStep, n):
+    # Points of a grid of step gridStep (exactly representable coordinates), with an offset origin
+    return np.unique(rng.integers(-20, 40, (n, 3)), axis=0)*gridStep + np.array([-3.0, 1.5, 0.25])
+
+
+@pytest.mark.parametrize("cellSize", [1.0, 1.3, 2.5, 7.0])
+def test_queryBox_matches_brute_force(cellSize):
+    rng = np.random.default_rng(0)
+    gridStep = np.array([0.5, 0.25, 0.5])
+    points = latticePoints(rng, gridStep, 4000)
+    index = GridIndex(points, gridStep, cellSize)
+
+    # Cells are a multiple of the grid step: lattice points lie exactly on cell edges
+    assert np.allclose(index.cellSize/gridStep, np.round(index.cellSize/gridStep))
+    onEdge = (np.mod(points - index.origin, index.cellSize) == 0).any(axis=1)
+    assert onEdge.sum() > 100
+
+    for k in range(300):
+        center = rng.uniform(points.min(axis=0) - 3, points.max(axis=0) + 3)
+        halfSize = rng.uniform(0.1, 4)
+        assert np.array_equal(index.queryBox(center, halfSize), bruteBox(points, center, halfSize))
+
+
+def test_queryBox_points_on_the_box_boundary():
+    # Centers on the lattice and half sizes multiple of the grid step: the points at exactly
+    # halfSize from the center on an axis are within the box
+    rng = np.random.default_rng(1)
+    gridStep = np.array([0.5, 0.5, 0.5])
+    points = latticePoints(rng, gridStep, 6000)
+    index = GridIndex(points, gridStep, 2.5)
+
+    numBoundary = 0
+    for center in points[rng.integers(0, len(points), 200)]:
+        for halfSize in (0.5, 1.0, 2.5, 3.5):
+            idx = index.queryBox(center, halfSize)
+            assert np.array_equal(idx, bruteBox(points, center, halfSize))
+            numBoundary += (abs(center - points[idx]) == halfSize).any(axis=1).sum()
+    assert numBoundary > 0
+
+
+def test_queryBox_outside_and_whole_cloud():
+    rng = np.random.default_rng(2)
+    gridStep = np.array([0.5, 0.5, 0.5])
+    points = latticePoints(rng, gridStep, 1000)
+    index = GridIndex(points, gridStep, 2.0)
+
+    assert len(index.queryBox(points.max(axis=0) + 10, 1.0)) == 0
+    assert len(index.queryBox(points.min(axis=0) - 10, 1.0)) == 0
+    assert np.array_equal(index.queryBox(points.mean(axis=0), 100.0), np.arange(len(points)))
+
+
+def test_pointcloud_grid_and_save_load(tmp_path):
+    # The repo's point cloud, with PotField's grid index (cells of rangeRadius)
+    data = np.array(loadPointcloud("pointcloud_grid"))
+    gridStep = data[0]
+    points = data[1:]
+    index = GridIndex(points, gridStep, 2.5)
+
+    file = str(tmp_path/"index.npz")
+    index.save(file)
+    loaded = GridIndex.load(file, points)
+
+    rng = np.random.default_rng(3)
+    for k in range(200):
+        center = points[rng.integers(0, len(points))] + rng.uniform(-2, 2, 3)
+        expected = bruteBox(points, center, 3.0)
+        assert np.array_equal(index.queryBox(center, 3.0), expected)
+        assert np.array_equal(loaded.queryBox(center, 3.0), expected)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import os
+import numpy as np
+
+from telemetry import Recorder, Telemetry
+
+
+def test_dense_channels_round_trip(tmp_path):
+    # Records split in several chunks, 1 step out of 3 recorded
+    rec = Recorder(str(tmp_path), decimation=3, chunkSize=4)
+    rec.addChannel("t")
+    rec.addChannel("pos", 3)
+    rec.addChannel("dcm", (3, 3))
+    rec.addChannel("idx", (), np.int64)
+
+    rng = np.random.default_rng(0)
+    steps = [(0.1*k, rng.standard_normal(3), rng.standard_normal((3, 3)), k) for k in range(31)]
+    for t, pos, dcm, k in steps:
+        rec.record({"t": t, "pos": pos, "dcm": dcm, "idx": k})
+    tel = rec.close()
+
+    kept = steps[::3]
+    assert tel.numSteps == 31
+    assert tel.numRecords == len(kept)
+    assert np.array_equal(tel["t"], [s[0] for s in kept])
+    assert np.array_equal(tel["pos"], [s[1] for s in kept])
+    assert np.array_equal(tel["dcm"], [s[2] for s in kept])
+    assert tel["idx"].dtype == np.int64
+    assert np.array_equal(tel["idx"], np.arange(0, 31, 3))
+
+    # The recording can be opened again from its directory
+    assert np.array_equal(Telemetry(str(tmp_path))["pos"], tel["pos"])
+
+
+def test_mask_channel_round_trip(tmp_path):
+    rec = Recorder(str(tmp_path), chunkSize=8)
+    rec.addMaskChannel("inField", 100)
+    sets = [np.array([], dtype=int), np.array([3, 4, 5]), np.array([4, 5, 6, 90]), np.array([], dtype=int), np.array([0, 99])]
+    for idx in sets:
+        rec.record({"inField": idx})
+    log = rec.close()["inField"]
+
+    assert len(log) == len(sets)
+    for i, idx in enumerate(sets):
+        assert np.array_equal(log[i], idx)
+    mask = np.zeros(100, dtype=bool)
+    mask[[4, 5, 6, 90]] = True
+    assert np.array_equal(log.mask(2), mask)
+
+
+def test_temporary_directory():
+    # Recorder(None) records in a new temporary directory, deleted by Telemetry.delete
+    rec = Recorder(None)
+    rec.addChannel("t")
+    rec.record({"t": 0.0})
+    tel = rec.close()
+    assert os.path.isfile(os.path.join(tel.directory, "telemetry.json"))
+    tel.delete()
+    assert not os.path.exists(tel.directory)
+
+
+def recordMasks(directory, sets, num_points, keyframeInterval):
+    rec = Recorder(directory, chunkSize=16)
+    rec.addMaskChannel("inField", num_points, keyframeInterval)
+    for idx in sets:
+        rec.record({"inField": idx})
+    return rec.close()["inField"]
+
+
+def randomWalkSets(rng, numRecords, num_points):
+    # Sets that change a little at every record (points entering and leaving)
+    mask = np.zeros(num_points, dtype=bool)
+    sets = []
+    for i in range(numRecords):
+        mask[rng.integers(0, num_points, 5)] ^= True
+        sets.append(np.flatnonzero(mask))
+    return sets
+
+
+def test_masklog_random_access(tmp_path):
+    rng = np.random.default_rng(3)
+    sets = randomWalkSets(rng, 300, 500)
+    log = recordMasks(str(tmp_path), sets, 500, keyframeInterval=25)
+
+    # In order, backwards, random (from the keyframe or from the last record read) and negative
+    for i in range(len(sets)):
+        assert np.array_equal(log[i], sets[i])
+    for i in reversed(range(len(sets))):
+        assert np.array_equal(log[i], sets[i])
+    for i in rng.integers(0, len(sets), 200):
+        assert np.array_equal(log[i], sets[i])
+    assert np.array_equal(log[-1], sets[-1])
+
+
+def test_masklog_changes(tmp_path):
+    rng = np.random.default_rng(4)
+    sets = randomWalkSets(rng, 120, 200)
+    log = recordMasks(str(tmp_path), sets, 200, keyframeInterval=10)
+
+    for i in range(1, len(sets)):
+        assert np.array_equal(log.entering(i), np.setdiff1d(sets[i], sets[i-1]))
+        assert np.array_equal(log.leaving(i), np.setdiff1d(sets[i-1], sets[i]))
+    for i0, i1 in [(0, 0), (3, 4), (5, 37), (0, 119), (60, 61)]:
+        entering, leaving = log.changes(i0, i1)
+        assert np.array_equal(entering, np.setdiff1d(sets[i1], sets[i0]))
+        assert np.array_equal(leaving, np.setdiff1d(sets[i0], sets[i1]))
+
+    # Only the changes and one full set every keyframeInterval records are stored
+    assert len(log.key) == sum(len(sets[i]) for i in range(0, len(sets), 10))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import numpy as np
+import pytest
+
+from trajectory import Trajectory
+from quadFiles.quad import Quadcopter
+from waypoints import makeWaypoints
+
+
+@pytest.mark.parametrize("xyzType", [3, 4, 5, 6])
+def test_minSomethingTraj_float_trajSelect(xyzType):
+    # run_3D_simulation.py builds trajSelect with np.zeros(3), so its entries are floats
+    quad = Quadcopter(0)
+    trajSelect = np.zeros(3)
+    trajSelect[0] = xyzType
+    trajSelect[1] = 3
+    trajSelect[2] = 1
+    traj = Trajectory(quad, "xyz_pos", trajSelect)
+    trajInt = Trajectory(quad, "xyz_pos", [xyzType, 3, 1])
+
+    nSeg = len(traj.T_segment)
+    assert traj.coeffsPos.shape == (nSeg, 2*(xyzType - 2), 3)
+    assert np.array_equal(traj.coeffsPos, trajInt.coeffsPos)
+
+    # The trajectory goes through the waypoints
+    traj.desiredState(traj.t_wps[1], 0.005, quad)
+    assert np.allclose(traj.sDes[0:3], traj.wps[1])
+
+
+@pytest.mark.parametrize("ctrlType, trajSelect", [
+    ("xyz_pos", [1, 1, 0]),
+    ("xyz_pos", [1, 2, 0]),
+    ("xyz_pos", [3, 2, 0]),
+    ("xyz_pos", [5, 2, 0]),
+    ("xyz_pos", [6, 1, 1]),
+    ("xyz_pos", [99, 0, 0]),
+    ("xyz_vel", [1, 0, 0]),
+    ("xy_vel_z_pos", [1, 4, 0]),
+])
+def test_precompute_matches_desiredState(ctrlType, trajSelect):
+    # The setpoint table is the same as the desired states calculated at every step
+    Ti, Ts = 0, 0.005
+    quad = Quadcopter(Ti)
+    _, wps, _, v_wp = makeWaypoints()
+    n = wps.shape[0]
+    waypoints = (np.arange(n)*2.0, wps, np.linspace(0, 3, n), v_wp)
+    trajStep = Trajectory(quad, ctrlType, np.array(trajSelect), waypoints)
+    traj = Trajectory(quad, ctrlType, np.array(trajSelect), waypoints)
+    Tf = trajStep.t_wps[-1] + 1
+
+    heading = traj.current_heading
+    table = traj.precompute(Ti, Ts, Tf)
+    assert traj.current_heading == heading
+
+    t = Ti
+    for k in range(table.shape[0]):
+        trajStep.desiredState(t, Ts, quad)
+        traj.desiredState(t, Ts, quad)
+        assert np.array_equal(trajStep.sDes, table[k])
+        assert np.array_equal(traj.sDes, table[k])
+        assert trajStep.end_reached == traj.end_reached
+        t += Ts
+
+
+def test_precompute_reactive_trajectory():
+    # pos_waypoint_arrived depends on the quadcopter's state: no table
+    quad = Quadcopter(0)
+    traj = Trajectory(quad, "xyz_pos", np.array([2, 3, 1]))
+    assert not traj.isTimeBased()
+    assert traj.precompute(0, 0.005, 10) is None
+    assert traj.sDes_all is None
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+author: John Bass
+email: john.bobzwik@gmail.com
+license: MIT
+Please feel free to use and modify this, but keep the above information. Thanks!
+"""
+
+import numpy as np
+import pytest
+
+from utils.windModel import Wind, WindField
+
+
+@pytest.mark.parametrize("windArgs", [("None",), ("Fixed", 3.0, 45, 10), ("Sine", 2.0, 90, -15),
+                                      ("RandomSine", 3.0, 1.0, 100, 80, 10, -10)])
+def test_windArrays_matches_randomWind(windArgs):
+    wind = Wind(*windArgs)
+    t = np.linspace(0, 30, 301)
+    velW, qW1, qW2 = wind.windArrays(t)
+    expected = np.array([wind.randomWind(ti) for ti in t]).T
+    np.testing.assert_allclose(velW, expected[0], rtol=1e-14, atol=1e-14)
+    np.testing.assert_allclose(qW1, expected[1], rtol=1e-14, atol=1e-14)
+    np.testing.assert_allclose(qW2, expected[2], rtol=1e-14, atol=1e-14)
+
+
+def test_table_interpolation():
+    wind = Wind('Sine', 2.0, 90, -15)
+    dt = 0.1
+    nodes = np.array(wind.windArrays(np.arange(51)*dt))
+    wind.tabulate(5.0, dt)
+    assert np.array_equal(wind.table, nodes)
+
+    # Nodes, linear interpolation between nodes, constant before 0 and after the end
+    for t in (0.0, 0.3, 2.5, 5.0):
+        np.testing.assert_allclose(wind.randomWind(t), nodes[:,int(round(t/dt))], rtol=1e-14)
+    for t in (0.25, 1.37, 4.99):
+        i = int(t/dt)
+        f = t/dt - i
+        expected = nodes[:,i] + (nodes[:,i+1] - nodes[:,i])*f
+        np.testing.assert_allclose(wind.randomWind(t), expected, rtol=1e-13)
+        np.testing.assert_allclose(np.array(wind.windArrays(np.array([t]))).ravel(), expected, rtol=1e-13)
+    for t in (5.0, 5.01, 7.3, 1000.0):
+        assert np.array_equal(wind.randomWind(t), nodes[:,-1])
+        assert np.array_equal(np.array(wind.windArrays(np.array([t]))).ravel(), nodes[:,-1])
+    assert np.array_equal(wind.randomWind(-1.0), nodes[:,0])
+
+
+def test_dryden():
+    # Without turbulence, exactly the mean wind (at any time)
+    wind = Wind('Dryden', 3.0, 90, -15, 0.0, 20, 1, 10, 0.01)
+    velW, qW1, qW2 = wind.windArrays(np.linspace(0, 12, 50))
+    assert (velW == 3.0).all() and (qW1 == wind.qW1_med).all() and (qW2 == wind.qW2_med).all()
+    assert wind.randomWind(3.3) == (3.0, wind.qW1_med, wind.qW2_med)
+
+    # Same seed, same gusts; RMS of the gusts close to sigma
+    a = Wind('Dryden', 5.0, 0, 0, 1.5, 20, 7, 200, 0.01)
+    b = Wind('Dryden', 5.0, 0, 0, 1.5, 20, 7, 200, 0.01)
+    c = Wind('Dryden', 5.0, 0, 0, 1.5, 20, 8, 200, 0.01)
+    assert np.array_equal(a.table, b.table)
+    assert not np.array_equal(a.table, c.table)
+    gustAlong = a.table[0]*np.cos(a.table[1])*np.cos(a.table[2]) - 5.0
+    assert 1.0 < np.std(gustAlong) < 2.0
+
+
+def linearField(origin, step, shape, A, b):
+    # Wind field of velocity A @ pos + b at every node
+    axes = [origin[m] + np.arange(shape[m])*step[m] for m in range(3)]
+    nodes = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)
+    return WindField(origin, step, nodes @ A.T + b)
+
+
+def test_windfield_trilinear_sampling():
+    # Trilinear interpolation of a linear field is exact: dyadic coordinates, steps and
+    # coefficients keep all the products exact in floating point
+    A = np.array([[1.0, -2.0, 0.5], [0.25, 3.0, -1.0], [-0.5, 0.0, 2.0]])
+    b = np.array([1.0, -0.5, 0.25])
+    field = linearField(np.array([-2.0, 1.0, 0.5]), np.array([0.5, 0.25, 1.0]), (9, 17, 5), A, b)
+    rng = np.random.default_rng(0)
+    lo = field.origin
+    hi = field.origin + (np.array(field.shape) - 1)*field.step
+    pos = np.round(rng.uniform(lo, hi, (500, 3))*64)/64
+    pos = np.vstack((pos, lo, hi, [hi[0], lo[1], hi[2]]))
+    expected = pos @ A.T + b
+    assert np.array_equal(field.sample(pos), expected)
+    for p, e in zip(pos, expected):
+        assert np.array_equal(field.samplePoint(p), e)
+        assert np.array_equal(field.sample(p), e)
+
+    # Random off-grid points (not dyadic)
+    pos = rng.uniform(lo, hi, (200, 3))
+    np.testing.assert_allclose(field.sample(pos), pos @ A.T + b, rtol=1e-12, atol=1e-12)
+
+    # Out of the grid (no wind), on every side
+    outside = np.vstack((lo - [0.01, 0, 0], lo - [0, 0.01, 0], lo - [0, 0, 0.01],
+                         hi + [0.01, 0, 0], hi + [0, 0.01, 0], hi + [0, 0, 0.01], hi + 100))
+    assert np.array_equal(field.sample(outside), np.zeros([len(outside), 3]))
+    for p in outside:
+        assert field.samplePoint(p) == (0.0, 0.0, 0.0)
+
+
+def test_wind_with_field():
+    # A zero field gives exactly the base wind (scalar and array paths)
+    zero = WindField([0, 0, 0], [1, 1, 1], np.zeros([4, 4, 4, 3]))
+    base = Wind('Sine', 2.0, 90, -15)
+    wind = Wind('Sine', 2.0, 90, -15)
+    wind.setField(zero)
+    rng = np.random.default_rng(1)
+    pos = rng.uniform(-1, 4, (50, 3))
+    t = np.linspace(0, 10, 50)
+    for ti, p in zip(t, pos):
+        assert wind.randomWind(ti, p) == base.randomWind(ti)
+    for a, e in zip(wind.windArrays(t, pos), base.windArrays(t)):
+        assert np.array_equal(a, e)
+
+    # A uniform field adds its velocity to the wind vector
+    uniform = WindField([0, 0, 0], [1, 1, 1], np.tile([1.0, -2.0, 0.5], (4, 4, 4, 1)))
+    wind.setField(uniform)
+    p = np.array([1.5, 1.5, 1.5])
+    velW, qW1, qW2 = base.randomWind(2.0)
+    wx = velW*np.cos(qW2)*np.cos(qW1) + 1.0
+    wy = velW*np.cos(qW2)*np.sin(qW1) - 2.0
+    wz = -velW*np.sin(qW2) + 0.5
+    v = np.sqrt(wx*wx + wy*wy + wz*wz)
+    expected = (v, np.arctan2(wy, wx), np.arcsin(-wz/v))
+    np.testing.assert_allclose(wind.randomWind(2.0, p), expected, rtol=1e-14)
+    np.testing.assert_allclose(np.array(wind.windArrays(np.array([2.0]), p[np.newaxis])).ravel(), expected, rtol=1e-14)